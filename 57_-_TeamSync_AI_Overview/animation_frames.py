@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Animation Frame Compiler
+Samples vlmData animations into fixed-rate per-entity position buffers
+
+Keyframed animations (playerMovements paths and ballMovement from/to, as
+written by generate_animation and generate_basic_animation) are sampled
+once at a fixed frame rate. Positions are quantized to 1/scale yard and
+delta-encoded along time per entity, which keeps both the JSON and the
+binary form small. Decoding is a single cumulative sum, after which frame
+lookup is a constant-time array index.
+
+Timing model: a movement walks its path at constant speed per segment over
+its duration, starting at the sequence startTime; the ball travels from ->
+to over its duration likewise. Entities hold their last position between
+movements and jump to the start of a new path if it begins elsewhere.
+"""
+
+import sys
+import json
+import struct
+import zlib
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Tuple
+
+from vlm_binary import INT_DTYPES, narrowest_dtype
+from catalog_writer import load_catalog_file
+
+DEFAULT_FPS = 30
+# 1/10 yard resolution: a 120x80 yard field fits comfortably in int16
+DEFAULT_SCALE = 10
+BALL_ID = 'ball'
+
+FRAMES_MAGIC = b'VLMF'
+ARCHIVE_MAGIC = b'VLMA'
+FORMAT_VERSION = 1
+# Version 2 adds each drill's catalog position to the index, so repeated drill ids stay apart
+ARCHIVE_VERSION = 2
+# version, fps, duration ms, scale, frames, entities, loop, start dtype, delta dtype
+FRAMES_HEADER = struct.Struct('<BHIHIH?BB')
+
+# Keys just before a jump, so interpolation holds the old position until then
+HOLD_EPSILON_MS = 1e-3
+
+class FrameBuffer:
+    """Quantized positions of every entity at every frame of one animation"""
+
+    def __init__(self, animation_id: str, fps: int, duration: int, loop: bool, scale: int,
+                 entity_ids: List[str], x: np.ndarray, y: np.ndarray):
+        self.animation_id = animation_id
+        self.fps = fps
+        self.duration = duration
+        self.loop = loop
+        self.scale = scale
+        self.entity_ids = entity_ids
+        # Absolute quantized positions, shape (entities, frames)
+        self.x = x
+        self.y = y
+        self.index = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+
+    @property
+    def frame_count(self) -> int:
+        return self.x.shape[1]
+
+    def frame_at(self, ms: float) -> int:
+        """Frame shown at a playback time (wrapping when looped, clamped otherwise)"""
+        frame = int(ms * self.fps // 1000)
+        if self.loop:
+            return frame % self.frame_count
+        return min(max(frame, 0), self.frame_count - 1)
+
+    def positions(self, frame: int) -> np.ndarray:
+        """(entities, 2) array of yard positions at a frame, in entity_ids order"""
+        return np.stack([self.x[:, frame], self.y[:, frame]], axis=1) / self.scale
+
+    def position(self, entity_id: str, frame: int) -> Tuple[float, float]:
+        """Yard position of one entity at a frame"""
+        i = self.index[entity_id]
+        return self.x[i, frame] / self.scale, self.y[i, frame] / self.scale
+
+    def deltas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-entity time deltas; the first column holds absolute positions"""
+        return (np.diff(self.x, axis=1, prepend=0), np.diff(self.y, axis=1, prepend=0))
+
+    def to_json(self) -> Dict[str, Any]:
+        """JSON form: per-entity delta arrays (decode with a running sum)"""
+        dx, dy = self.deltas()
+        return {
+            'id': self.animation_id,
+            'fps': self.fps,
+            'duration': self.duration,
+            'loop': self.loop,
+            'scale': self.scale,
+            'frameCount': self.frame_count,
+            'entities': self.entity_ids,
+            'dx': dx.tolist(),
+            'dy': dy.tolist()
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'FrameBuffer':
+        entities = len(data['entities'])
+        shape = (entities, data['frameCount'])
+        x = np.cumsum(np.asarray(data['dx'], dtype=np.int64).reshape(shape), axis=1)
+        y = np.cumsum(np.asarray(data['dy'], dtype=np.int64).reshape(shape), axis=1)
+        return cls(data['id'], data['fps'], data['duration'], data['loop'], data['scale'],
+                   list(data['entities']), x, y)
+
+    def encode(self) -> bytes:
+        """Binary form: header, names, start positions, then x/y deltas in the narrowest int dtypes"""
+        starts = np.concatenate([self.x[:, 0], self.y[:, 0]])
+        deltas = np.concatenate([np.diff(self.x, axis=1).ravel(), np.diff(self.y, axis=1).ravel()])
+        start_code = narrowest_dtype(int(starts.min()), int(starts.max())) if starts.size else 0
+        delta_code = narrowest_dtype(int(deltas.min()), int(deltas.max())) if deltas.size else 0
+        out = bytearray(FRAMES_MAGIC)
+        out += FRAMES_HEADER.pack(FORMAT_VERSION, self.fps, self.duration, self.scale, self.frame_count,
+                                  len(self.entity_ids), self.loop, start_code, delta_code)
+        for name in [self.animation_id] + self.entity_ids:
+            raw = name.encode('utf-8')
+            out += struct.pack('<H', len(raw)) + raw
+        out += starts.astype(np.dtype(INT_DTYPES[start_code]).newbyteorder('<')).tobytes()
+        out += deltas.astype(np.dtype(INT_DTYPES[delta_code]).newbyteorder('<')).tobytes()
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes, offset: int = 0) -> 'FrameBuffer':
+        if data[offset:offset + 4] != FRAMES_MAGIC:
+            raise ValueError("Not an animation frame buffer")
+        (version, fps, duration, scale, frame_count, entities, loop,
+         start_code, delta_code) = FRAMES_HEADER.unpack_from(data, offset + 4)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported frame buffer version {version}")
+        pos = offset + 4 + FRAMES_HEADER.size
+        names = []
+        for _ in range(entities + 1):
+            length, = struct.unpack_from('<H', data, pos)
+            names.append(data[pos + 2:pos + 2 + length].decode('utf-8'))
+            pos += 2 + length
+
+        start_dtype = np.dtype(INT_DTYPES[start_code]).newbyteorder('<')
+        starts = np.frombuffer(data, dtype=start_dtype, count=2 * entities, offset=pos).astype(np.int64)
+        pos += 2 * entities * start_dtype.itemsize
+        delta_dtype = np.dtype(INT_DTYPES[delta_code]).newbyteorder('<')
+        deltas = np.frombuffer(data, dtype=delta_dtype, count=2 * entities * (frame_count - 1),
+                               offset=pos).astype(np.int64).reshape(2, entities, frame_count - 1)
+        x, y = np.cumsum(np.concatenate([starts.reshape(2, entities, 1), deltas], axis=2), axis=2)
+        return cls(names[0], fps, duration, loop, scale, names[1:], x, y)
+
+def _entity_tracks(animation: Dict[str, Any], players: List[Dict], equipment: List[Dict]) -> Dict[str, List[Tuple[float, float, float]]]:
+    """(time, x, y) keyframes per entity, starting from the static layout"""
+    tracks = {player['id']: [(0.0, player['x'], player['y'])] for player in players}
+    ball = next((item for item in equipment if item.get('type') == 'ball'), None)
+    if ball is not None:
+        tracks[BALL_ID] = [(0.0, ball['x'], ball['y'])]
+
+    def move(entity_id: str, start: float, duration: float, path: List[Dict[str, float]]):
+        if not path:
+            return
+        keys = tracks.setdefault(entity_id, [(0.0, path[0]['x'], path[0]['y'])])
+        _, last_x, last_y = keys[-1]
+        # Hold the previous position right up to the start of this movement
+        if start > keys[-1][0]:
+            keys.append((start - HOLD_EPSILON_MS, last_x, last_y))
+        steps = max(len(path) - 1, 1)
+        for i, point in enumerate(path):
+            keys.append((start + duration * i / steps, point['x'], point['y']))
+
+    for sequence in sorted(animation.get('sequences', []), key=lambda s: s.get('startTime', 0)):
+        start = sequence.get('startTime', 0)
+        for movement in sequence.get('playerMovements', []):
+            move(movement['playerId'], start + movement.get('delay', 0), movement.get('duration', 0), movement.get('path', []))
+        ball_movement = sequence.get('ballMovement')
+        if ball_movement:
+            move(BALL_ID, start, ball_movement.get('duration', 0), [ball_movement['from'], ball_movement['to']])
+    return tracks
+
+def compile_animation(animation: Dict[str, Any], players: List[Dict], equipment: List[Dict],
+                      fps: int = DEFAULT_FPS, scale: int = DEFAULT_SCALE) -> FrameBuffer:
+    """Sample one animation into a FrameBuffer"""
+    duration = int(animation.get('duration', 0))
+    loop = bool(animation.get('loop', False))
+    # A looped animation's last frame would repeat its first
+    frame_count = max(1, -(-duration * fps // 1000) + (0 if loop else 1))
+    times = np.arange(frame_count) * (1000.0 / fps)
+
+    tracks = _entity_tracks(animation, players, equipment)
+    entity_ids = list(tracks)
+    x = np.empty((len(entity_ids), frame_count), dtype=np.int64)
+    y = np.empty_like(x)
+    for i, entity_id in enumerate(entity_ids):
+        keys = np.asarray(tracks[entity_id], dtype=np.float64)
+        # Stable sort keeps the order of keys that share a time
+        keys = keys[np.argsort(keys[:, 0], kind='stable')]
+        x[i] = np.round(np.interp(times, keys[:, 0], keys[:, 1]) * scale)
+        y[i] = np.round(np.interp(times, keys[:, 0], keys[:, 2]) * scale)
+    return FrameBuffer(animation.get('id', ''), fps, duration, loop, scale, entity_ids, x, y)
+
+def compile_vlm_data(vlm_data: Dict[str, Any], fps: int = DEFAULT_FPS, scale: int = DEFAULT_SCALE) -> List[FrameBuffer]:
+    """Sample every animation of a drill's vlmData"""
+    players = vlm_data.get('players', [])
+    equipment = vlm_data.get('equipment', [])
+    return [compile_animation(animation, players, equipment, fps, scale) for animation in vlm_data.get('animations', [])]
+
+def iter_catalog_frames(drills: List[Dict[str, Any]], fps: int = DEFAULT_FPS,
+                        scale: int = DEFAULT_SCALE) -> Iterator[Tuple[int, str, FrameBuffer]]:
+    """Yield (catalog position, drill id, frame buffer) for every animation in a catalog
+
+    Drill ids are not unique in every catalog, so the position identifies the drill.
+    """
+    for position, drill in enumerate(drills):
+        for frames in compile_vlm_data(drill.get('vlmData', {}), fps, scale):
+            yield position, drill['id'], frames
+
+def encode_archive(entries: List[Tuple[int, str, FrameBuffer]], compress: bool = True) -> bytes:
+    """Pack many frame buffers with an index of (catalog position, drill id, animation id, offset, length)"""
+    blobs = [frames.encode() for _, _, frames in entries]
+    index = bytearray(struct.pack('<I', len(entries)))
+    offset = 0
+    for (position, drill_id, frames), blob in zip(entries, blobs):
+        index += struct.pack('<I', position)
+        for name in (drill_id, frames.animation_id):
+            raw = name.encode('utf-8')
+            index += struct.pack('<H', len(raw)) + raw
+        index += struct.pack('<II', offset, len(blob))
+        offset += len(blob)
+    payload = bytes(index) + b''.join(blobs)
+    if compress:
+        payload = zlib.compress(payload, 9)
+    return ARCHIVE_MAGIC + struct.pack('<B?', ARCHIVE_VERSION, compress) + payload
+
+def decode_archive(data: bytes) -> List[Tuple[int, str, FrameBuffer]]:
+    """Unpack an archive into (catalog position, drill id, FrameBuffer) entries, in archive order"""
+    if data[:4] != ARCHIVE_MAGIC:
+        raise ValueError("Not an animation frame archive")
+    version, compressed = struct.unpack_from('<B?', data, 4)
+    if version != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported frame archive version {version}")
+    payload = zlib.decompress(data[6:]) if compressed else data[6:]
+
+    count, = struct.unpack_from('<I', payload, 0)
+    pos = 4
+    index = []
+    for _ in range(count):
+        position, = struct.unpack_from('<I', payload, pos)
+        pos += 4
+        names = []
+        for _ in range(2):
+            length, = struct.unpack_from('<H', payload, pos)
+            names.append(payload[pos + 2:pos + 2 + length].decode('utf-8'))
+            pos += 2 + length
+        offset, _ = struct.unpack_from('<II', payload, pos)
+        pos += 8
+        index.append((position, names[0], offset))
+    return [(position, drill_id, FrameBuffer.decode(payload, pos + offset)) for position, drill_id, offset in index]
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Compile drill animations into fixed-rate frame buffers")
+    parser.add_argument('catalog', type=Path, help="Drill catalog (.json, .ndjson or .vlmb)")
+    parser.add_argument('--output', type=Path, help="Output file (default: next to the catalog)")
+    parser.add_argument('--format', choices=('json', 'binary'), default='binary',
+                        help="binary (.vlma archive) or json ([{drillId, animations: [frames, ...]}, ...] "
+                             "in catalog order)")
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS, help="Frames per second")
+    parser.add_argument('--scale', type=int, default=DEFAULT_SCALE, help="Quantization steps per yard")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None):
+    """Compile every animation in a catalog"""
+    args = parse_args(argv)
+
+    print("\n" + "="*80)
+    print("COMPILING ANIMATION FRAME BUFFERS")
+    print("="*80 + "\n")
+
+    if args.catalog.suffix == '.vlmb':
+        from vlm_binary import load_binary
+        drills = load_binary(args.catalog)
+    else:
+        drills = load_catalog_file(args.catalog)
+    entries = list(iter_catalog_frames(drills, args.fps, args.scale))
+    frame_total = sum(frames.frame_count for _, _, frames in entries)
+    print(f"🎞️  {len(entries)} animations from {len(drills)} drills, {frame_total} frames at {args.fps} fps")
+
+    if args.format == 'binary':
+        output = args.output or args.catalog.with_suffix('.frames.vlma')
+        data = encode_archive(entries)
+    else:
+        output = args.output or args.catalog.with_suffix('.frames.json')
+        # One item per catalog position, so drills sharing an id keep their own frames
+        by_drill = [{'drillId': drill['id'], 'animations': []} for drill in drills]
+        for position, _, frames in entries:
+            by_drill[position]['animations'].append(frames.to_json())
+        data = json.dumps(by_drill, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    tmp_path = output.with_name(output.name + '.tmp')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(output)
+
+    print(f"✅ Saved frame buffers to: {output}")
+    print(f"💾 File size: {len(data) / 1024:.1f} KB")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
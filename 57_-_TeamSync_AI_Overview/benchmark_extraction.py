@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Extraction Pipeline Benchmark
+Builds a deterministic synthetic corpus of session plan PDFs and measures
+per-stage throughput and peak memory of extract_mayouthsoccer_drills.py
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import platform
+import argparse
+import tempfile
+import resource
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from contextlib import redirect_stdout
+from typing import List, Dict, Any, Callable, Tuple
+
+import numpy as np
+import cv2
+import fitz
+
+import extract_mayouthsoccer_drills as extractor
+from diagram_index import DiagramIndex
+
+BENCHMARK_VERSION = "1.0"
+DEFAULT_RESULTS = Path("benchmark_results.json")
+
+AGE_GROUPS = ['U6', 'U8', 'U10', 'U12', 'U14']
+SESSION_THEMES = ['Building-Up-in-Own-Half', 'Scoring-Goals', 'Preventing-Goals', 'Week']
+DRILL_NAMES = ['Passing Gates', 'Rondo Circle', 'Finishing Patterns', 'Defensive Shape', 'Dribble Tag', 'Keep Away']
+
+# PDF metadata is pinned so the same seed always produces byte-identical files
+FIXED_PDF_METADATA = {
+    'title': 'Synthetic Session Plan',
+    'author': 'benchmark_extraction.py',
+    'creator': 'benchmark_extraction.py',
+    'producer': 'PyMuPDF',
+    'creationDate': "D:20240801000000+00'00'",
+    'modDate': "D:20240801000000+00'00'",
+}
+
+def synthetic_diagram(rng: random.Random, width: int, height: int) -> bytes:
+    """Render a field diagram with blue/red players and yellow cones as PNG"""
+    scale = min(width / 600, height / 400)
+    img = np.full((height, width, 3), 255, np.uint8)
+    cv2.rectangle(img, (int(20 * scale), int(20 * scale)), (width - int(20 * scale), height - int(20 * scale)),
+                  (0, 120, 0), max(1, int(2 * scale)))
+
+    def dot(color: Tuple[int, int, int], radius: int):
+        margin = int(40 * scale)
+        center = (rng.randint(margin, width - margin), rng.randint(margin, height - margin))
+        cv2.circle(img, center, max(2, int(radius * scale)), color, -1)
+
+    for _ in range(rng.randint(3, 7)):
+        dot((255, 0, 0), 10)       # blue attackers (BGR)
+    for _ in range(rng.randint(1, 4)):
+        dot((0, 0, 255), 10)       # red defenders
+    for _ in range(rng.randint(2, 8)):
+        dot((0, 220, 255), 6)      # yellow cones
+    return cv2.imencode('.png', img)[1].tobytes()
+
+def synthetic_section(rng: random.Random, number: int) -> str:
+    """Text of one drill section in the layout the real session plans use"""
+    attackers, defenders = rng.randint(2, 6), rng.randint(1, 4)
+    width, height = rng.choice([(20, 15), (30, 20), (40, 30), (25, 25)])
+    return (
+        f"ACTIVITY {number}\n"
+        f"Activity: {rng.choice(DRILL_NAMES)} {number}\n"
+        f"Objective: Improve decision making under pressure\n"
+        f"Organization: Set up a {width}x{height} yard grid with cones.\n"
+        f"Players rotate every {rng.randint(2, 4)} minutes.\n\n"
+        f"Coaching Points:\n"
+        f"- Keep the ball moving quickly\n"
+        f"- Open body shape to receive\n"
+        f"- Communicate early with teammates\n"
+        f"Duration: {rng.choice([10, 12, 15, 20])} minutes\n"
+        f"Format: {attackers}v{defenders} with {attackers + defenders} players\n"
+    )
+
+def build_corpus(corpus_dir: Path, pdfs: int = 20, drills_per_pdf: int = 3, seed: int = 0,
+                 diagram_size: Tuple[int, int] = (1200, 800)) -> Dict[str, List[Path]]:
+    """Write a deterministic corpus and return it as {age_group: [pdf paths]}"""
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    logo = synthetic_diagram(random.Random(-1), 120, 80)
+    corpus = {}
+
+    for i in range(pdfs):
+        age_group = AGE_GROUPS[i % len(AGE_GROUPS)]
+        theme = SESSION_THEMES[(i // len(AGE_GROUPS)) % len(SESSION_THEMES)]
+        pdf_path = corpus_dir / age_group / f"{age_group}-{theme}-{i + 1}.pdf"
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+
+        doc = fitz.open()
+        doc.set_metadata(FIXED_PDF_METADATA)
+        for number in range(1, drills_per_pdf + 1):
+            page = doc.new_page()
+            # Shared logo on every page exercises the xref image cache
+            page.insert_image(fitz.Rect(20, 20, 80, 60), stream=logo)
+            page.insert_text((72, 100), synthetic_section(rng, number), fontsize=11)
+            page.insert_image(fitz.Rect(72, 400, 540, 712), stream=synthetic_diagram(rng, *diagram_size))
+        doc.save(pdf_path, garbage=3, deflate=True, no_new_id=True)
+        doc.close()
+
+        corpus.setdefault(age_group, []).append(pdf_path)
+
+    return corpus
+
+def corpus_digest(corpus: Dict[str, List[Path]]) -> str:
+    """SHA-256 over every PDF in the corpus, so runs can check they measured the same input"""
+    digest = hashlib.sha256()
+    for age_group in sorted(corpus):
+        for pdf_path in corpus[age_group]:
+            digest.update(extractor.file_sha256(pdf_path).encode('ascii'))
+    return digest.hexdigest()
+
+def measure(stage: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """Run a stage repeat times for the best wall time, then once more under tracemalloc for peak memory"""
+    best = None
+    items = 0
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items = stage()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Tracing slows allocation-heavy code, so it is kept out of the timed runs
+        tracemalloc.start()
+        try:
+            stage()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'items': items,
+        'seconds': round(best, 6),
+        'itemsPerSecond': round(items / best, 2) if best else None,
+        'peakTracedBytes': peak
+    }
+
+def paired_sections(text_data: Dict[str, Any], images: List[Dict[str, Any]]) -> List[Tuple[str, Any]]:
+    """Drill section texts with their paired diagram image (or None), the same way process_pdf finds them"""
+    diagrams = extractor.page_diagrams(text_data['pages'], images)
+    sections = extractor.segment_drills(text_data['pages'], diagrams)
+    return [
+        (section['text'], None if image_index is None else images[image_index]['image'])
+        for section, image_index in zip(sections, extractor.pair_diagrams(sections, diagrams))
+    ]
+
+def run_benchmark(corpus: Dict[str, List[Path]], repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Measure every pipeline stage over the corpus"""
+    pdf_jobs = [(age_group, pdf_path) for age_group, pdf_paths in corpus.items() for pdf_path in pdf_paths]
+    # A persisted diagram index would turn repeated runs into lookups; stages measure the analysis itself
+    hash_distance = extractor.DIAGRAM_HASH_DISTANCE
+    extractor.set_diagram_dedup(-1)
+    try:
+        return measure_stages(pdf_jobs, repeat)
+    finally:
+        extractor.set_diagram_dedup(hash_distance)
+
+def measure_stages(pdf_jobs: List[Tuple[str, Path]], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Measure each stage over (age_group, pdf_path) jobs"""
+    stages = {}
+
+    def text_stage() -> int:
+        return sum(extractor.extract_text_from_pdf(pdf_path)['page_count'] for _, pdf_path in pdf_jobs)
+    stages['extract_text_from_pdf'] = measure(text_stage, repeat)
+
+    def image_stage() -> int:
+        return sum(len(extractor.extract_images_from_pdf(pdf_path)) for _, pdf_path in pdf_jobs)
+    stages['extract_images_from_pdf'] = measure(image_stage, repeat)
+
+    # Inputs for the later stages are prepared outside the timed regions
+    documents = [extractor.read_pdf(pdf_path) for _, pdf_path in pdf_jobs]
+    sections = []
+    section_diagrams = []
+    for (age_group, _), (text_data, images) in zip(pdf_jobs, documents):
+        for text, pdf_image in paired_sections(text_data, images):
+            sections.append((age_group, text))
+            diagram = None
+            if pdf_image is not None:
+                # Released again so the batch stages below decode from the compressed bytes
+                diagram = pdf_image.decode()
+                pdf_image.release()
+            section_diagrams.append(diagram)
+    diagrams = [diagram for diagram in section_diagrams if diagram is not None]
+
+    def segment_stage() -> int:
+        return sum(len(paired_sections(text_data, images)) for text_data, images in documents)
+    stages['segment_drills'] = measure(segment_stage, repeat)
+
+    def decode_stage() -> int:
+        count = 0
+        for _, pdf_path in pdf_jobs:
+            text_data, images = extractor.read_pdf(pdf_path)
+            for image_index, _, _ in extractor.page_diagrams(text_data['pages'], images):
+                images[image_index]['image'].decode()
+                images[image_index]['image'].release()
+                count += 1
+        return count
+    stages['decode_diagrams'] = measure(decode_stage, repeat)
+
+    def analyze_stage() -> int:
+        for diagram in diagrams:
+            extractor.analyze_diagram(diagram)
+        return len(diagrams)
+    stages['analyze_diagram'] = measure(analyze_stage, repeat)
+
+    # Decode + analyze every paired diagram of the corpus on the diagram thread pool
+    pdf_images = [
+        pdf_image
+        for text_data, images in documents
+        for _, pdf_image in paired_sections(text_data, images) if pdf_image is not None
+    ]
+
+    def batch_stage() -> int:
+        return len(extractor.analyze_diagrams_batch((image, None) for image in pdf_images))
+    stages['analyze_diagrams_batch'] = measure(batch_stage, repeat)
+
+    # Same batch through a fresh diagram index: the hashing and lookup overhead on unique diagrams
+    def dedup_stage() -> int:
+        index = DiagramIndex()
+        return len(extractor.analyze_diagrams_batch(((image, None) for image in pdf_images), index=index))
+    stages['analyze_diagrams_dedup'] = measure(dedup_stage, repeat)
+
+    def parse_stage() -> int:
+        for age_group, text in sections:
+            extractor.parse_drill_from_text(text, age_group, 1, "Scoring Goals")
+        return len(sections)
+    stages['parse_drill_from_text'] = measure(parse_stage, repeat)
+
+    drill_infos = [extractor.parse_drill_from_text(text, age_group, 1, "Scoring Goals") for age_group, text in sections]
+    # Diagrams are mapped into their drill's area, as in process_pdf
+    analyses = [
+        {} if diagram is None else extractor.analyze_diagram(diagram, field_area=extractor.drill_field_area(drill_info))
+        for drill_info, diagram in zip(drill_infos, section_diagrams)
+    ]
+
+    def vlm_stage() -> int:
+        for drill_info, analysis in zip(drill_infos, analyses):
+            extractor.generate_vlm_data(drill_info, analysis)
+        return len(drill_infos)
+    stages['generate_vlm_data'] = measure(vlm_stage, repeat)
+
+    drills = [
+        extractor.create_drill_object(drill_info, extractor.generate_vlm_data(drill_info, analysis), 'benchmark.pdf')
+        for drill_info, analysis in zip(drill_infos, analyses)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_json = extractor.OUTPUT_JSON
+        extractor.OUTPUT_JSON = Path(tmp) / 'drills.json'
+        try:
+            def save_stage() -> int:
+                extractor.save_drills_json(drills)
+                return len(drills)
+            stages['save_drills_json'] = measure(save_stage, repeat)
+        finally:
+            extractor.OUTPUT_JSON = output_json
+
+    def pdf_stage() -> int:
+        return sum(len(extractor.process_pdf(pdf_path, age_group)) for age_group, pdf_path in pdf_jobs)
+    stages['process_pdf'] = measure(pdf_stage, repeat)
+
+    # The whole sequential run, which begins later PDFs while earlier diagrams are analyzed
+    corpus = {}
+    for age_group, pdf_path in pdf_jobs:
+        corpus.setdefault(age_group, []).append(pdf_path)
+
+    def run_stage() -> int:
+        return sum(len(drills) for _, drills in extractor.iter_pdf_drills(corpus, use_cache=False))
+    stages['iter_pdf_drills'] = measure(run_stage, repeat)
+
+    return stages
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print per-stage speed ratios against an earlier results file"""
+    print("\nStage                       baseline s   current s   speedup")
+    for stage, result in current['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if not before:
+            print(f"  {stage:26s} {'-':>10s}  {result['seconds']:10.4f}")
+            continue
+        ratio = before['seconds'] / result['seconds'] if result['seconds'] else float('inf')
+        print(f"  {stage:26s} {before['seconds']:10.4f}  {result['seconds']:10.4f}   {ratio:5.2f}x")
+    if baseline.get('corpus', {}).get('sha256') != current['corpus']['sha256']:
+        print("⚠️  Baseline was measured on a different corpus")
+
+def parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the drill extraction pipeline on a synthetic corpus")
+    parser.add_argument('--pdfs', type=int, default=20, help="Number of PDFs in the corpus")
+    parser.add_argument('--drills-per-pdf', type=int, default=3, help="Drill sections (pages) per PDF")
+    parser.add_argument('--diagram-size', type=parse_size, default=(1200, 800), help="Diagram resolution, WxH")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage (best time is kept)")
+    parser.add_argument('--corpus-dir', type=Path, help="Keep the corpus here instead of a temp directory")
+    parser.add_argument('--output', type=Path, default=DEFAULT_RESULTS, help="Results JSON file")
+    parser.add_argument('--compare', type=Path, help="Earlier results JSON to compare against")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None):
+    """Build the corpus, run every stage and write the results"""
+    args = parse_args(argv)
+
+    print("\n" + "="*80)
+    print("EXTRACTION PIPELINE BENCHMARK")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or Path(tmp) / 'corpus'
+        corpus = build_corpus(corpus_dir, pdfs=args.pdfs, drills_per_pdf=args.drills_per_pdf,
+                              seed=args.seed, diagram_size=args.diagram_size)
+        pdf_paths = [pdf_path for pdf_paths in corpus.values() for pdf_path in pdf_paths]
+        print(f"📄 Corpus: {len(pdf_paths)} PDFs, {args.drills_per_pdf} drills each "
+              f"({sum(p.stat().st_size for p in pdf_paths) / 1024:.0f} KB)")
+
+        results = {
+            'benchmark': 'extraction',
+            'benchmarkVersion': BENCHMARK_VERSION,
+            'extractorVersion': extractor.EXTRACTOR_VERSION,
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count(),
+            'corpus': {
+                'pdfs': len(pdf_paths),
+                'drillsPerPdf': args.drills_per_pdf,
+                'diagramSize': list(args.diagram_size),
+                'seed': args.seed,
+                'bytes': sum(p.stat().st_size for p in pdf_paths),
+                'sha256': corpus_digest(corpus)
+            },
+            'repeat': args.repeat,
+            'stages': run_benchmark(corpus, repeat=args.repeat)
+        }
+        # ru_maxrss is in KB on Linux
+        results['maxRssBytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    print(f"\n{'Stage':26s} {'items':>7s} {'seconds':>10s} {'items/s':>10s} {'peak MB':>9s}")
+    for stage, result in results['stages'].items():
+        print(f"  {stage:24s} {result['items']:7d} {result['seconds']:10.4f} "
+              f"{result['itemsPerSecond'] or 0:10.1f} {result['peakTracedBytes'] / 1e6:9.1f}")
+
+    print(f"\n  Max RSS: {results['maxRssBytes'] / 1e6:.1f} MB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📁 Results: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(results, json.load(f))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Drill Catalog Writer
+Streams drills to disk as they are produced instead of dumping one big list
+"""
+
+import os
+import json
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Tuple
+
+import vlm_binary
+
+AGE_ORDER = ['U6', 'U8', 'U10', 'U12', 'U14']
+
+# pretty  - single indented JSON array (the original catalog file)
+# compact - single JSON array without whitespace, for production
+# ndjson  - one drill per line
+# sharded - one compact JSON array per age group plus manifest.json
+# binary  - columnar VLM binary (see vlm_binary.py); needs the whole catalog
+#           in memory to build its columns
+CATALOG_FORMATS = ('pretty', 'compact', 'ndjson', 'sharded', 'binary')
+
+# Formats that can write repeated blocks once and reference them
+SHARED_BLOCK_FORMATS = ('compact', 'ndjson', 'sharded')
+
+# Drill fields that are often identical across drills; with share_blocks each
+# distinct value is written once and drills hold {"$ref": "<block id>"}
+SHARED_BLOCK_PATHS = (
+    ('vlmData', 'players'),
+    ('vlmData', 'equipment'),
+    ('vlmData', 'zones'),
+    ('vlmData', 'animations'),
+    ('vlmData', 'coaching'),
+    ('setupInstructions',),
+    ('playerActions',),
+    ('coachingPoints',),
+    ('variations',),
+)
+
+def catalog_path(output_json: Path, fmt: str) -> Path:
+    """Return the file (or shard directory) a catalog format is written to"""
+    if fmt == 'ndjson':
+        return output_json.with_suffix('.ndjson')
+    if fmt == 'sharded':
+        return output_json.with_suffix('')
+    if fmt == 'binary':
+        return output_json.with_suffix('.vlmb')
+    return output_json
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+class BlockTable:
+    """Assign ids to distinct shared blocks and swap them for references"""
+
+    def __init__(self):
+        self.ids = {}
+
+    def share(self, drill: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+        """Return the drill with references plus (id, json) of blocks seen for the first time"""
+        drill = dict(drill)
+        copied = set()
+        new_blocks = []
+        for path in SHARED_BLOCK_PATHS:
+            parent = drill
+            for depth, key in enumerate(path[:-1]):
+                if not isinstance(parent.get(key), dict):
+                    parent = None
+                    break
+                # Copy containers on the way down so the caller's drill is untouched
+                if path[:depth + 1] not in copied:
+                    parent[key] = dict(parent[key])
+                    copied.add(path[:depth + 1])
+                parent = parent[key]
+            if parent is None or path[-1] not in parent:
+                continue
+
+            text = _compact_json(parent[path[-1]])
+            block_id = self.ids.get(text)
+            if block_id is None:
+                block_id = self.ids[text] = f"b{len(self.ids)}"
+                new_blocks.append((block_id, text))
+            parent[path[-1]] = {'$ref': block_id}
+        return drill, new_blocks
+
+def resolve_blocks(drill: Dict[str, Any], blocks: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace block references in a drill (in place); resolved drills share block objects"""
+    for path in SHARED_BLOCK_PATHS:
+        parent = drill
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+        if not isinstance(parent, dict):
+            continue
+        value = parent.get(path[-1])
+        if isinstance(value, dict) and '$ref' in value:
+            parent[path[-1]] = blocks[value['$ref']]
+    return drill
+
+def load_catalog_file(path: Path) -> List[Dict[str, Any]]:
+    """Read a catalog written in any JSON format, resolving shared blocks"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.ndjson':
+            drills = []
+            blocks = {}
+            for line in f:
+                record = json.loads(line)
+                if '$block' in record:
+                    blocks[record['$block']] = record['value']
+                else:
+                    drills.append(resolve_blocks(record, blocks))
+            return drills
+        document = json.load(f)
+    if isinstance(document, dict):
+        return [resolve_blocks(drill, document['blocks']) for drill in document['drills']]
+    return document
+
+class JsonArrayStream:
+    """Write a JSON array one element at a time
+
+    Pretty output is byte-identical to json.dump(items, f, indent=2). With
+    share_blocks the array is wrapped as {"drills": [...], "blocks": {...}}.
+    """
+
+    def __init__(self, path: Path, pretty: bool = False, share_blocks: bool = False):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.pretty = pretty
+        self.count = 0
+        self.blocks = BlockTable() if share_blocks else None
+        self.block_texts = []
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.file.write('{"drills":[' if share_blocks else '[')
+
+    def write(self, item: Dict[str, Any]):
+        if self.blocks is not None:
+            item, new_blocks = self.blocks.share(item)
+            self.block_texts.extend(new_blocks)
+        if self.pretty:
+            text = json.dumps(item, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            self.file.write((',\n  ' if self.count else '\n  ') + text)
+        else:
+            self.file.write((',' if self.count else '') + _compact_json(item))
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.pretty and self.count else ']')
+        if self.blocks is not None:
+            self.file.write(',"blocks":{' + ','.join(f'"{block_id}":{text}' for block_id, text in self.block_texts) + '}}')
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+class NdjsonStream:
+    """Write one JSON document per line
+    
+    With share_blocks, a {"$block": id, "value": ...} line precedes the first
+    drill that references that block.
+    """
+
+    def __init__(self, path: Path, share_blocks: bool = False):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.count = 0
+        self.blocks = BlockTable() if share_blocks else None
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, item: Dict[str, Any]):
+        if self.blocks is not None:
+            item, new_blocks = self.blocks.share(item)
+            for block_id, text in new_blocks:
+                self.file.write(f'{{"$block":"{block_id}","value":{text}}}\n')
+        self.file.write(_compact_json(item) + '\n')
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+class BinaryStream:
+    """Collect drills and write them as one columnar VLM binary file on close"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.items = []
+
+    @property
+    def count(self) -> int:
+        return len(self.items)
+
+    def write(self, item: Dict[str, Any]):
+        self.items.append(item)
+
+    def close(self):
+        vlm_binary.save_binary(self.tmp_path, self.items)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.items = []
+        self.tmp_path.unlink(missing_ok=True)
+
+class CatalogWriter:
+    """Stream drills into the catalog in one of CATALOG_FORMATS
+
+    Drills are written in the order they are given and summary counts are
+    kept incrementally, so memory stays flat however large the catalog is
+    (except for the binary format, which is columnar over the whole catalog).
+    Files are written to a temporary name and swapped in on close().
+    """
+
+    def __init__(self, output_json: Path, fmt: str = 'pretty', share_blocks: bool = False):
+        if fmt not in CATALOG_FORMATS:
+            raise ValueError(f"Unknown catalog format: {fmt}")
+        if share_blocks and fmt not in SHARED_BLOCK_FORMATS:
+            raise ValueError(f"Shared blocks are only supported for {', '.join(SHARED_BLOCK_FORMATS)}")
+        self.fmt = fmt
+        self.share_blocks = share_blocks
+        self.path = catalog_path(output_json, fmt)
+        self.count = 0
+        self.by_age = {}
+        self.by_category = {}
+        self.streams = {}
+
+        if fmt == 'sharded':
+            self.path.mkdir(parents=True, exist_ok=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if fmt == 'ndjson':
+                self.streams[None] = NdjsonStream(self.path, share_blocks=share_blocks)
+            elif fmt == 'binary':
+                self.streams[None] = BinaryStream(self.path)
+            else:
+                self.streams[None] = JsonArrayStream(self.path, pretty=fmt == 'pretty', share_blocks=share_blocks)
+
+    def __enter__(self) -> 'CatalogWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _stream_for(self, age: str):
+        if self.fmt != 'sharded':
+            return self.streams[None]
+        if age not in self.streams:
+            self.streams[age] = JsonArrayStream(self.path / f"{age}.json", share_blocks=self.share_blocks)
+        return self.streams[age]
+
+    def write(self, drill: Dict[str, Any]):
+        """Write one drill and update the summary counts"""
+        age = drill['ageGroup']
+        cat = drill['category']
+        self._stream_for(age).write(drill)
+        self.count += 1
+        self.by_age[age] = self.by_age.get(age, 0) + 1
+        self.by_category[cat] = self.by_category.get(cat, 0) + 1
+
+    def write_many(self, drills: Iterable[Dict[str, Any]]):
+        """Write drills in order"""
+        for drill in drills:
+            self.write(drill)
+
+    def close(self) -> List[Path]:
+        """Finish every file and return the paths written"""
+        for stream in self.streams.values():
+            stream.close()
+        paths = [stream.path for stream in self.streams.values()]
+
+        if self.fmt == 'sharded':
+            manifest_path = self.path / 'manifest.json'
+            stale = self._previous_shards(manifest_path) - {path.name for path in paths}
+            tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest(), f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, manifest_path)
+            # Shards of age groups this catalog no longer has go once the new manifest is in place
+            for name in stale:
+                (self.path / name).unlink(missing_ok=True)
+            paths.append(manifest_path)
+
+        return paths
+
+    def _previous_shards(self, manifest_path: Path) -> set:
+        """Shard file names listed in the manifest of the catalog being replaced"""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        return {Path(shard['file']).name for shard in previous.get('shards', []) if shard.get('file')}
+
+    def abort(self):
+        """Drop partially written files, keeping the previous catalog in place"""
+        for stream in self.streams.values():
+            stream.abort()
+
+    def manifest(self) -> Dict[str, Any]:
+        """Describe the shards so clients can fetch only the age group they need"""
+        ages = sorted(self.by_age, key=lambda age: AGE_ORDER.index(age) if age in AGE_ORDER else 999)
+        return {
+            'generated': datetime.now().isoformat(),
+            'totalDrills': self.count,
+            'shards': [
+                {
+                    'ageGroup': age,
+                    'file': self.streams[age].path.name,
+                    'drills': self.by_age[age],
+                    'bytes': self.streams[age].path.stat().st_size
+                }
+                for age in ages
+            ],
+            'byCategory': dict(sorted(self.by_category.items())),
+            'sharedBlocks': self.share_blocks
+        }
+
+    def size_bytes(self) -> int:
+        """Total size of the files written so far (after close)"""
+        return sum(stream.path.stat().st_size for stream in self.streams.values() if stream.path.exists())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Diagram Hash Index
+Persistent hash index of analyzed diagrams, so duplicate and near-duplicate
+diagrams across session PDFs are only analyzed once
+
+Each diagram is keyed twice: by the SHA-1 of its compressed bytes (exact
+copies, found without decoding) and by an occupancy hash of its color
+classes (re-encoded copies). Near-duplicate lookup splits the hash into
+max_distance + 1 bands; two hashes within max_distance bits must agree on at
+least one band, so only diagrams sharing a band are compared. A candidate
+must also match the share of pixels in each class, which catches an added
+player or cone that lands in an already occupied cell. The index keeps at most
+max_entries diagrams; the ones added longest ago are dropped on save.
+"""
+
+import os
+import json
+import threading
+import time
+import numpy as np
+import cv2
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+INDEX_VERSION = 1
+
+# Occupancy grid per class; 16x16 cells x 3 classes = 768-bit hashes
+HASH_SIZE = 16
+HASH_CLASSES = 3
+HASH_BITS = HASH_SIZE * HASH_SIZE * HASH_CLASSES
+# A cell is occupied when at least this share (of 255) of its pixels has the class
+HASH_MIN_FILL = 4
+# Pixels sampled along each side of a cell
+HASH_SAMPLES = 8
+# JPEG re-encoding flips at most 1 bit; a moved player flips 2
+DEFAULT_MAX_DISTANCE = 1
+# Largest relative difference in a class's pixel share between two copies of a diagram
+FILL_TOLERANCE = 0.05
+# Diagrams kept in a saved index (~1.5 KB of JSON each, so about 7 MB at the cap)
+DEFAULT_MAX_ENTRIES = 5000
+
+def hash_distance(first: int, second: int) -> int:
+    """Number of bits in which two hashes differ"""
+    bits = first ^ second
+    return bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1')
+
+def diagram_signature(classes: np.ndarray, class_bits: Tuple[int, ...],
+                      hash_size: int = HASH_SIZE) -> Tuple[int, List[float]]:
+    """Occupancy hash of a class-labelled image (one bit per grid cell per class) and each class's pixel share
+
+    Brightness-based hashes (aHash/dHash) are dominated by compression noise
+    in the white background and barely notice one extra player; which cells
+    hold which class is what decides whether two diagrams are the same drill.
+    """
+    # Every step-th pixel still leaves each cell HASH_SAMPLES samples a side, at a fraction of the cost
+    step = max(1, min(classes.shape[:2]) // (hash_size * HASH_SAMPLES))
+    sampled = classes[::step, ::step]
+    bits, fills = [], []
+    for class_bit in class_bits:
+        mask = cv2.compare(sampled, class_bit, cv2.CMP_EQ)
+        bits.append(cv2.resize(mask, (hash_size, hash_size), interpolation=cv2.INTER_AREA).reshape(-1) > HASH_MIN_FILL)
+        fills.append(cv2.countNonZero(mask) / mask.size)
+    return int.from_bytes(np.packbits(np.concatenate(bits)).tobytes(), 'big'), fills
+
+def fills_match(first: List[float], second: List[float], tolerance: float = FILL_TOLERANCE) -> bool:
+    """Whether two diagrams have the same share of pixels in every class, within tolerance"""
+    return all(abs(a - b) <= tolerance * max(a, b) for a, b in zip(first, second))
+
+class DiagramIndex:
+    """Thread-safe map from diagram hashes to stored analysis results
+
+    config identifies how the stored results were produced (e.g. working
+    resolution, extractor version); an index saved with a different config
+    is discarded on load. New entries are tracked so worker processes can
+    hand them back to the parent (drain_new / merge) for a single save.
+    Beyond max_entries, save drops the entries added longest ago.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, config: Dict[str, Any] = None,
+                 hash_bits: int = HASH_BITS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_distance = max_distance
+        self.config = config or {}
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # entry id -> {'hash': int, 'fills': [float], 'result': Any, 'added': float}
+        self.entries = {}
+        # compressed-bytes digest -> entry id
+        self.digests = {}
+        # (band number, band value) -> [entry ids]
+        self.bands = {}
+        self.new_entries = []
+        self.dirty = False
+
+        bands = max_distance + 1
+        edges = np.linspace(0, hash_bits, bands + 1).astype(int).tolist()
+        self.band_masks = [((1 << (end - start)) - 1, start) for start, end in zip(edges[:-1], edges[1:])]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _band_keys(self, image_hash: int) -> List[Tuple[int, int]]:
+        return [(band, (image_hash >> shift) & mask) for band, (mask, shift) in enumerate(self.band_masks)]
+
+    def _insert(self, entry_id: str, image_hash: int, fills: List[float], digests: List[str], result: Any,
+                added: float = None) -> bool:
+        """Add an entry under the lock; False if it was already known"""
+        known = entry_id in self.entries
+        if not known:
+            self.entries[entry_id] = {
+                'hash': image_hash, 'fills': fills, 'result': result,
+                'added': time.time() if added is None else added
+            }
+            for key in self._band_keys(image_hash):
+                self.bands.setdefault(key, []).append(entry_id)
+        for digest in digests:
+            self.digests.setdefault(digest, entry_id)
+        return not known
+
+    def _evict(self) -> bool:
+        """Drop the oldest entries beyond max_entries under the lock; True if any were dropped"""
+        excess = len(self.entries) - self.max_entries
+        if excess <= 0:
+            return False
+        oldest = sorted(self.entries, key=lambda entry_id: self.entries[entry_id]['added'])[:excess]
+        for entry_id in oldest:
+            for key in self._band_keys(self.entries.pop(entry_id)['hash']):
+                self.bands[key].remove(entry_id)
+                if not self.bands[key]:
+                    del self.bands[key]
+        dropped = set(oldest)
+        self.digests = {digest: entry_id for digest, entry_id in self.digests.items() if entry_id not in dropped}
+        return True
+
+    def get_digest(self, digest: str) -> Any:
+        """Stored result for an exact byte-level copy, or None"""
+        with self.lock:
+            entry_id = self.digests.get(digest)
+            return None if entry_id is None else self.entries[entry_id]['result']
+
+    def find(self, image_hash: int, fills: List[float], digest: str = None) -> Any:
+        """Stored result of the closest diagram within max_distance bits and matching fills, or None
+
+        A hit is also recorded under digest, so the next exact copy skips decoding.
+        """
+        with self.lock:
+            best_id, best_distance = None, self.max_distance + 1
+            seen = set()
+            for key in self._band_keys(image_hash):
+                for entry_id in self.bands.get(key, ()):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    entry = self.entries[entry_id]
+                    distance = hash_distance(entry['hash'], image_hash)
+                    if distance < best_distance and fills_match(entry['fills'], fills):
+                        best_id, best_distance = entry_id, distance
+            if best_id is None:
+                return None
+            if digest and digest not in self.digests:
+                self.digests[digest] = best_id
+                self.new_entries.append((best_id, self.entries[best_id]['hash'], None, [digest], None))
+                self.dirty = True
+            return self.entries[best_id]['result']
+
+    def add(self, image_hash: int, fills: List[float], digest: str, result: Any):
+        """Store a freshly computed result (result must be JSON-serializable)"""
+        entry_id = digest or format(image_hash, 'x')
+        digests = [digest] if digest else []
+        with self.lock:
+            if self._insert(entry_id, image_hash, fills, digests, result):
+                self.new_entries.append((entry_id, image_hash, fills, digests, result))
+                self.dirty = True
+
+    def drain_new(self) -> List[Tuple[str, int, List[float], List[str], Any]]:
+        """Entries added since the last drain, in a picklable form"""
+        with self.lock:
+            new_entries, self.new_entries = self.new_entries, []
+            return new_entries
+
+    def merge(self, new_entries: List[Tuple[str, int, List[float], List[str], Any]]):
+        """Fold entries drained from another index (e.g. a worker process) into this one"""
+        with self.lock:
+            for entry_id, image_hash, fills, digests, result in new_entries:
+                if result is None and entry_id not in self.entries:
+                    # Digest alias of an entry this index has not seen
+                    continue
+                self._insert(entry_id, image_hash, fills, digests, result)
+                self.dirty = True
+
+    @classmethod
+    def load(cls, path: Path, max_distance: int = DEFAULT_MAX_DISTANCE, config: Dict[str, Any] = None,
+             max_entries: int = DEFAULT_MAX_ENTRIES) -> 'DiagramIndex':
+        """Load a saved index; a missing, unreadable or differently configured file gives an empty one"""
+        index = cls(max_distance, config, max_entries=max_entries)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if saved.get('version') != INDEX_VERSION or saved.get('config') != index.config:
+            return index
+
+        digests_by_entry = {}
+        for digest, entry_id in saved.get('digests', {}).items():
+            digests_by_entry.setdefault(entry_id, []).append(digest)
+        for entry_id, entry in saved.get('entries', {}).items():
+            index._insert(entry_id, int(entry['hash'], 16), entry['fills'], digests_by_entry.get(entry_id, []),
+                          entry['result'], entry.get('added', 0.0))
+        return index
+
+    def save(self, path: Path):
+        """Atomically write the index as JSON if anything changed since it was loaded"""
+        with self.lock:
+            if self._evict():
+                self.dirty = True
+            if not self.dirty:
+                return
+            saved = {
+                'version': INDEX_VERSION,
+                'config': self.config,
+                'entries': {
+                    entry_id: {'hash': format(entry['hash'], 'x'), 'fills': entry['fills'], 'result': entry['result'],
+                               'added': entry['added']}
+                    for entry_id, entry in self.entries.items()
+                },
+                'digests': dict(self.digests)
+            }
+            self.dirty = False
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
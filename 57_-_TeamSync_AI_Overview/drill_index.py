@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Drill Catalog Index
+Inverted indexes over the drill catalog for fast filtered lookups and facet counts
+
+Each indexed value maps to a bitset (a Python int with bit i set for drill i),
+so a conjunctive query is a handful of integer ANDs regardless of catalog size.
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Union
+
+# Scalar fields and list fields (tags, keyWords) are indexed the same way
+INDEXED_FIELDS = ('ageGroup', 'category', 'difficulty', 'tags', 'keyWords', 'fieldSize')
+
+def _positions_to_bits(positions: Iterable[int], size: int) -> int:
+    """Build a bitset from drill positions"""
+    mask = np.zeros(size, dtype=bool)
+    mask[np.fromiter(positions, dtype=np.int64)] = True
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+def _bits_to_positions(bits: int, size: int, limit: int = None) -> np.ndarray:
+    """Expand a bitset into sorted drill positions (only the first limit when given)"""
+    words = np.frombuffer(bits.to_bytes(((size + 63) // 64) * 8, 'little'), dtype='<u8')
+    # Only unpack non-empty 64-bit words; each holds at least one position
+    nonzero = np.flatnonzero(words)
+    if limit is not None:
+        nonzero = nonzero[:limit]
+    flags = np.unpackbits(words[nonzero].view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    positions = (nonzero[:, None] * 64 + np.arange(64))[flags.astype(bool)]
+    return positions if limit is None else positions[:limit]
+
+def popcount(bits: int) -> int:
+    """Number of drills in a bitset"""
+    return bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1')
+
+class DrillIndex:
+    """Read-only query index over a list of drill dicts
+
+    Filters are keyword arguments named after INDEXED_FIELDS. A filter value
+    may be a single value or a list/tuple/set of alternatives (OR); different
+    fields are combined with AND. Player counts are filtered with
+    min_players / max_players.
+    """
+
+    def __init__(self, drills: Iterable[Dict[str, Any]]):
+        self.drills = list(drills)
+        size = len(self.drills)
+        self.all_bits = (1 << size) - 1
+
+        positions = {field: {} for field in INDEXED_FIELDS}
+        player_positions = {}
+        self.by_id = {}
+        for i, drill in enumerate(self.drills):
+            self.by_id.setdefault(drill.get('id'), i)
+            for field in INDEXED_FIELDS:
+                values = drill.get(field)
+                if values is None:
+                    continue
+                if not isinstance(values, list):
+                    values = [values]
+                for value in set(values):
+                    positions[field].setdefault(value, []).append(i)
+            player_positions.setdefault(drill.get('playerCount', 0), []).append(i)
+
+        self.postings = {
+            field: {value: _positions_to_bits(found, size) for value, found in values.items()}
+            for field, values in positions.items()
+        }
+
+        # Cumulative bitsets: players_at_most[k] holds every drill with playerCount <= player_counts[k]
+        self.player_counts = sorted(player_positions)
+        self.players_at_most = []
+        cumulative = 0
+        for count in self.player_counts:
+            cumulative |= _positions_to_bits(player_positions[count], size)
+            self.players_at_most.append(cumulative)
+
+    @classmethod
+    def from_json(cls, path: Path) -> 'DrillIndex':
+        """Build an index from a catalog JSON file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.drills)
+
+    def _players_bits(self, min_players: int = None, max_players: int = None) -> int:
+        bits = self.all_bits
+        if max_players is not None:
+            k = int(np.searchsorted(self.player_counts, max_players, side='right'))
+            bits = self.players_at_most[k - 1] if k else 0
+        if min_players is not None:
+            k = int(np.searchsorted(self.player_counts, min_players, side='left'))
+            if k:
+                bits &= ~self.players_at_most[k - 1]
+        return bits
+
+    def match(self, min_players: int = None, max_players: int = None, **filters: Union[Any, List[Any]]) -> int:
+        """Bitset of drills matching every filter"""
+        bits = self._players_bits(min_players, max_players)
+        for field, wanted in filters.items():
+            if field not in self.postings:
+                raise KeyError(f"{field} is not an indexed field ({', '.join(INDEXED_FIELDS)})")
+            postings = self.postings[field]
+            if isinstance(wanted, (list, tuple, set, frozenset)):
+                alternatives = 0
+                for value in wanted:
+                    alternatives |= postings.get(value, 0)
+                bits &= alternatives
+            else:
+                bits &= postings.get(wanted, 0)
+            if not bits:
+                break
+        return bits
+
+    def iter_positions(self, bits: int) -> Iterator[int]:
+        """Drill positions in a bitset, in catalog order"""
+        return iter(_bits_to_positions(bits, len(self.drills)).tolist())
+
+    def query(self, limit: int = None, **filters) -> List[Dict[str, Any]]:
+        """Drills matching every filter, in catalog order"""
+        positions = _bits_to_positions(self.match(**filters), len(self.drills), limit)
+        return [self.drills[i] for i in positions.tolist()]
+
+    def first(self, **filters) -> Dict[str, Any]:
+        """First matching drill in catalog order, or None"""
+        bits = self.match(**filters)
+        if not bits:
+            return None
+        return self.drills[(bits & -bits).bit_length() - 1]
+
+    def count(self, **filters) -> int:
+        """Number of drills matching every filter"""
+        return popcount(self.match(**filters))
+
+    def get(self, drill_id: str) -> Dict[str, Any]:
+        """Look up a drill by id (first one if ids repeat), or None"""
+        i = self.by_id.get(drill_id)
+        return None if i is None else self.drills[i]
+
+    def facets(self, fields: Iterable[str] = INDEXED_FIELDS, **filters) -> Dict[str, Dict[Any, int]]:
+        """Counts per value of each field among the drills matching the filters"""
+        bits = self.match(**filters)
+        result = {}
+        for field in fields:
+            counts = {}
+            for value, posting in self.postings[field].items():
+                count = popcount(bits & posting)
+                if count:
+                    counts[value] = count
+            result[field] = counts
+        return result
+
+    def player_count_range(self, **filters) -> Tuple[int, int]:
+        """(min, max) playerCount among matching drills, or None if nothing matches"""
+        bits = self.match(**filters)
+        if not bits:
+            return None
+        low = next(count for count, at_most in zip(self.player_counts, self.players_at_most) if at_most & bits)
+        high = next(count for count, at_most in zip(reversed(self.player_counts), reversed([0] + self.players_at_most[:-1]))
+                    if bits & ~at_most)
+        return low, high
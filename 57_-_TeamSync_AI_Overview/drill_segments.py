@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Drill Segmentation
+Layout-aware splitting of session plan PDFs into drill sections, built on
+the lines, font styles and bounding boxes of PyMuPDF's get_text("dict")
+
+Headings are found in one pass over the document's lines. In the MA Youth
+Soccer session plans every drill heading sits just above its diagram, set
+apart from the body text by font or size (e.g. Rockwell Condensed 10pt), so
+the line closest above each diagram is taken as a heading, and further lines
+in a recurring heading style that start in the same column are too.
+Documents without such headings fall back to the header patterns
+("ACTIVITY 2", "Drill #3", "4. Rondo") matched at line starts, then to one
+section per page. Each section is then paired with the diagram physically
+nearest to it.
+"""
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import List, Dict, Any, Tuple, Optional
+
+import fitz
+
+# Images covering less of their page than this are logos or icons, not diagrams
+MIN_DIAGRAM_SHARE = 0.01
+# Minimum text length for a drill section
+MIN_SECTION_CHARS = 100
+# Layout headings are used once at least this many diagrams have one (and a style
+# needs this many to mark every line in it as a heading)
+MIN_HEADING_VOTES = 2
+# How far (points) a heading may reach into the top of the diagram below it
+HEADING_OVERLAP = 2.0
+# Largest gap between a heading and its diagram, in heading line heights
+HEADING_GAP_LINES = 2.0
+# How far (points) a heading may start from the left edge of the anchored headings
+HEADING_INDENT = 12.0
+# Bold and italic span flags; the rest (superscript, serif, monospace) do not set headings apart
+STYLE_FLAGS = fitz.TEXT_FONT_BOLD | fitz.TEXT_FONT_ITALIC
+
+# Drill section headers in order of preference; the first kind found in a
+# document decides how it is split
+HEADING_PATTERNS = [
+    re.compile(r'(?:Activity|Drill|Exercise)\s*[#:]?\s*\d+'),
+    re.compile(r'(?:ACTIVITY|DRILL|EXERCISE)\s*\d+'),
+    re.compile(r'\d+\.\s+[A-Z][A-Za-z\s]+$'),
+]
+
+Rect = Tuple[float, float, float, float]
+
+def page_lines(page) -> List[Dict[str, Any]]:
+    """Non-blank text lines of a page in reading order, with bbox and the style of their longest span"""
+    lines = []
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT, sort=True)['blocks']:
+        for line in block['lines']:
+            spans = line['spans']
+            text = ''.join(span['text'] for span in spans)
+            if not text.strip():
+                continue
+            span = max(spans, key=lambda span: len(span['text'].strip()))
+            lines.append({
+                'text': text,
+                'bbox': tuple(line['bbox']),
+                'style': (span['font'], round(span['size'] * 2) / 2, span['flags'] & STYLE_FLAGS)
+            })
+    return lines
+
+def image_boxes(page, image_items: List[tuple]) -> Dict[int, Rect]:
+    """Bbox of the largest placement of each image xref on a page (image_items as from page.get_images())
+
+    Placements are matched to xrefs by pixel size; asking PyMuPDF for the
+    xrefs makes it hash every image on the page, which costs several times
+    more, so that is left for pages holding two images of the same size.
+    """
+    xrefs_by_size = {}
+    for item in image_items:
+        xrefs_by_size.setdefault((item[2], item[3]), []).append(item[0])
+    if any(len(xrefs) > 1 for xrefs in xrefs_by_size.values()):
+        placements = [(info['xref'], info['bbox']) for info in page.get_image_info(xrefs=True)]
+    else:
+        placements = [
+            (xrefs_by_size[(info['width'], info['height'])][0], info['bbox']) for info in page.get_image_info()
+            if (info['width'], info['height']) in xrefs_by_size
+        ]
+
+    boxes = {}
+    for xref, bbox in placements:
+        bbox = tuple(bbox)
+        if xref not in boxes or rect_area(bbox) > rect_area(boxes[xref]):
+            boxes[xref] = bbox
+    return boxes
+
+def page_diagrams(pages: List[Dict[str, Any]], images: List[Dict[str, Any]],
+                  min_share: float = MIN_DIAGRAM_SHARE) -> List[Tuple[int, int, Rect]]:
+    """(image index, page, bbox) of every placed image large enough to be a drill diagram"""
+    page_areas = {page['page']: page['width'] * page['height'] for page in pages}
+    diagrams = []
+    for image_index, image in enumerate(images):
+        bbox = image.get('bbox')
+        if bbox is None:
+            continue
+        if rect_area(bbox) >= min_share * page_areas.get(image['page'], float('inf')):
+            diagrams.append((image_index, image['page'], bbox))
+    return diagrams
+
+def _same_row(line: Dict[str, Any], other: Dict[str, Any]) -> bool:
+    """Whether two lines overlap vertically by more than half the height of the first"""
+    top, bottom = line['bbox'][1], line['bbox'][3]
+    return min(bottom, other['bbox'][3]) - max(top, other['bbox'][1]) > (bottom - top) / 2
+
+def _first_in_row(candidates: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Keep only the leftmost of heading candidates sharing a row (e.g. a heading and its DURATION line)"""
+    headings = []
+    for page_num, line in sorted(candidates, key=lambda item: (item[0], item[1]['bbox'][1])):
+        if headings and headings[-1][0] == page_num and _same_row(line, headings[-1][1]):
+            if line['bbox'][0] < headings[-1][1]['bbox'][0]:
+                headings[-1] = (page_num, line)
+            continue
+        headings.append((page_num, line))
+    return headings
+
+def find_headings(pages: List[Dict[str, Any]],
+                  diagrams: List[Tuple[int, int, Rect]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """(page, line) of every drill heading in document order, found in one pass over the lines"""
+    diagrams_by_page = {}
+    for _, page_num, bbox in diagrams:
+        diagrams_by_page.setdefault(page_num, []).append(bbox)
+
+    style_chars = Counter()
+    lines_by_style = {}
+    pattern_headings = [[] for _ in HEADING_PATTERNS]
+    # (page, diagram bbox) -> (gap, page, line) of the closest line above the diagram
+    closest_above = {}
+    for page in pages:
+        page_num = page['page']
+        page_diagram_boxes = diagrams_by_page.get(page_num, ())
+        for line in page['lines']:
+            text = line['text'].strip()
+            style_chars[line['style']] += len(text)
+            lines_by_style.setdefault(line['style'], []).append((page_num, line))
+
+            for kind, pattern in enumerate(HEADING_PATTERNS):
+                if pattern.match(text):
+                    pattern_headings[kind].append((page_num, line))
+
+            x0, _, x1, y1 = line['bbox']
+            for bbox in page_diagram_boxes:
+                if x0 < bbox[2] and x1 > bbox[0] and y1 <= bbox[1] + HEADING_OVERLAP:
+                    key = (page_num, bbox)
+                    gap = bbox[1] - y1
+                    if key not in closest_above or gap < closest_above[key][0]:
+                        closest_above[key] = (gap, page_num, line)
+
+    # Headings anchored by the diagram right below them, in any style but the body text's
+    body_style = style_chars.most_common(1)[0][0] if style_chars else None
+    anchors = [
+        (page_num, line) for gap, page_num, line in closest_above.values()
+        if line['style'] != body_style and gap <= HEADING_GAP_LINES * (line['bbox'][3] - line['bbox'][1])
+    ]
+    if len(anchors) >= MIN_HEADING_VOTES:
+        # Lines in a recurring anchor style that line up with an anchor head sections whose diagram is missing
+        votes = Counter(line['style'] for _, line in anchors)
+        anchor_x = [line['bbox'][0] for _, line in anchors]
+        candidates = {id(line): (page_num, line) for page_num, line in anchors}
+        for style, count in votes.items():
+            if count < MIN_HEADING_VOTES:
+                continue
+            for page_num, line in lines_by_style[style]:
+                if min(abs(line['bbox'][0] - x) for x in anchor_x) <= HEADING_INDENT:
+                    candidates.setdefault(id(line), (page_num, line))
+        # A heading row starts at its leftmost line, so a label beside the heading
+        # (the U13/U14 plans put "SET UP" over the diagram, right of "ACTIVITY 1") gives way to it
+        lines_by_page = {page['page']: page['lines'] for page in pages}
+        for page_num, line in list(candidates.values()):
+            for other in lines_by_page[page_num]:
+                if other['bbox'][0] < line['bbox'][0] and _same_row(line, other):
+                    candidates.setdefault(id(other), (page_num, other))
+        return _first_in_row(list(candidates.values()))
+
+    for headings in pattern_headings:
+        if headings:
+            return headings
+    return []
+
+def _union(first: Optional[Rect], second: Rect) -> Rect:
+    if first is None:
+        return second
+    return (min(first[0], second[0]), min(first[1], second[1]), max(first[2], second[2]), max(first[3], second[3]))
+
+def segment_drills(pages: List[Dict[str, Any]], diagrams: List[Tuple[int, int, Rect]],
+                   min_chars: int = MIN_SECTION_CHARS) -> List[Dict[str, Any]]:
+    """Split the document into drill sections: {'heading', 'text', 'page', 'boxes': {page: bbox}}
+
+    A section runs from its heading to the next one, across page breaks;
+    lines are assigned by their vertical midpoint, so text beside a heading
+    in another column (a DURATION line, say) stays with it. Text before the
+    first heading is dropped. Without headings every page is a section.
+    """
+    headings = find_headings(pages, diagrams)
+
+    if headings:
+        starts = [(page_num, line['bbox'][1]) for page_num, line in headings]
+        sections = [{'heading': line['text'].strip(), 'lines': [line['text']], 'page': page_num, 'boxes': {}}
+                    for page_num, line in headings]
+        heading_lines = {id(line) for _, line in headings}
+        for page in pages:
+            page_num = page['page']
+            for line in page['lines']:
+                bbox = line['bbox']
+                section_index = bisect_right(starts, (page_num, (bbox[1] + bbox[3]) / 2)) - 1
+                if section_index < 0:
+                    continue
+                section = sections[section_index]
+                section['boxes'][page_num] = _union(section['boxes'].get(page_num), bbox)
+                if id(line) not in heading_lines:
+                    section['lines'].append(line['text'])
+    else:
+        sections = []
+        for page in pages:
+            box = None
+            for line in page['lines']:
+                box = _union(box, line['bbox'])
+            sections.append({
+                'heading': page['lines'][0]['text'].strip() if page['lines'] else '',
+                'lines': [line['text'] for line in page['lines']],
+                'page': page['page'],
+                'boxes': {page['page']: box} if box else {}
+            })
+
+    drill_sections = []
+    for section in sections:
+        section['text'] = '\n'.join(section.pop('lines'))
+        if len(section['text']) > min_chars:
+            drill_sections.append(section)
+    return drill_sections
+
+def rect_area(rect: Rect) -> float:
+    return (rect[2] - rect[0]) * (rect[3] - rect[1])
+
+def rect_gap(first: Rect, second: Rect) -> float:
+    """Shortest distance between two rectangles (0 when they touch or overlap)"""
+    dx = max(first[0] - second[2], second[0] - first[2], 0.0)
+    dy = max(first[1] - second[3], second[1] - first[3], 0.0)
+    return (dx * dx + dy * dy) ** 0.5
+
+def rect_overlap(first: Rect, second: Rect) -> float:
+    """Area shared by two rectangles"""
+    dx = min(first[2], second[2]) - max(first[0], second[0])
+    dy = min(first[3], second[3]) - max(first[1], second[1])
+    return dx * dy if dx > 0 and dy > 0 else 0.0
+
+def pair_diagrams(sections: List[Dict[str, Any]], diagrams: List[Tuple[int, int, Rect]]) -> List[Optional[int]]:
+    """Image index of the diagram paired with each section, or None
+
+    Pairs are assigned greedily, closest first over the whole document, and
+    every diagram serves one section. Only diagrams on a page the section
+    has text on are candidates; among diagrams touching the section, one on
+    the heading's page wins, then the one it overlaps most.
+    """
+    candidates = []
+    for section_index, section in enumerate(sections):
+        for diagram_index, (_, page_num, bbox) in enumerate(diagrams):
+            box = section['boxes'].get(page_num)
+            if box is not None:
+                candidates.append((rect_gap(box, bbox), page_num != section['page'], -rect_overlap(box, bbox),
+                                   section_index, diagram_index))
+    candidates.sort()
+
+    paired = [None] * len(sections)
+    used = set()
+    for *_, section_index, diagram_index in candidates:
+        if paired[section_index] is None and diagram_index not in used:
+            paired[section_index] = diagrams[diagram_index][0]
+            used.add(diagram_index)
+    return paired
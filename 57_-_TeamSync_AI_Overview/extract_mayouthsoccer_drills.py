@@ -9,11 +9,17 @@ import sys
 import json
 import re
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable, Callable
 from datetime import datetime
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from collections import deque
 from urllib.parse import urljoin, urlparse
 import hashlib
 
@@ -31,6 +37,12 @@ except ImportError:
     import numpy as np
     import cv2
 
+from vlm_layout import LayoutBatch, parse_field_size, FIELD_WIDTH, FIELD_HEIGHT
+from catalog_writer import CatalogWriter, CATALOG_FORMATS, SHARED_BLOCK_FORMATS, AGE_ORDER, resolve_blocks
+from diagram_index import DiagramIndex, diagram_signature, DEFAULT_MAX_DISTANCE, DEFAULT_MAX_ENTRIES
+from drill_segments import page_lines, image_boxes, page_diagrams, segment_drills, pair_diagrams
+import run_metrics
+
 try:
     from tqdm import tqdm
 except ImportError:
@@ -42,8 +54,37 @@ except ImportError:
 BASE_URL = "https://www.mayouthsoccer.org"
 OUTPUT_DIR = Path("/home/ubuntu/mayouthsoccer_pdfs")
 OUTPUT_JSON = Path("/home/ubuntu/teamsync_ai/nextjs_space/lib/mayouthsoccer-drills.json")
+BUILD_MANIFEST_JSON = OUTPUT_JSON.with_suffix('.build-manifest.json')
+RUN_REPORT_JSON = OUTPUT_JSON.with_suffix('.run-report.json')
 REFERENCE_JSON = Path("/home/ubuntu/teamsync_ai/nextjs_space/lib/vlm-test-enhanced-rondo.json")
 
+# Extraction cache (bump EXTRACTOR_VERSION whenever parsing/VLM output changes)
+EXTRACTOR_VERSION = "1.5"
+CACHE_DIR = OUTPUT_DIR / ".extraction_cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MAX_AGE_DAYS = 30
+
+# Downloads in flight at once, across all age groups (also the keep-alive pool size)
+DOWNLOAD_CONCURRENCY = 8
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Decode diagrams at 1/2, 1/4 or 1/8 resolution (1 = full resolution)
+DIAGRAM_DECODE_REDUCTION = 1
+
+# Diagrams are shrunk so their longer side is at most this many pixels before analysis
+DIAGRAM_MAX_SIDE = 1200
+# Threads analyzing diagrams in each process (0 = one per CPU); OpenCV releases the GIL
+DIAGRAM_THREADS = 0
+# Sequential runs begin up to this many PDFs ahead to keep the diagram pool busy
+MAX_PDFS_AHEAD = 8
+
+# Analyzed diagrams by color-class occupancy hash, reused across PDFs and runs
+DIAGRAM_INDEX_JSON = CACHE_DIR / "diagrams" / "index.json"
+# Largest occupancy-hash distance (bits) still treated as the same diagram; -1 turns the index off
+DIAGRAM_HASH_DISTANCE = DEFAULT_MAX_DISTANCE
+# Diagrams kept in the index; the ones added longest ago are dropped first
+DIAGRAM_INDEX_MAX_ENTRIES = DEFAULT_MAX_ENTRIES
+
 # MA Youth Soccer PDF URLs (extracted from website)
 PDF_URLS = {
     # U6 Session Plans
@@ -114,72 +155,328 @@ PDF_URLS = {
     ],
 }
 
-def download_pdf(url: str, age_group: str) -> Tuple[str, Path]:
-    """Download a single PDF file"""
-    full_url = urljoin(BASE_URL, url)
+def make_download_session(pool_size: int = DOWNLOAD_CONCURRENCY) -> requests.Session:
+    """Create a requests session whose keep-alive pool fits pool_size concurrent downloads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def load_download_meta(meta_path: Path) -> Dict[str, Any]:
+    """Read the ETag/Last-Modified sidecar of a downloaded (or partial) PDF"""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def store_download_meta(meta_path: Path, response: requests.Response):
+    """Atomically record the validators of the response whose bytes are being written"""
+    if not (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+        return
+    meta = {
+        'url': response.url,
+        'etag': response.headers.get('ETag'),
+        'lastModified': response.headers.get('Last-Modified')
+    }
+    tmp_path = meta_path.with_name(f"{meta_path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+def complete_download(part_path: Path, output_path: Path, part_meta_path: Path, meta_path: Path):
+    """Move a finished .part into place, then its validators (or none) with it
+    
+    The file is replaced first: a crash in between leaves the old
+    validators, which only cost a redundant re-fetch next time.
+    """
+    os.replace(part_path, output_path)
+    if part_meta_path.exists():
+        os.replace(part_meta_path, meta_path)
+    else:
+        meta_path.unlink(missing_ok=True)
+
+def download_pdf(url: str, age_group: str, session: requests.Session = None,
+                 base_url: str = BASE_URL, output_dir: Path = OUTPUT_DIR,
+                 revalidate: bool = True) -> Tuple[str, Path]:
+    """Download a single PDF file
+    
+    Bytes stream into a .part file that is renamed into place only when
+    complete. A leftover .part is resumed with a Range request, and an
+    existing file is re-fetched only if its ETag/Last-Modified changed; one
+    without validators is re-fetched in full. The existing file stays in
+    place until a replacement is complete, and is used if the request fails.
+    Validators of the .part are kept in their own sidecar and replace the
+    file's only together with its bytes.
+    """
+    full_url = urljoin(base_url, url)
     filename = Path(url).name
-    output_path = OUTPUT_DIR / age_group / filename
+    output_path = output_dir / age_group / filename
+    part_path = output_path.with_name(f"{filename}.part")
+    meta_path = output_path.with_name(f"{filename}.meta.json")
+    part_meta_path = output_path.with_name(f"{filename}.part.meta.json")
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    if output_path.exists():
+    if output_path.exists() and not part_path.exists() and not revalidate:
         print(f"  ✓ Already downloaded: {filename}")
+        run_metrics.count('downloads.skipped', pdf=filename, age_group=age_group)
         return filename, output_path
+    meta = load_download_meta(meta_path) if output_path.exists() else {}
+    part_meta = load_download_meta(part_meta_path) if part_path.exists() else {}
+    validator = meta.get('etag') or meta.get('lastModified')
+    part_validator = part_meta.get('etag') or part_meta.get('lastModified')
+    # Without validators the existing file can only be checked by fetching it again
+    refetch = output_path.exists() and not part_path.exists() and not validator
+    
+    http = session or requests
+    headers = {}
+    resume_from = part_path.stat().st_size if part_path.exists() else 0
+    if resume_from:
+        headers['Range'] = f"bytes={resume_from}-"
+        if part_validator:
+            headers['If-Range'] = part_validator
+    elif output_path.exists() and not part_path.exists():
+        # An empty .part is a fetch that failed before any bytes came, so fetch in full
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('lastModified'):
+            headers['If-Modified-Since'] = meta['lastModified']
     
     try:
-        response = requests.get(full_url, timeout=30)
-        response.raise_for_status()
+        with http.get(full_url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                print(f"  ✓ Not modified: {filename}")
+                run_metrics.count('downloads.not_modified', pdf=filename, age_group=age_group)
+                return filename, output_path
+            
+            if response.status_code == 416 and resume_from:
+                # Nothing left to fetch if the partial file already has every byte
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == resume_from:
+                    if not part_validator:
+                        store_download_meta(part_meta_path, response)
+                    complete_download(part_path, output_path, part_meta_path, meta_path)
+                    print(f"  ✓ Verified: {filename}")
+                    run_metrics.count('downloads.verified', pdf=filename, age_group=age_group)
+                    return filename, output_path
+                part_path.unlink()
+                part_meta_path.unlink(missing_ok=True)
+                return download_pdf(url, age_group, session, base_url, output_dir, revalidate)
+            
+            response.raise_for_status()
+            
+            resumed = response.status_code == 206
+            if resumed and not response.headers.get('Content-Range', '').startswith(f"bytes {resume_from}-"):
+                raise ValueError(f"unexpected Content-Range {response.headers.get('Content-Range')!r}")
+            if not resumed:
+                # A full response starts the .part over, validators included
+                part_meta_path.unlink(missing_ok=True)
+            if not resumed or not part_validator:
+                store_download_meta(part_meta_path, response)
+            
+            received = 0
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+            run_metrics.count('downloads.bytes', received, pdf=filename, age_group=age_group)
         
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+        complete_download(part_path, output_path, part_meta_path, meta_path)
         
-        print(f"  ✓ Downloaded: {filename}")
+        print(f"  ✓ {'Resumed' if resumed else 'Downloaded'}: {filename}")
+        run_metrics.count('downloads.resumed' if resumed else 'downloads.fetched', pdf=filename, age_group=age_group)
         return filename, output_path
     except Exception as e:
-        print(f"  ✗ Failed to download {filename}: {e}")
-        return filename, None
+        if refetch:
+            # Nothing to resume against without a validator; keep the complete file instead
+            part_path.unlink(missing_ok=True)
+            part_meta_path.unlink(missing_ok=True)
+            print(f"  ⚠️  Could not re-check {filename} ({e}), keeping the downloaded copy")
+        else:
+            print(f"  ✗ Failed to download {filename}: {e}")
+        run_metrics.count('downloads.failed', pdf=filename, age_group=age_group)
+        return filename, output_path if output_path.exists() else None
 
-def download_all_pdfs() -> Dict[str, List[Path]]:
+async def download_all_pdfs_async(pdf_urls: Dict[str, List[str]], base_url: str = BASE_URL,
+                                  output_dir: Path = OUTPUT_DIR,
+                                  concurrency: int = DOWNLOAD_CONCURRENCY,
+                                  revalidate: bool = True) -> Dict[str, List[Path]]:
+    """Download every PDF under one global concurrency limit, reporting files as they finish
+    
+    All age groups share one semaphore and one pooled session, so there is no
+    barrier between groups. Results keep the pdf_urls order.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    jobs = [(age_group, url) for age_group, urls in pdf_urls.items() for url in urls]
+    paths = [None] * len(jobs)
+    
+    with make_download_session(concurrency) as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def fetch(index: int, age_group: str, url: str) -> Tuple[int, Path]:
+            async with semaphore:
+                with run_metrics.span('download', pdf=Path(url).name, age_group=age_group):
+                    _, path = await loop.run_in_executor(
+                        executor, download_pdf, url, age_group, session, base_url, output_dir, revalidate
+                    )
+            return index, path
+        
+        tasks = [fetch(index, age_group, url) for index, (age_group, url) in enumerate(jobs)]
+        for finished in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="  PDFs"):
+            index, path = await finished
+            paths[index] = path
+    
+    downloaded_files = {age_group: [] for age_group in pdf_urls}
+    for (age_group, _), path in zip(jobs, paths):
+        if path:
+            downloaded_files[age_group].append(path)
+    return downloaded_files
+
+def download_all_pdfs(base_url: str = BASE_URL, output_dir: Path = OUTPUT_DIR,
+                      concurrency: int = DOWNLOAD_CONCURRENCY, revalidate: bool = True) -> Dict[str, List[Path]]:
     """Download all PDFs with progress tracking"""
     print("\n" + "="*80)
     print("STEP 1: DOWNLOADING ALL MA YOUTH SOCCER SESSION PLAN PDFs")
     print("="*80 + "\n")
     
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    downloaded_files = {}
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    for age_group, urls in PDF_URLS.items():
-        print(f"\n📥 Downloading {age_group} Session Plans ({len(urls)} files)...")
-        downloaded_files[age_group] = []
-        
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(download_pdf, url, age_group): url for url in urls}
-            
-            for future in as_completed(futures):
-                filename, path = future.result()
-                if path:
-                    downloaded_files[age_group].append(path)
+    total_urls = sum(len(urls) for urls in PDF_URLS.values())
+    print(f"📥 Downloading {total_urls} Session Plans across {len(PDF_URLS)} age groups "
+          f"({concurrency} at a time)...")
+    
+    downloaded_files = asyncio.run(
+        download_all_pdfs_async(PDF_URLS, base_url=base_url, output_dir=output_dir, concurrency=concurrency,
+                                revalidate=revalidate)
+    )
+    
+    for age_group, files in downloaded_files.items():
+        print(f"  ✅ {age_group}: {len(files)}/{len(PDF_URLS[age_group])} PDFs")
     
     total_downloaded = sum(len(files) for files in downloaded_files.values())
     print(f"\n✅ Downloaded {total_downloaded} PDFs successfully")
     
     return downloaded_files
 
-def extract_text_from_pdf(pdf_path: Path) -> Dict[str, Any]:
-    """Extract text content from PDF"""
+def iter_pdf_pages(doc) -> Iterator[Dict[str, Any]]:
+    """Stream text lines, image xrefs and placements, and page geometry for each page of an open PDF"""
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        lines = page_lines(page)
+        image_items = page.get_images()
+        yield {
+            'page': page_num + 1,
+            'text': '\n'.join(line['text'] for line in lines),
+            'lines': lines,
+            'image_xrefs': [img[0] for img in image_items],
+            'image_boxes': image_boxes(page, image_items),
+            'width': page.rect.width,
+            'height': page.rect.height
+        }
+
+class PdfImage:
+    """Embedded PDF image that keeps its compressed bytes and decodes on demand"""
+
+    REDUCED_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }
+
+    def __init__(self, xref: int, image_bytes: bytes, ext: str, width: int, height: int):
+        self.xref = xref
+        self.image_bytes = image_bytes
+        self.ext = ext
+        self.width = width
+        self.height = height
+        self._decoded = {}
+
+    def decode(self, reduction: int = 1) -> Any:
+        """Decode to a BGR ndarray at 1/reduction resolution (None if undecodable)"""
+        if reduction not in self.REDUCED_FLAGS:
+            raise ValueError(f"Unsupported reduction {reduction}, expected one of {sorted(self.REDUCED_FLAGS)}")
+
+        if reduction in self._decoded:
+            return self._decoded[reduction]
+        
+        # Convert to numpy array for analysis; returned directly so a concurrent
+        # release() from another diagram thread cannot pull it out from under us
+        nparr = np.frombuffer(self.image_bytes, np.uint8)
+        decoded = cv2.imdecode(nparr, self.REDUCED_FLAGS[reduction])
+        self._decoded[reduction] = decoded
+        return decoded
+
+    def release(self):
+        """Drop decoded pixel buffers, keeping the compressed bytes"""
+        self._decoded.clear()
+
+def load_pdf_image(doc, xref: int) -> PdfImage:
+    """Extract a single embedded image by xref without decoding it"""
+    base_image = doc.extract_image(xref)
+    return PdfImage(
+        xref,
+        base_image["image"],
+        base_image.get("ext", ""),
+        base_image.get("width", 0),
+        base_image.get("height", 0)
+    )
+
+def read_pdf(pdf_path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Extract text and lazily decoded images (diagrams) from a PDF in a single pass"""
+    text_content = []
+    images = []
+    
+    # Images shared across pages (logos, repeated diagrams) are extracted once
+    image_cache = {}
+    
     try:
         doc = fitz.open(pdf_path)
-        text_content = []
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
+        for page_info in iter_pdf_pages(doc):
             text_content.append({
-                'page': page_num + 1,
-                'text': text
+                'page': page_info['page'],
+                'text': page_info['text'],
+                'lines': page_info['lines'],
+                'width': page_info['width'],
+                'height': page_info['height']
             })
+            
+            for img_index, xref in enumerate(page_info['image_xrefs']):
+                if xref not in image_cache:
+                    try:
+                        image_cache[xref] = load_pdf_image(doc, xref)
+                    except Exception:
+                        image_cache[xref] = None
+                
+                pdf_image = image_cache[xref]
+                if pdf_image is not None:
+                    images.append({
+                        'page': page_info['page'],
+                        'index': img_index,
+                        'xref': xref,
+                        'width': pdf_image.width,
+                        'height': pdf_image.height,
+                        'bbox': page_info['image_boxes'].get(xref),
+                        'image': pdf_image
+                    })
         
         doc.close()
+    except Exception as e:
+        print(f"  ✗ Error reading {pdf_path.name}: {e}")
+    
+    return {'pages': text_content, 'page_count': len(text_content)}, images
+
+def extract_text_from_pdf(pdf_path: Path) -> Dict[str, Any]:
+    """Extract text content from PDF"""
+    try:
+        doc = fitz.open(pdf_path)
+        text_content = [
+            {'page': page_info['page'], 'text': page_info['text']}
+            for page_info in iter_pdf_pages(doc)
+        ]
+        doc.close()
         return {'pages': text_content, 'page_count': len(text_content)}
     except Exception as e:
         print(f"  ✗ Error extracting text from {pdf_path.name}: {e}")
@@ -187,82 +484,92 @@ def extract_text_from_pdf(pdf_path: Path) -> Dict[str, Any]:
 
 def extract_images_from_pdf(pdf_path: Path) -> List[Dict[str, Any]]:
     """Extract images (diagrams) from PDF"""
-    images = []
-    
-    try:
-        doc = fitz.open(pdf_path)
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                try:
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    
-                    # Convert to numpy array for analysis
-                    nparr = np.frombuffer(image_bytes, np.uint8)
-                    img_np = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    if img_np is not None:
-                        images.append({
-                            'page': page_num + 1,
-                            'index': img_index,
-                            'width': img_np.shape[1],
-                            'height': img_np.shape[0],
-                            'data': img_np
-                        })
-                except Exception as e:
-                    continue
-        
-        doc.close()
-    except Exception as e:
-        print(f"  ✗ Error extracting images from {pdf_path.name}: {e}")
-    
+    _, images = read_pdf(pdf_path)
     return images
 
+# Drill sections are tokenized in one linear scan: the scanner only stops at
+# field keywords and digit runs, and the field patterns are then matched
+# anchored at that token. A digit pattern that fails at the start of a digit
+# run also fails inside it, so the first hit per field equals a re.search.
+DRILL_FIELD_SCANNER = re.compile(
+    r'Activity|Drill|Exercise|Organization|Coaching Point|Objective|Purpose|Goal|\d+', re.IGNORECASE
+)
+NAME_FIELD = ('name', re.compile(r'(?:Activity|Drill|Exercise)[\s:]+([A-Z][^\n]+)', re.IGNORECASE))
+OBJECTIVE_FIELD = ('objective', re.compile(r'(?:Objective|Purpose|Goal)[:\s]+([^\n]+)', re.IGNORECASE))
+DRILL_FIELD_ANCHORS = {
+    'activity': [NAME_FIELD],
+    'drill': [NAME_FIELD],
+    'exercise': [NAME_FIELD],
+    'organization': [('organization', re.compile(r'Organization[:\s]+([^\n]+(?:\n(?![A-Z][a-z]+:)[^\n]+)*)', re.IGNORECASE))],
+    'coaching point': [('coaching_points', re.compile(r'Coaching Points?[:\s]+', re.IGNORECASE))],
+    'objective': [OBJECTIVE_FIELD],
+    'purpose': [OBJECTIVE_FIELD],
+    'goal': [OBJECTIVE_FIELD],
+    'digits': [
+        ('versus', re.compile(r'(\d+)\s*(?:v|vs)\s*(\d+)')),
+        ('players', re.compile(r'(\d+)\s*players?', re.IGNORECASE)),
+        ('field_size', re.compile(r'(\d+)\s*[xX×]\s*(\d+)\s*(?:yard|yd|meter|m)')),
+        ('duration', re.compile(r'(\d+)\s*(?:min|minute)', re.IGNORECASE)),
+    ],
+}
+DRILL_FIELD_LABELS = ('name', 'organization', 'coaching_points', 'objective', 'versus', 'field_size', 'duration')
+
+# A "Label:" line ends a coaching points block
+SECTION_BOUNDARY = re.compile(r'\n[A-Z][a-z]+:', re.IGNORECASE)
+COACHING_POINT_SPLIT = re.compile(r'[•\-\n]')
+
+def scan_drill_fields(text: str) -> Dict[str, Any]:
+    """Find the first occurrence of every drill field in one scan of the text"""
+    fields = {}
+    for token in DRILL_FIELD_SCANNER.finditer(text):
+        word = token.group()
+        anchors = DRILL_FIELD_ANCHORS['digits' if word[0].isdigit() else word.lower()]
+        for label, pattern in anchors:
+            if label not in fields:
+                match = pattern.match(text, token.start())
+                if match:
+                    fields[label] = match
+        if all(label in fields for label in DRILL_FIELD_LABELS):
+            break
+    return fields
+
 def parse_drill_from_text(text: str, age_group: str, week: int, session_theme: str) -> Dict[str, Any]:
     """Parse drill information from text content"""
     
+    fields = scan_drill_fields(text)
+    
     # Extract drill name (usually in bold or all caps)
-    name_match = re.search(r'(?:Activity|Drill|Exercise)[\s:]+([A-Z][^\n]+)', text, re.IGNORECASE)
-    drill_name = name_match.group(1).strip() if name_match else "Unnamed Drill"
+    drill_name = fields['name'].group(1).strip() if 'name' in fields else "Unnamed Drill"
     
     # Extract organization/setup
-    org_match = re.search(r'Organization[:\s]+([^\n]+(?:\n(?![A-Z][a-z]+:)[^\n]+)*)', text, re.IGNORECASE)
-    organization = org_match.group(1).strip() if org_match else ""
+    organization = fields['organization'].group(1).strip() if 'organization' in fields else ""
     
-    # Extract coaching points
+    # Extract coaching points (up to the next "Label:" line or the end of the text)
     coaching_points = []
-    cp_match = re.search(r'Coaching Points?[:\s]+(.*?)(?=\n[A-Z][a-z]+:|$)', text, re.IGNORECASE | re.DOTALL)
-    if cp_match:
-        cp_text = cp_match.group(1)
-        coaching_points = [p.strip() for p in re.split(r'[•\-\n]', cp_text) if p.strip() and len(p.strip()) > 10]
+    if 'coaching_points' in fields:
+        cp_start = fields['coaching_points'].end()
+        cp_end = len(text) - 1 if text.endswith('\n') else len(text)
+        boundary = SECTION_BOUNDARY.search(text, cp_start, cp_end)
+        cp_text = text[cp_start:boundary.start() if boundary else cp_end]
+        coaching_points = [p.strip() for p in COACHING_POINT_SPLIT.split(cp_text) if p.strip() and len(p.strip()) > 10]
     
     # Extract objective
-    obj_match = re.search(r'(?:Objective|Purpose|Goal)[:\s]+([^\n]+)', text, re.IGNORECASE)
-    objective = obj_match.group(1).strip() if obj_match else ""
+    objective = fields['objective'].group(1).strip() if 'objective' in fields else ""
     
     # Extract player count
-    player_match = re.search(r'(\d+)\s*(?:v|vs)\s*(\d+)', text)
-    if player_match:
-        player_count = int(player_match.group(1)) + int(player_match.group(2))
+    if 'versus' in fields:
+        player_count = int(fields['versus'].group(1)) + int(fields['versus'].group(2))
     else:
-        player_count_match = re.search(r'(\d+)\s*players?', text, re.IGNORECASE)
-        player_count = int(player_count_match.group(1)) if player_count_match else 8
+        player_count = int(fields['players'].group(1)) if 'players' in fields else 8
     
     # Extract field dimensions
-    field_match = re.search(r'(\d+)\s*[xX×]\s*(\d+)\s*(?:yard|yd|meter|m)', text)
-    if field_match:
-        field_size = f"{field_match.group(1)}x{field_match.group(2)}"
+    if 'field_size' in fields:
+        field_size = f"{fields['field_size'].group(1)}x{fields['field_size'].group(2)}"
     else:
         field_size = "custom"
     
     # Extract duration
-    duration_match = re.search(r'(\d+)\s*(?:min|minute)', text, re.IGNORECASE)
-    duration = int(duration_match.group(1)) if duration_match else 15
+    duration = int(fields['duration'].group(1)) if 'duration' in fields else 15
     
     # Determine category from session theme
     category = "Technical"
@@ -287,132 +594,418 @@ def parse_drill_from_text(text: str, age_group: str, week: int, session_theme: s
         'session_theme': session_theme
     }
 
-def analyze_diagram(image_data: np.ndarray) -> Dict[str, Any]:
-    """Analyze drill diagram to extract positions and equipment"""
-    
-    # This is a simplified version - real CV would be more complex
-    # For now, we'll create reasonable defaults based on common patterns
+# Diagram pixel classes (one bit each): Blue = attackers, Red = defenders, Yellow = cones
+BLUE_CLASS = 1
+RED_CLASS = 2
+YELLOW_CLASS = 4
+DIAGRAM_CLASSES = (BLUE_CLASS, RED_CLASS, YELLOW_CLASS)
+
+# Classes admitted by each HSV hue (the class hue ranges are disjoint)
+DIAGRAM_HUE_LUT = np.zeros(256, np.uint8)
+DIAGRAM_HUE_LUT[100:131] = BLUE_CLASS
+DIAGRAM_HUE_LUT[0:11] = RED_CLASS
+DIAGRAM_HUE_LUT[170:181] = RED_CLASS
+DIAGRAM_HUE_LUT[20:31] = YELLOW_CLASS
+
+# Classes admitted by min(saturation, value): players need 50, cones need 100
+DIAGRAM_SV_LUT = np.zeros(256, np.uint8)
+DIAGRAM_SV_LUT[50:] = BLUE_CLASS | RED_CLASS
+DIAGRAM_SV_LUT[100:] = BLUE_CLASS | RED_CLASS | YELLOW_CLASS
+
+# Rows classified per strip, so intermediate HSV buffers stay cache-resident
+DIAGRAM_STRIP_ROWS = 32
+
+def classify_diagram_pixels(image_data: np.ndarray) -> np.ndarray:
+    """Label every pixel as BLUE_CLASS, RED_CLASS, YELLOW_CLASS or background (0)"""
+    height, width = image_data.shape[:2]
+    classes = np.empty((height, width), np.uint8)
+    
+    rows = DIAGRAM_STRIP_ROWS
+    hsv = np.empty((rows, width, 3), np.uint8)
+    hue = np.empty((rows, width), np.uint8)
+    saturation = np.empty((rows, width), np.uint8)
+    value = np.empty((rows, width), np.uint8)
+    
+    for top in range(0, height, rows):
+        n = min(rows, height - top)
+        cv2.cvtColor(image_data[top:top + n], cv2.COLOR_BGR2HSV, dst=hsv[:n])
+        cv2.split(hsv[:n], [hue[:n], saturation[:n], value[:n]])
+        
+        # A pixel keeps a class only if both its hue and its weaker of S/V admit it
+        sv_classes = cv2.min(saturation[:n], value[:n], dst=saturation[:n])
+        cv2.LUT(sv_classes, DIAGRAM_SV_LUT, dst=sv_classes)
+        strip = classes[top:top + n]
+        cv2.LUT(hue[:n], DIAGRAM_HUE_LUT, dst=strip)
+        cv2.bitwise_and(strip, sv_classes, dst=strip)
+    
+    return classes
+
+def _measure_blob(class_mask: np.ndarray,
+                  contour: np.ndarray) -> Tuple[Tuple[int, ...], Tuple[float, ...], Tuple[float, ...]]:
+    """Bounding box with pixel count, centroid (x, y) and central second moments of one blob
+    
+    The blob's pixels are those of its class inside its external contour.
+    Moments are (mu20, mu02, mu11) divided by the pixel count, derived from
+    OpenCV's raw moments over box-relative coordinates, which are exact
+    pixel sums (so symmetric blobs keep an orientation of exactly 0).
+    """
+    left, top, width, height = cv2.boundingRect(contour)
+    inside = np.zeros((height, width), np.uint8)
+    cv2.drawContours(inside, [contour], -1, 255, cv2.FILLED, offset=(-left, -top))
+    pixels = cv2.bitwise_and(inside, class_mask[top:top + height, left:left + width])
+    raw = cv2.moments(pixels, binaryImage=True)
+    count = raw['m00']
+    mean_x, mean_y = raw['m10'] / count, raw['m01'] / count
+    moments = (raw['m20'] / count - mean_x * mean_x, raw['m02'] / count - mean_y * mean_y,
+               raw['m11'] / count - mean_x * mean_y)
+    return (left, top, width, height, int(count)), (left + mean_x, top + mean_y), moments
+
+def diagram_components(image_data: np.ndarray, classes: np.ndarray = None,
+                       min_area: float = 0.0) -> Dict[int, Dict[str, np.ndarray]]:
+    """Find colored blobs from the external contours of each class mask
+    
+    Returns, per class bit, the blobs' contour areas, centroids (x, y),
+    boxes (left, top, width, height, pixel count) and central second
+    moments (mu20, mu02, mu11 per pixel), all as arrays. Areas are
+    cv2.contourArea of the external contour, so a ring marker's hole counts
+    and a blob inside another blob's hole is not a blob of its own; only
+    blobs whose area exceeds min_area are measured and returned. classes
+    may pass in an already computed classify_diagram_pixels result.
+    """
+    if classes is None:
+        classes = classify_diagram_pixels(image_data)
+    
+    result = {}
+    for class_bit in DIAGRAM_CLASSES:
+        class_mask = cv2.compare(classes, class_bit, cv2.CMP_EQ)
+        contours, _ = cv2.findContours(class_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Each contour starts at its blob's first pixel in raster order; keep blobs in that order
+        contours = sorted(contours, key=lambda contour: (contour[0, 0, 1], contour[0, 0, 0]))
+        contour_areas = [cv2.contourArea(contour) for contour in contours]
+        blobs = [
+            (area,) + _measure_blob(class_mask, contour)
+            for contour, area in zip(contours, contour_areas) if area > min_area
+        ]
+        areas, stats, centroids, moments = zip(*blobs) if blobs else ((), (), (), ())
+        result[class_bit] = {
+            'areas': np.array(areas, np.float64),
+            'centroids': np.array(centroids, np.float64).reshape(-1, 2),
+            'stats': np.array(stats, np.int32).reshape(-1, 5),
+            'moments': np.array(moments, np.float64).reshape(-1, 3)
+        }
+    return result
+
+def diagram_to_field(points: np.ndarray, image_width: int, image_height: int,
+                     field_area: Tuple[float, float, float, float] = None) -> Tuple[np.ndarray, float]:
+    """Map pixel (x, y) points into field yards
+    
+    The image is scaled uniformly to fit field_area (center_x, center_y,
+    width, height), by default the whole field. Returns the mapped points
+    and the yards-per-pixel scale.
+    """
+    center_x, center_y, area_width, area_height = field_area or (
+        FIELD_WIDTH / 2, FIELD_HEIGHT / 2, FIELD_WIDTH, FIELD_HEIGHT
+    )
+    scale = min(area_width / max(image_width, 1), area_height / max(image_height, 1))
+    mapped = np.empty((len(points), 2))
+    mapped[:, 0] = center_x + (points[:, 0] - image_width / 2) * scale
+    mapped[:, 1] = center_y + (points[:, 1] - image_height / 2) * scale
+    return mapped, scale
+
+def diagram_objects(component: Dict[str, np.ndarray], keep: np.ndarray, image_width: int, image_height: int,
+                    field_area: Tuple[float, float, float, float] = None) -> Dict[str, np.ndarray]:
+    """Field positions, sizes and orientations of the kept blobs of one class"""
+    positions, scale = diagram_to_field(component['centroids'][keep], image_width, image_height, field_area)
+    mu20, mu02, mu11 = component['moments'][keep].T
+    # Principal axes of each blob's second-moment ellipse
+    spread = np.sqrt(((mu20 - mu02) / 2) ** 2 + mu11 ** 2)
+    major = (mu20 + mu02) / 2 + spread
+    minor = np.maximum((mu20 + mu02) / 2 - spread, 1e-9)
+    return {
+        'x': np.round(positions[:, 0], 1),
+        'y': np.round(positions[:, 1], 1),
+        # Diameter of the circle with the blob's area
+        'size': np.round(2 * np.sqrt(component['areas'][keep] / np.pi) * scale, 2),
+        # Major axis angle in degrees, clockwise from the x axis (image y points down)
+        'orientation': np.round(np.degrees(0.5 * np.arctan2(2 * mu11, mu20 - mu02)) % 180, 1),
+        'elongation': np.round(np.sqrt(major / minor), 2)
+    }
+
+def analyze_diagram(image_data: np.ndarray, area_scale: float = 1.0,
+                    field_area: Tuple[float, float, float, float] = None, classes: np.ndarray = None) -> Dict[str, Any]:
+    """Analyze drill diagram to extract positions and equipment
+
+    area_scale shrinks the minimum blob areas for diagrams decoded at reduced resolution.
+    Object positions are mapped into field_area (center_x, center_y, width, height),
+    by default the whole 120x80 field.
+    """
     
     height, width = image_data.shape[:2]
     
     # Detect dominant colors (players typically shown as colored dots/circles)
-    # Blue = attackers, Red = defenders, Yellow = cones, White = balls
-    
-    # Convert to HSV for better color detection
-    hsv = cv2.cvtColor(image_data, cv2.COLOR_BGR2HSV)
-    
-    # Detect blue regions (attackers)
-    blue_mask = cv2.inRange(hsv, np.array([100, 50, 50]), np.array([130, 255, 255]))
-    blue_contours, _ = cv2.findContours(blue_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Detect red regions (defenders)
-    red_mask1 = cv2.inRange(hsv, np.array([0, 50, 50]), np.array([10, 255, 255]))
-    red_mask2 = cv2.inRange(hsv, np.array([170, 50, 50]), np.array([180, 255, 255]))
-    red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-    red_contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    player_area, cone_area = 50 * area_scale, 20 * area_scale
+    components = diagram_components(image_data, classes, min_area=min(player_area, cone_area))
     
-    # Detect yellow/orange regions (cones)
-    yellow_mask = cv2.inRange(hsv, np.array([20, 100, 100]), np.array([30, 255, 255]))
-    yellow_contours, _ = cv2.findContours(yellow_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    keep = {
+        'blue': components[BLUE_CLASS]['areas'] > player_area,
+        'red': components[RED_CLASS]['areas'] > player_area,
+        'cones': components[YELLOW_CLASS]['areas'] > cone_area
+    }
+    class_bits = {'blue': BLUE_CLASS, 'red': RED_CLASS, 'cones': YELLOW_CLASS}
     
     return {
-        'blue_players': len([c for c in blue_contours if cv2.contourArea(c) > 50]),
-        'red_players': len([c for c in red_contours if cv2.contourArea(c) > 50]),
-        'cones': len([c for c in yellow_contours if cv2.contourArea(c) > 20]),
+        'blue_players': int(np.count_nonzero(keep['blue'])),
+        'red_players': int(np.count_nonzero(keep['red'])),
+        'cones': int(np.count_nonzero(keep['cones'])),
         'image_width': width,
-        'image_height': height
+        'image_height': height,
+        'objects': {
+            name: diagram_objects(components[class_bits[name]], keep[name], width, height, field_area)
+            for name in class_bits
+        }
     }
 
+def drill_field_area(drill_info: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """The drill area (center_x, center_y, width, height) a diagram is mapped into"""
+    drill_width, drill_height = parse_field_size(drill_info['field_size'])
+    return FIELD_WIDTH / 2, FIELD_HEIGHT / 2, drill_width, drill_height
+
+def detected_positions(diagram_analysis: Dict[str, Any], max_cones: int = 12) -> Dict[str, np.ndarray]:
+    """Diagram object positions to use instead of the synthetic rings, per role
+    
+    Players are used when the diagram shows at least one attacker and two
+    players in total; cones when it shows 4 to max_cones of them.
+    """
+    objects = diagram_analysis.get('objects')
+    if not objects:
+        return None
+    
+    def points(name: str) -> np.ndarray:
+        return np.stack([objects[name]['x'], objects[name]['y']], axis=1)
+    
+    detected = {}
+    blue, red = len(objects['blue']['x']), len(objects['red']['x'])
+    if blue >= 1 and blue + red >= 2:
+        detected['blue'] = points('blue')
+        detected['red'] = points('red')
+    if 4 <= len(objects['cones']['x']) <= max_cones:
+        detected['cones'] = points('cones')
+    return detected or None
+
+
+def prepare_diagram(pdf_image: 'PdfImage', max_side: int = DIAGRAM_MAX_SIDE) -> Tuple[np.ndarray, float]:
+    """Decode a diagram and shrink it to the working resolution
+    
+    Returns the image (None if undecodable) and the area_scale that keeps
+    analyze_diagram's blob thresholds in full-resolution pixels.
+    """
+    image = pdf_image.decode(DIAGRAM_DECODE_REDUCTION)
+    pdf_image.release()
+    if image is None:
+        return None, 1.0
+    
+    scale = 1.0 / DIAGRAM_DECODE_REDUCTION
+    longest = max(image.shape[:2])
+    if max_side and longest > max_side:
+        factor = max_side / longest
+        image = cv2.resize(image, (max(1, round(image.shape[1] * factor)), max(1, round(image.shape[0] * factor))),
+                           interpolation=cv2.INTER_AREA)
+        scale *= factor
+    return image, scale ** 2
+
+def map_diagram_analysis(diagram_analysis: Dict[str, Any],
+                         field_area: Tuple[float, float, float, float] = None) -> Dict[str, Any]:
+    """Map an analysis made in image pixels (field_area = the image itself) into field_area"""
+    width, height = diagram_analysis['image_width'], diagram_analysis['image_height']
+    mapped = dict(diagram_analysis, objects={})
+    for name, objects in diagram_analysis['objects'].items():
+        pixels = np.stack([np.asarray(objects['x'], float), np.asarray(objects['y'], float)], axis=1)
+        positions, scale = diagram_to_field(pixels, width, height, field_area)
+        mapped['objects'][name] = {
+            'x': np.round(positions[:, 0], 1),
+            'y': np.round(positions[:, 1], 1),
+            'size': np.round(np.asarray(objects['size'], float) * scale, 2),
+            'orientation': np.asarray(objects['orientation'], float),
+            'elongation': np.asarray(objects['elongation'], float)
+        }
+    return mapped
+
+def _analysis_to_json(diagram_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable copy of a diagram analysis, for the diagram index"""
+    return dict(diagram_analysis, objects={
+        name: {key: values.tolist() for key, values in objects.items()}
+        for name, objects in diagram_analysis['objects'].items()
+    })
+
+def _analyze_diagram_job(pdf_image: 'PdfImage', field_area: Tuple[float, float, float, float],
+                         max_side: int, index: DiagramIndex = None) -> Dict[str, Any]:
+    """Thread pool task: decode, shrink and analyze one diagram (None if undecodable)
+    
+    The analysis is made in image pixels and then mapped into field_area,
+    so one stored result serves every drill area the diagram is reused in.
+    """
+    digest = hashlib.sha1(pdf_image.image_bytes).hexdigest() if index is not None else None
+    pixel_analysis = index.get_digest(digest) if index is not None else None
+    if pixel_analysis is not None:
+        run_metrics.count('diagrams.exact_hits')
+        return map_diagram_analysis(pixel_analysis, field_area)
+    
+    with run_metrics.span('image_decode'):
+        image, area_scale = prepare_diagram(pdf_image, max_side)
+    if image is None:
+        return None
+    
+    image_hash = fills = classes = None
+    if index is not None:
+        with run_metrics.span('diagram_hash'):
+            classes = classify_diagram_pixels(image)
+            image_hash, fills = diagram_signature(classes, DIAGRAM_CLASSES)
+            pixel_analysis = index.find(image_hash, fills, digest)
+        if pixel_analysis is not None:
+            run_metrics.count('diagrams.near_hits')
+            return map_diagram_analysis(pixel_analysis, field_area)
+    
+    height, width = image.shape[:2]
+    with run_metrics.span('diagram_analysis'):
+        pixel_analysis = analyze_diagram(image, area_scale=area_scale, field_area=(width / 2, height / 2, width, height),
+                                         classes=classes)
+    run_metrics.count('diagrams_analyzed')
+    if index is not None:
+        index.add(image_hash, fills, digest, _analysis_to_json(pixel_analysis))
+    return map_diagram_analysis(pixel_analysis, field_area)
+
+# (pid, executor): a forked worker must not reuse its parent's pool, whose threads it did not inherit
+_diagram_executor = (None, None)
+_diagram_executor_lock = threading.Lock()
+
+def set_diagram_threads(threads: int):
+    """Size the diagram thread pool (0 = one per CPU); process pool workers call this on start"""
+    global DIAGRAM_THREADS, _diagram_executor
+    with _diagram_executor_lock:
+        DIAGRAM_THREADS = threads
+        pid, executor = _diagram_executor
+        if executor is not None and pid == os.getpid():
+            executor.shutdown(wait=False)
+        _diagram_executor = (None, None)
+
+def diagram_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for diagram analysis, created on first use"""
+    global _diagram_executor
+    with _diagram_executor_lock:
+        pid, executor = _diagram_executor
+        if executor is None or pid != os.getpid():
+            executor = ThreadPoolExecutor(max_workers=DIAGRAM_THREADS or os.cpu_count() or 1,
+                                          thread_name_prefix='diagram')
+            _diagram_executor = (os.getpid(), executor)
+        return executor
+
+# (pid, index): loaded lazily in each process, like the executor
+_diagram_index = (None, None)
+
+def set_diagram_dedup(max_distance: int):
+    """Set the near-duplicate threshold in bits (-1 = no diagram index); process pool workers call this on start"""
+    global DIAGRAM_HASH_DISTANCE, _diagram_index
+    with _diagram_executor_lock:
+        DIAGRAM_HASH_DISTANCE = max_distance
+        _diagram_index = (None, None)
 
-def generate_vlm_data(drill_info: Dict[str, Any], diagram_analysis: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate comprehensive VLM data for a drill"""
+def diagram_index() -> DiagramIndex:
+    """This process's diagram index, loaded from DIAGRAM_INDEX_JSON on first use (None when turned off)"""
+    global _diagram_index
+    if DIAGRAM_HASH_DISTANCE < 0:
+        return None
+    with _diagram_executor_lock:
+        pid, index = _diagram_index
+        if index is None or pid != os.getpid():
+            # Stored results are only valid for the same analysis settings
+            config = {
+                'extractorVersion': EXTRACTOR_VERSION,
+                'decodeReduction': DIAGRAM_DECODE_REDUCTION,
+                'maxSide': DIAGRAM_MAX_SIDE
+            }
+            index = DiagramIndex.load(DIAGRAM_INDEX_JSON, DIAGRAM_HASH_DISTANCE, config, DIAGRAM_INDEX_MAX_ENTRIES)
+            _diagram_index = (os.getpid(), index)
+        return index
+
+def save_diagram_index():
+    """Persist the diagram index if it gained entries"""
+    index = diagram_index()
+    if index is None:
+        return
+    try:
+        index.save(DIAGRAM_INDEX_JSON)
+    except OSError as e:
+        print(f"⚠️  Could not write diagram index: {e}")
+
+def submit_diagram_analyses(jobs: Iterable[Tuple['PdfImage', Tuple[float, float, float, float]]],
+                            max_side: int = DIAGRAM_MAX_SIDE, index: DiagramIndex = None) -> List[Future]:
+    """Queue (pdf_image, field_area) jobs on the diagram pool; futures come back in job order
+    
+    Each task runs in a copy of the caller's context, so its spans and
+    counters keep the caller's PDF and age group tags. With an index,
+    duplicate diagrams reuse the stored analysis instead of being analyzed.
+    """
+    executor = diagram_executor()
+    return [
+        executor.submit(contextvars.copy_context().run, _analyze_diagram_job, pdf_image, field_area, max_side, index)
+        for pdf_image, field_area in jobs
+    ]
+
+def analyze_diagrams_batch(jobs: Iterable[Tuple['PdfImage', Tuple[float, float, float, float]]],
+                           max_side: int = DIAGRAM_MAX_SIDE, index: DiagramIndex = None) -> List[Dict[str, Any]]:
+    """Analyze many diagrams (e.g. a whole corpus) across the thread pool, results in job order"""
+    return [future.result() for future in submit_diagram_analyses(jobs, max_side, index)]
+
+def layout_drills(drill_infos: List[Dict[str, Any]], diagram_analyses: List[Dict[str, Any]]) -> LayoutBatch:
+    """Compute player and cone positions for a batch of parsed drills at once
+    
+    When a diagram's players are used, its player count replaces the parsed
+    one in drill_info, so playerCount and the setup text match the positions.
+    """
+    sizes = [parse_field_size(drill_info['field_size']) for drill_info in drill_infos]
+    detected = [detected_positions(analysis) for analysis in diagram_analyses]
+    for drill_info, positions in zip(drill_infos, detected):
+        if positions and 'blue' in positions:
+            drill_info['player_count'] = len(positions['blue']) + len(positions['red'])
+    return LayoutBatch(
+        [drill_info['player_count'] for drill_info in drill_infos],
+        [width for width, _ in sizes],
+        blue_ratio=0.6,
+        cone_counts=[max(4, analysis.get('cones', 8)) for analysis in diagram_analyses],
+        max_cones=12,
+        drill_heights=[height for _, height in sizes],
+        detected=detected
+    )
+
+def generate_vlm_data(drill_info: Dict[str, Any], diagram_analysis: Dict[str, Any],
+                      layout: LayoutBatch = None, layout_index: int = 0) -> Dict[str, Any]:
+    """Generate comprehensive VLM data for a drill
+    
+    Positions come from a precomputed LayoutBatch when given, otherwise a
+    batch of one is laid out for this drill.
+    """
     
     # Standard field dimensions
-    field_width = 120
-    field_height = 80
+    field_width = FIELD_WIDTH
+    field_height = FIELD_HEIGHT
     
-    # Calculate drill area based on field_size
-    if drill_info['field_size'] != 'custom':
-        try:
-            dims = drill_info['field_size'].split('x')
-            drill_width = int(dims[0])
-            drill_height = int(dims[1])
-        except:
-            drill_width = 30
-            drill_height = 30
-    else:
-        drill_width = 30
-        drill_height = 30
+    # Calculate drill area based on field_size ('custom' falls back to 30x30)
+    drill_width, drill_height = parse_field_size(drill_info['field_size'])
     
     # Center the drill on the field
     center_x = field_width / 2
     center_y = field_height / 2
     
-    # Generate player positions
-    players = []
-    player_count = drill_info['player_count']
+    if layout is None:
+        layout = layout_drills([drill_info], [diagram_analysis])
+        layout_index = 0
     
-    # Determine team split (typically 2/3 attackers, 1/3 defenders)
-    blue_count = max(1, int(player_count * 0.6))
-    red_count = player_count - blue_count
+    # Player positions: attackers spread around the perimeter, defenders inside
+    # the formation (typically 2/3 attackers, 1/3 defenders)
+    players = layout.players(layout_index)
     
-    # Position blue players (attackers) - spread around perimeter
-    for i in range(blue_count):
-        angle = (2 * np.pi * i) / blue_count
-        radius = drill_width / 2.5
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        players.append({
-            'id': f'ATT{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'name': f'Attacker {i+1}',
-            'team': 'blue',
-            'role': 'midfielder',
-            'jerseyNumber': i + 7,
-            'rotation': int((angle * 180 / np.pi) % 360),
-            'isActive': True
-        })
-    
-    # Position red players (defenders) - inside the formation
-    for i in range(red_count):
-        angle = (2 * np.pi * i) / red_count + np.pi / red_count
-        radius = drill_width / 5
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        players.append({
-            'id': f'DEF{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'name': f'Defender {i+1}',
-            'team': 'red',
-            'role': 'defender',
-            'jerseyNumber': i + 2,
-            'rotation': int((angle * 180 / np.pi + 180) % 360),
-            'isActive': True
-        })
-    
-    # Generate equipment (cones marking the area)
-    equipment = []
-    cone_count = max(4, diagram_analysis.get('cones', 8))
-    
-    # Place cones around the drill area
-    for i in range(min(cone_count, 12)):
-        angle = (2 * np.pi * i) / cone_count
-        radius = drill_width / 2
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        equipment.append({
-            'id': f'cone-{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'type': 'cone',
-            'color': 'orange',
-            'size': 'small'
-        })
+    # Equipment: cones marking the drill area
+    equipment = layout.cones(layout_index)
     
     # Add ball
     equipment.append({
@@ -675,8 +1268,12 @@ def create_drill_object(drill_info: Dict[str, Any], vlm_data: Dict[str, Any], pd
     }
 
 
-def process_pdf(pdf_path: Path, age_group: str) -> List[Dict[str, Any]]:
-    """Process a single PDF and extract all drills"""
+def begin_pdf(pdf_path: Path, age_group: str) -> Tuple[List[Future], Callable[[], List[Dict[str, Any]]]]:
+    """Read, segment and parse a PDF and queue its diagrams on the diagram pool
+    
+    Returns the queued futures and a function that waits for them and
+    builds the drills, so the caller can begin further PDFs in between.
+    """
     
     print(f"\n  📄 Processing: {pdf_path.name}")
     
@@ -688,65 +1285,60 @@ def process_pdf(pdf_path: Path, age_group: str) -> List[Dict[str, Any]]:
     theme_parts = pdf_path.stem.replace(age_group, '').replace('Week', '').replace('-', ' ').strip()
     session_theme = theme_parts or "General Training"
     
-    # Extract text content
-    text_data = extract_text_from_pdf(pdf_path)
+    # Extract text content and images/diagrams in one pass over the document
+    with run_metrics.span('read_pdf'):
+        text_data, images = read_pdf(pdf_path)
+    run_metrics.count('pages', text_data['page_count'])
+    run_metrics.count('images', len(images))
     
     if not text_data['pages']:
         print(f"    ⚠️  No text extracted from {pdf_path.name}")
-        return []
-    
-    # Extract images/diagrams
-    images = extract_images_from_pdf(pdf_path)
-    print(f"    ℹ️  Found {len(images)} diagrams")
-    
-    # Combine all text
-    full_text = '\n'.join([page['text'] for page in text_data['pages']])
+        return [], list
     
-    # Split into drill sections
-    # Look for common drill markers
-    drill_sections = []
+    # Placed images big enough to be diagrams (logos are left out)
+    diagrams = page_diagrams(text_data['pages'], images)
+    print(f"    ℹ️  Found {len(diagrams)} diagrams")
     
-    # Try to split by activity numbers or headers
-    patterns = [
-        r'(?:Activity|Drill|Exercise)\s*[#:]?\s*\d+',
-        r'(?:ACTIVITY|DRILL|EXERCISE)\s*\d+',
-        r'\d+\.\s+[A-Z][A-Za-z\s]+(?:\n|$)'
-    ]
-    
-    split_positions = []
-    for pattern in patterns:
-        matches = list(re.finditer(pattern, full_text))
-        if matches:
-            split_positions = [m.start() for m in matches]
-            break
-    
-    if split_positions:
-        # Split text into drill sections
-        for i, pos in enumerate(split_positions):
-            end_pos = split_positions[i + 1] if i + 1 < len(split_positions) else len(full_text)
-            drill_text = full_text[pos:end_pos]
-            if len(drill_text) > 100:  # Minimum text length for a drill
-                drill_sections.append(drill_text)
-    else:
-        # If no clear splits, treat as one drill per page
-        for page in text_data['pages']:
-            if len(page['text']) > 100:
-                drill_sections.append(page['text'])
+    # Split into drill sections at the headings found from the page layout,
+    # each paired with the diagram nearest to it
+    with run_metrics.span('segment'):
+        sections = segment_drills(text_data['pages'], diagrams)
+        section_images = pair_diagrams(sections, diagrams)
+    drill_sections = [section['text'] for section in sections]
     
     print(f"    ℹ️  Identified {len(drill_sections)} drill sections")
+    run_metrics.count('sections', len(drill_sections))
     
-    # Process each drill section
-    drills = []
+    # Parse each drill section
+    drill_infos = []
     for idx, drill_text in enumerate(drill_sections):
         try:
-            # Parse drill information
-            drill_info = parse_drill_from_text(drill_text, age_group, week, session_theme)
-            
+            with run_metrics.span('parse'):
+                drill_infos.append((idx, parse_drill_from_text(drill_text, age_group, week, session_theme)))
+        except Exception as e:
+            print(f"    ✗ Error processing drill {idx + 1}: {e}")
+            run_metrics.count('drill_errors')
+    
+    # Analyze the diagrams paired with a drill together on the diagram thread pool;
+    # only those get decoded
+    paired = [(idx, drill_info) for idx, drill_info in drill_infos if section_images[idx] is not None]
+    futures = dict(zip(
+        [idx for idx, _ in paired],
+        submit_diagram_analyses(((images[section_images[idx]]['image'], drill_field_area(drill_info))
+                                 for idx, drill_info in paired),
+                                index=diagram_index())
+    ))
+    return list(futures.values()), lambda: finish_pdf(pdf_path, drill_infos, futures)
+
+def finish_pdf(pdf_path: Path, drill_infos: List[Tuple[int, Dict[str, Any]]],
+               futures: Dict[int, Future]) -> List[Dict[str, Any]]:
+    """Wait for a begun PDF's diagram analyses, then lay out and build its drills"""
+    parsed = []
+    for idx, drill_info in drill_infos:
+        try:
             # Analyze corresponding diagram if available
-            diagram_analysis = {}
-            if idx < len(images):
-                diagram_analysis = analyze_diagram(images[idx]['data'])
-            else:
+            diagram_analysis = futures[idx].result() if idx in futures else None
+            if diagram_analysis is None:
                 # Use defaults
                 diagram_analysis = {
                     'blue_players': max(1, int(drill_info['player_count'] * 0.6)),
@@ -754,115 +1346,559 @@ def process_pdf(pdf_path: Path, age_group: str) -> List[Dict[str, Any]]:
                     'cones': 8
                 }
             
-            # Generate VLM data
-            vlm_data = generate_vlm_data(drill_info, diagram_analysis)
+            parsed.append((idx, drill_info, diagram_analysis))
             
-            # Create complete drill object
-            drill_object = create_drill_object(drill_info, vlm_data, pdf_path.name)
+        except Exception as e:
+            print(f"    ✗ Error processing drill {idx + 1}: {e}")
+            run_metrics.count('drill_errors')
+            continue
+    
+    # Lay out all drills of this PDF in one vectorized batch
+    with run_metrics.span('layout'):
+        layout = layout_drills([drill_info for _, drill_info, _ in parsed],
+                               [diagram_analysis for _, _, diagram_analysis in parsed])
+    if layout.unresolved_overlaps:
+        run_metrics.count('layout_overlaps', layout.unresolved_overlaps)
+    
+    drills = []
+    for layout_index, (idx, drill_info, diagram_analysis) in enumerate(parsed):
+        try:
+            # Generate VLM data
+            with run_metrics.span('vlm_generation'):
+                vlm_data = generate_vlm_data(drill_info, diagram_analysis, layout=layout, layout_index=layout_index)
+                
+                # Create complete drill object
+                drill_object = create_drill_object(drill_info, vlm_data, pdf_path.name)
             
             drills.append(drill_object)
+            run_metrics.count('drills')
             print(f"    ✓ Extracted: {drill_info['name']}")
             
         except Exception as e:
             print(f"    ✗ Error processing drill {idx + 1}: {e}")
+            run_metrics.count('drill_errors')
             continue
     
     return drills
 
-def process_all_pdfs(downloaded_files: Dict[str, List[Path]]) -> List[Dict[str, Any]]:
-    """Process all downloaded PDFs"""
+def process_pdf(pdf_path: Path, age_group: str) -> List[Dict[str, Any]]:
+    """Process a single PDF and extract all drills"""
+    _, finish = begin_pdf(pdf_path, age_group)
+    return finish()
+
+def file_sha256(path: Path) -> str:
+    """Compute the SHA-256 digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def extraction_cache_path(pdf_digest: str, pdf_path: Path, age_group: str) -> Path:
+    """Cache file for a PDF's drills, keyed by content hash and extractor version"""
+    # Drill IDs and sources embed the age group and file name, so they are part of the key
+    key = hashlib.sha256(
+        f"{pdf_digest}:{EXTRACTOR_VERSION}:{age_group}:{pdf_path.name}".encode('utf-8')
+    ).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+def load_cached_drills(cache_path: Path) -> Any:
+    """Load cached drills, or None on a cache miss"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if entry.get('extractorVersion') != EXTRACTOR_VERSION:
+        return None
+    
+    # Refresh mtime so eviction treats the entry as recently used
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return entry['drills']
+
+def store_cached_drills(cache_path: Path, pdf_digest: str, drills: List[Dict[str, Any]]):
+    """Atomically write a PDF's drills to the cache"""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        'extractorVersion': EXTRACTOR_VERSION,
+        'pdfSha256': pdf_digest,
+        'drills': drills
+    }
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"    ⚠️  Could not write extraction cache: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+def evict_extraction_cache(max_bytes: int = CACHE_MAX_BYTES, max_age_days: float = CACHE_MAX_AGE_DAYS) -> int:
+    """Drop cache entries older than max_age_days, then least recently used ones over max_bytes"""
+    if not CACHE_DIR.exists():
+        return 0
+    
+    entries = []
+    for path in CACHE_DIR.glob('*.json'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    # Oldest first
+    entries.sort()
+    cutoff = time.time() - max_age_days * 86400
+    total_bytes = sum(size for _, size, _ in entries)
+    removed = 0
+    
+    for mtime, size, path in entries:
+        if mtime >= cutoff and total_bytes <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total_bytes -= size
+        removed += 1
+    
+    return removed
+
+def begin_pdf_cached(pdf_path: Path, age_group: str) -> Tuple[List[Future], Callable[[], List[Dict[str, Any]]]]:
+    """begin_pdf, reusing cached drills when the PDF's content hash is unchanged"""
+    with run_metrics.span('cache_lookup'):
+        pdf_digest = file_sha256(pdf_path)
+        cache_path = extraction_cache_path(pdf_digest, pdf_path, age_group)
+        drills = load_cached_drills(cache_path)
+    
+    if drills is not None:
+        print(f"\n  ♻️  Cached: {pdf_path.name} ({len(drills)} drills)")
+        run_metrics.count('cache.hits')
+        run_metrics.count('drills', len(drills))
+        return [], lambda: drills
+    
+    run_metrics.count('cache.misses')
+    futures, finish = begin_pdf(pdf_path, age_group)
+    
+    def finish_cached() -> List[Dict[str, Any]]:
+        drills = finish()
+        # An unreadable PDF yields no drills; leave it uncached so the next run retries it
+        if drills:
+            with run_metrics.span('cache_store'):
+                store_cached_drills(cache_path, pdf_digest, drills)
+        return drills
+    return futures, finish_cached
+
+def process_pdf_cached(pdf_path: Path, age_group: str) -> List[Dict[str, Any]]:
+    """Process a PDF, reusing cached drills when its content hash is unchanged"""
+    _, finish = begin_pdf_cached(pdf_path, age_group)
+    return finish()
+
+def _process_pdf_job(job: Tuple[Path, str, bool]) -> Tuple[List[Dict[str, Any]], Dict[str, Any], List[Any]]:
+    """Process pool entry point for a single (pdf_path, age_group, use_cache) job
+    
+    Returns the drills plus a snapshot of the job's metrics and the job's new
+    diagram index entries for the parent to merge.
+    """
+    pdf_path, age_group, use_cache = job
+    with run_metrics.collect() as job_metrics, job_metrics.tagged(pdf=pdf_path.name, age_group=age_group):
+        with job_metrics.span(run_metrics.PDF_STAGE):
+            if use_cache:
+                drills = process_pdf_cached(pdf_path, age_group)
+            else:
+                drills = process_pdf(pdf_path, age_group)
+        index = diagram_index()
+        return drills, job_metrics.snapshot(), index.drain_new() if index is not None else []
+
+def _begin_pdf_job(job: Tuple[Path, str, bool]) -> Tuple[List[Future], Callable[[], List[Dict[str, Any]]]]:
+    """Sequential counterpart of _process_pdf_job: begin one job, recording into the process-wide metrics
+    
+    The job's pdf stage time is the time spent beginning plus finishing it,
+    not the time it waited while other PDFs were handled in between.
+    """
+    pdf_path, age_group, use_cache = job
+    with run_metrics.tagged(pdf=pdf_path.name, age_group=age_group):
+        start = time.perf_counter()
+        futures, finish = (begin_pdf_cached if use_cache else begin_pdf)(pdf_path, age_group)
+        begin_seconds = time.perf_counter() - start
+    
+    def finish_job() -> List[Dict[str, Any]]:
+        with run_metrics.tagged(pdf=pdf_path.name, age_group=age_group):
+            start = time.perf_counter()
+            drills = finish()
+            run_metrics.metrics.add_time(run_metrics.PDF_STAGE, begin_seconds + time.perf_counter() - start)
+        return drills
+    return futures, finish_job
+
+def _init_extraction_worker(diagram_threads: int, hash_distance: int):
+    """Process pool initializer: size the worker's diagram pool and index"""
+    set_diagram_threads(diagram_threads)
+    set_diagram_dedup(hash_distance)
+
+def iter_pdf_drills(downloaded_files: Dict[str, List[Path]], workers: int = 1, chunksize: int = 1,
+                    use_cache: bool = True) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Yield (age_group, drills) per PDF in input order, optionally across a process pool"""
+    jobs = [
+        (pdf_path, age_group, use_cache)
+        for age_group, pdf_files in downloaded_files.items()
+        for pdf_path in pdf_files
+    ]
+    
+    if workers <= 1 or len(jobs) <= 1:
+        # Later PDFs are begun before earlier ones are finished, until the diagram
+        # pool has about two diagrams per thread queued, so it keeps working across
+        # PDF boundaries while this thread reads, parses and lays out.
+        # Results are still yielded in input order.
+        queue_target = 2 * (DIAGRAM_THREADS or os.cpu_count() or 1)
+        pending = deque()
+        jobs = iter(jobs)
+        job = next(jobs, None)
+        while job is not None or pending:
+            queued = sum(not future.done() for _, futures, _ in pending for future in futures)
+            if job is not None and (not pending or (queued < queue_target and len(pending) < MAX_PDFS_AHEAD)):
+                pending.append((job, *_begin_pdf_job(job)))
+                job = next(jobs, None)
+                continue
+            job_done, _, finish = pending.popleft()
+            yield job_done[1], finish()
+        save_diagram_index()
+        return
+    
+    # executor.map returns results in submission order, so the merged catalog
+    # is identical to a sequential run regardless of which worker finishes first.
+    # Workers split the CPUs between their diagram thread pools.
+    # Diagrams first seen by a worker only reach the other workers through the saved index (next run).
+    diagram_threads = DIAGRAM_THREADS or max(1, (os.cpu_count() or 1) // workers)
+    index = diagram_index()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_extraction_worker,
+                             initargs=(diagram_threads, DIAGRAM_HASH_DISTANCE)) as executor:
+        for job, (drills, job_metrics, diagram_entries) in zip(jobs, executor.map(_process_pdf_job, jobs,
+                                                                                  chunksize=chunksize)):
+            run_metrics.metrics.merge(job_metrics)
+            if index is not None:
+                index.merge(diagram_entries)
+            yield job[1], drills
+    save_diagram_index()
+
+def process_all_pdfs(downloaded_files: Dict[str, List[Path]], workers: int = 1, chunksize: int = 1,
+                     use_cache: bool = True, writer: CatalogWriter = None) -> List[Dict[str, Any]]:
+    """Process all downloaded PDFs
+    
+    With a writer, drills are streamed into it as each PDF finishes and are
+    not kept in memory (the returned list is empty).
+    """
     
     print("\n" + "="*80)
     print("STEP 2: EXTRACTING DRILLS FROM ALL PDFs")
     print("="*80 + "\n")
     
-    all_drills = []
+    if workers > 1:
+        print(f"⚙️  Parallel extraction with {workers} workers (chunksize={chunksize})")
     
-    for age_group, pdf_files in downloaded_files.items():
-        print(f"\n📋 Processing {age_group} Session Plans ({len(pdf_files)} files)...")
-        
-        for pdf_path in tqdm(pdf_files, desc=f"  {age_group}"):
-            drills = process_pdf(pdf_path, age_group)
+    all_drills = []
+    total_drills = 0
+    by_age = {}
+    total_pdfs = sum(len(pdf_files) for pdf_files in downloaded_files.values())
+    
+    results = iter_pdf_drills(downloaded_files, workers=workers, chunksize=chunksize, use_cache=use_cache)
+    for age_group, drills in tqdm(results, total=total_pdfs, desc="  PDFs"):
+        if writer is not None:
+            with run_metrics.span('save', age_group=age_group):
+                writer.write_many(drills)
+        else:
             all_drills.extend(drills)
-        
-        print(f"  ✅ Extracted {len([d for d in all_drills if d['ageGroup'] == age_group])} drills from {age_group}")
+        total_drills += len(drills)
+        by_age[age_group] = by_age.get(age_group, 0) + len(drills)
+    
+    for age_group in downloaded_files:
+        print(f"  ✅ Extracted {by_age.get(age_group, 0)} drills from {age_group}")
     
-    print(f"\n✅ Total drills extracted: {len(all_drills)}")
+    print(f"\n✅ Total drills extracted: {total_drills}")
+    
+    if use_cache:
+        evicted = evict_extraction_cache()
+        if evicted:
+            print(f"🧹 Evicted {evicted} stale extraction cache entries")
     
     return all_drills
 
-def save_drills_json(drills: List[Dict[str, Any]]):
+def save_drills_json(drills: List[Dict[str, Any]], fmt: str = 'pretty'):
     """Save drills to JSON file"""
     
     print("\n" + "="*80)
     print("STEP 3: SAVING DRILLS TO JSON")
     print("="*80 + "\n")
     
-    # Ensure output directory exists
-    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
-    
     # Sort drills by age group and week
-    age_order = ['U6', 'U8', 'U10', 'U12', 'U14']
     drills_sorted = sorted(drills, key=lambda d: (
-        age_order.index(d['ageGroup']) if d['ageGroup'] in age_order else 999,
+        AGE_ORDER.index(d['ageGroup']) if d['ageGroup'] in AGE_ORDER else 999,
         d['curriculum']['week'],
         d['name']
     ))
     
     # Save to file
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(drills_sorted, f, indent=2, ensure_ascii=False)
+    with run_metrics.span('save'), CatalogWriter(OUTPUT_JSON, fmt) as writer:
+        writer.write_many(drills_sorted)
+    
+    print_extraction_summary(writer)
+
+def print_extraction_summary(writer: CatalogWriter):
+    """Print summary statistics for a finished catalog"""
     
-    print(f"✅ Saved {len(drills_sorted)} drills to: {OUTPUT_JSON}")
+    print(f"✅ Saved {writer.count} drills to: {writer.path}")
     
     # Generate summary statistics
     print("\n" + "="*80)
     print("EXTRACTION SUMMARY")
     print("="*80 + "\n")
     
-    by_age = {}
-    by_category = {}
-    
-    for drill in drills_sorted:
-        age = drill['ageGroup']
-        cat = drill['category']
-        
-        by_age[age] = by_age.get(age, 0) + 1
-        by_category[cat] = by_category.get(cat, 0) + 1
-    
     print("Drills by Age Group:")
-    for age in age_order:
-        if age in by_age:
-            print(f"  {age}: {by_age[age]} drills")
+    for age in AGE_ORDER:
+        if age in writer.by_age:
+            print(f"  {age}: {writer.by_age[age]} drills")
     
     print("\nDrills by Category:")
-    for cat, count in sorted(by_category.items()):
+    for cat, count in sorted(writer.by_category.items()):
         print(f"  {cat}: {count} drills")
     
-    print(f"\n📊 Total: {len(drills_sorted)} drills")
-    print(f"📁 Output file: {OUTPUT_JSON}")
-    print(f"💾 File size: {OUTPUT_JSON.stat().st_size / 1024:.1f} KB")
+    print(f"\n📊 Total: {writer.count} drills")
+    print(f"📁 Output file: {writer.path}")
+    print(f"💾 File size: {writer.size_bytes() / 1024:.1f} KB")
+
+def pdf_source_key(age_group: str, pdf_name: str) -> str:
+    """Build manifest key for a source PDF"""
+    return f"{age_group}/{pdf_name}"
+
+def load_build_manifest() -> Dict[str, Any]:
+    """Load the per-PDF build manifest, or an empty one"""
+    try:
+        with open(BUILD_MANIFEST_JSON, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'pdfs': {}}
+    manifest.setdefault('pdfs', {})
+    return manifest
 
-def main():
+def store_build_manifest(manifest: Dict[str, Any]):
+    """Atomically write the build manifest"""
+    manifest['generated'] = datetime.now().isoformat()
+    tmp_path = BUILD_MANIFEST_JSON.with_name(f"{BUILD_MANIFEST_JSON.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, BUILD_MANIFEST_JSON)
+
+def load_catalog() -> Optional[List[Dict[str, Any]]]:
+    """Load the existing catalog's drills, or None if it is missing, unreadable or not a drill list
+
+    A catalog written with --share-blocks is unwrapped and its blocks resolved.
+    """
+    try:
+        with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+    drills, blocks = document, {}
+    if isinstance(document, dict):
+        drills, blocks = document.get('drills'), document.get('blocks')
+    if not isinstance(drills, list) or not isinstance(blocks, dict):
+        return None
+    if not all(isinstance(drill, dict) and 'ageGroup' in drill for drill in drills):
+        return None
+    try:
+        return [resolve_blocks(drill, blocks) for drill in drills]
+    except KeyError:
+        return None
+
+def pdf_manifest_entry(pdf_path: Path, previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe a PDF on disk, re-hashing it only if its size or mtime moved"""
+    stat = pdf_path.stat()
+    entry = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    if previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime and previous.get('sha256'):
+        entry['sha256'] = previous['sha256']
+    else:
+        entry['sha256'] = file_sha256(pdf_path)
+    return entry
+
+def incremental_build(downloaded_files: Dict[str, List[Path]], workers: int = 1, chunksize: int = 1,
+                      use_cache: bool = True, pdf_urls: Dict[str, List[str]] = PDF_URLS) -> bool:
+    """Re-extract only new or changed PDFs and merge their drills into the existing catalog
+    
+    Only PDFs dropped from pdf_urls count as removed; one that failed to
+    download this run keeps its manifest entry and drills from the last build.
+    Returns True if the catalog was rewritten.
+    """
+    
+    print("\n" + "="*80)
+    print("STEP 2: INCREMENTAL EXTRACTION")
+    print("="*80 + "\n")
+    
+    manifest = load_build_manifest()
+    catalog = load_catalog()
+    previous = manifest['pdfs'] if catalog is not None else {}
+    if catalog is None:
+        print("  ℹ️  No existing catalog, extracting every PDF")
+        catalog = []
+    
+    # Work out which PDFs changed since the last build
+    entries = {}
+    changed_files = {}
+    for age_group, pdf_files in downloaded_files.items():
+        for pdf_path in pdf_files:
+            key = pdf_source_key(age_group, pdf_path.name)
+            old_entry = previous.get(key, {})
+            entries[key] = pdf_manifest_entry(pdf_path, old_entry)
+            if (old_entry.get('sha256') != entries[key]['sha256']
+                    or old_entry.get('extractorVersion') != EXTRACTOR_VERSION):
+                changed_files.setdefault(age_group, []).append(pdf_path)
+    sources = {pdf_source_key(age_group, Path(url).name) for age_group, urls in pdf_urls.items() for url in urls}
+    removed = [key for key in previous if key not in entries and key not in sources]
+    missing = [key for key in previous if key not in entries and key in sources]
+    for key in missing:
+        entries[key] = dict(previous[key])
+    total_changed = sum(len(pdf_files) for pdf_files in changed_files.values())
+    
+    print(f"  ℹ️  {total_changed} new or changed PDFs, {len(removed)} removed, "
+          f"{len(entries) - total_changed - len(missing)} unchanged")
+    if missing:
+        print(f"  ⚠️  {len(missing)} PDFs not downloaded this run, keeping their drills from the last build")
+    
+    if not total_changed and not removed:
+        print("  ✅ Catalog is up to date")
+        return False
+    
+    # Extract the changed PDFs (results come back in job order)
+    jobs = [(age_group, pdf_path) for age_group, pdf_files in changed_files.items() for pdf_path in pdf_files]
+    results = iter_pdf_drills(changed_files, workers=workers, chunksize=chunksize, use_cache=use_cache)
+    new_drills = []
+    for (age_group, pdf_path), (_, drills) in zip(jobs, tqdm(results, total=len(jobs), desc="  PDFs")):
+        key = pdf_source_key(age_group, pdf_path.name)
+        entries[key].update({
+            'extractorVersion': EXTRACTOR_VERSION,
+            'drillIds': [drill['id'] for drill in drills]
+        })
+        new_drills.extend(drills)
+    
+    # Keep unchanged PDFs' manifest entries as they were
+    for key, entry in entries.items():
+        if 'drillIds' not in entry:
+            entry['extractorVersion'] = previous[key]['extractorVersion']
+            entry['drillIds'] = previous[key].get('drillIds', [])
+    
+    # Drop drills whose source PDF was re-extracted or removed, then merge
+    stale = set(removed) | {pdf_source_key(age_group, pdf_path.name) for age_group, pdf_path in jobs}
+    kept = [
+        drill for drill in catalog
+        if pdf_source_key(drill['ageGroup'], drill.get('metadata', {}).get('sourcePDF', '')) not in stale
+    ]
+    print(f"\n✅ Kept {len(kept)} drills, replaced {len(catalog) - len(kept)} with {len(new_drills)} new drills")
+    
+    save_drills_json(kept + new_drills)
+    
+    manifest['extractorVersion'] = EXTRACTOR_VERSION
+    manifest['pdfs'] = entries
+    store_build_manifest(manifest)
+    return True
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Extract MA Youth Soccer drills from session plan PDFs")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of extraction processes (default: 1, 0 = one per CPU)")
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help="PDFs handed to a worker at a time in parallel mode")
+    parser.add_argument('--diagram-threads', type=int, default=DIAGRAM_THREADS,
+                        help="Diagram analysis threads per extraction process (default: 0 = CPUs / workers)")
+    parser.add_argument('--diagram-hash-distance', type=int, default=DIAGRAM_HASH_DISTANCE,
+                        help="Largest color-occupancy hash distance (bits) at which a diagram reuses an earlier "
+                             "analysis (default: %(default)s, -1 = analyze every diagram)")
+    parser.add_argument('--download-concurrency', type=int, default=DOWNLOAD_CONCURRENCY,
+                        help="Downloads in flight at once across all age groups")
+    parser.add_argument('--no-revalidate', action='store_true',
+                        help="Trust already downloaded PDFs instead of re-checking their ETag/Last-Modified")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-extract every PDF instead of reusing cached drills")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract new or changed PDFs and merge them into the existing catalog")
+    parser.add_argument('--format', choices=CATALOG_FORMATS, default='pretty',
+                        help="Catalog output: pretty (sorted, indented), or compact/ndjson/sharded/binary "
+                             "written as PDFs finish")
+    parser.add_argument('--share-blocks', action='store_true',
+                        help="Write repeated vlmData/coaching blocks once and reference them "
+                             f"({', '.join(SHARED_BLOCK_FORMATS)} only)")
+    parser.add_argument('--report', type=Path, default=RUN_REPORT_JSON,
+                        help="Where to write the JSON run report with per-stage and per-PDF timings")
+    args = parser.parse_args(argv)
+    if args.incremental and args.format != 'pretty':
+        parser.error("--incremental merges into the pretty catalog and cannot be combined with --format")
+    if args.share_blocks and args.format not in SHARED_BLOCK_FORMATS:
+        parser.error(f"--share-blocks needs --format {'/'.join(SHARED_BLOCK_FORMATS)}")
+    if args.download_concurrency < 1:
+        parser.error("--download-concurrency must be at least 1")
+    return args
+
+def print_run_report(report: Dict[str, Any], slowest: int = 5):
+    """Print per-stage totals and the slowest PDFs from a run report"""
+    
+    print("\n" + "="*80)
+    print("RUN REPORT")
+    print("="*80 + "\n")
+    
+    print("Time by Stage:")
+    for stage, total in report['stages'].items():
+        print(f"  {stage:18s} {total['seconds']:9.2f}s  ({total['calls']} calls, max {total['maxSeconds']:.2f}s)")
+    
+    if report['pdfs']:
+        print("\nSlowest PDFs:")
+        for entry in report['pdfs'][:slowest]:
+            print(f"  {entry['seconds']:7.2f}s  {entry['ageGroup']}/{entry['pdf']}")
+
+def main(argv: List[str] = None):
     """Main execution function"""
     
+    args = parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    set_diagram_threads(args.diagram_threads)
+    # --no-cache re-extracts everything, diagrams included
+    set_diagram_dedup(-1 if args.no_cache else args.diagram_hash_distance)
+    
     print("\n" + "="*80)
     print("MA YOUTH SOCCER DRILL EXTRACTION")
     print("Comprehensive VLM Data Generation")
     print("="*80)
     
     start_time = time.time()
+    status = 'failed'
     
     try:
         # Step 1: Download all PDFs
-        downloaded_files = download_all_pdfs()
-        
-        # Step 2: Process all PDFs and extract drills
-        all_drills = process_all_pdfs(downloaded_files)
+        with run_metrics.span('step.download'):
+            downloaded_files = download_all_pdfs(concurrency=args.download_concurrency,
+                                                 revalidate=not args.no_revalidate)
         
-        # Step 3: Save to JSON
-        save_drills_json(all_drills)
+        if args.incremental:
+            # Steps 2 and 3: re-extract changed PDFs and merge them into the catalog
+            with run_metrics.span('step.incremental'):
+                incremental_build(downloaded_files, workers=workers, chunksize=args.chunksize,
+                                  use_cache=not args.no_cache)
+        elif args.format == 'pretty':
+            # Step 2: Process all PDFs and extract drills
+            with run_metrics.span('step.extract'):
+                all_drills = process_all_pdfs(downloaded_files, workers=workers, chunksize=args.chunksize,
+                                              use_cache=not args.no_cache)
+            
+            # Step 3: Save to JSON
+            save_drills_json(all_drills)
+        else:
+            # Steps 2 and 3: stream drills into the catalog as each PDF is extracted
+            with run_metrics.span('step.extract'):
+                with CatalogWriter(OUTPUT_JSON, args.format, share_blocks=args.share_blocks) as writer:
+                    process_all_pdfs(downloaded_files, workers=workers, chunksize=args.chunksize,
+                                     use_cache=not args.no_cache, writer=writer)
+            print()
+            print_extraction_summary(writer)
         
+        status = 'ok'
         elapsed_time = time.time() - start_time
         
         print("\n" + "="*80)
@@ -876,6 +1912,24 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    
+    finally:
+        # Written on failure too, so a broken nightly still shows where it got to
+        try:
+            report = run_metrics.metrics.write_report(
+                args.report,
+                status=status,
+                extractorVersion=EXTRACTOR_VERSION,
+                elapsedSeconds=round(time.time() - start_time, 3),
+                workers=workers,
+                format=args.format,
+                incremental=args.incremental,
+                cache=not args.no_cache
+            )
+            print_run_report(report)
+            print(f"\n📁 Run report: {args.report}")
+        except OSError as e:
+            print(f"⚠️  Could not write run report: {e}")
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -1,195 +1,409 @@
+#!/usr/bin/env python3
+"""
+SoccerDrive Drill Fetcher
+Scrapes drill pages from soccerdrive.com into structured drill records and
+downloads their diagrams
+
+Run without arguments it fetches the 3+2 v 3+2 rondo into the JSON file and
+diagram image it has always written. Given page URLs, a URL list file or a
+sitemap, it crawls every page concurrently over one pooled session, spacing
+requests to each host, and writes one JSON record per drill (NDJSON).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import heapq
+import asyncio
+import hashlib
+import itertools
+import argparse
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from functools import partial
+from typing import List, Dict, Any, Tuple, Callable, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-import json
-import re
-from urllib.parse import urljoin
-import os
 
-# Fetch the webpage
-url = "https://www.soccerdrive.com/posts/3-plus-2-v-3-plus-2-rondo"
-headers = {
+DEFAULT_URL = "https://www.soccerdrive.com/posts/3-plus-2-v-3-plus-2-rondo"
+HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-print(f"Fetching drill from: {url}")
-response = requests.get(url, headers=headers)
-response.raise_for_status()
-
-soup = BeautifulSoup(response.content, 'html.parser')
-
-# Initialize drill data structure
-drill_data = {
-    "drill_name": None,
-    "objective": None,
-    "organization": None,
-    "player_actions": None,
-    "coaching_points": None,
-    "duration": None,
-    "age_group": None,
-    "field_size": None,
-    "player_format": None,
-    "diagram_image_url": None
-}
+# Single-drill output (no arguments)
+OUTPUT_JSON = Path('/home/ubuntu/soccerdrive_rondo_drill.json')
+DIAGRAM_STEM = Path('/home/ubuntu/soccerdrive_rondo_diagram')
+
+# Crawl output
+CRAWL_OUTPUT = Path('/home/ubuntu/soccerdrive_drills.ndjson')
+DIAGRAM_DIR = Path('/home/ubuntu/soccerdrive_diagrams')
+
+# Requests in flight across all hosts
+CRAWL_CONCURRENCY = 8
+# Request starts per second to any one host (0 = no limit)
+HOST_RATE = 2.0
+# Per-host queue order (lower starts first): a crawled page's diagram before more pages
+IMAGE_PRIORITY = 0
+PAGE_PRIORITY = 1
+REQUEST_TIMEOUT = 30
+
+DRILL_FIELDS = ("drill_name", "objective", "organization", "player_actions", "coaching_points",
+                "duration", "age_group", "field_size", "player_format", "diagram_image_url")
 
-# Extract title
-title_tag = soup.find('h1')
-if title_tag:
-    drill_data["drill_name"] = title_tag.get_text(strip=True)
-    print(f"Found title: {drill_data['drill_name']}")
-
-# Look for the main content area
-content_area = soup.find('div', class_=re.compile(r'post|content|article|entry', re.I))
-if not content_area:
-    content_area = soup
-
-# Extract sections by looking for headings and their content
-all_text = content_area.get_text(separator='\n', strip=True)
-
-# Try to find specific sections
-sections = {
-    'objective': r'(?:Objective|Purpose|Goal)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))',
-    'organization': r'(?:Organization|Setup|Set[- ]up)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))',
-    'player_actions': r'(?:Instructions?|Description|How to Play|Player Actions?)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))',
-    'coaching_points': r'(?:Coaching Points?|Key Points?|Tips?)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))',
+SECTION_PATTERNS = {
+    'objective': re.compile(r'(?:Objective|Purpose|Goal)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))', re.IGNORECASE | re.DOTALL),
+    'organization': re.compile(r'(?:Organization|Setup|Set[- ]up)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))', re.IGNORECASE | re.DOTALL),
+    'player_actions': re.compile(r'(?:Instructions?|Description|How to Play|Player Actions?)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))', re.IGNORECASE | re.DOTALL),
+    'coaching_points': re.compile(r'(?:Coaching Points?|Key Points?|Tips?)[\s:]+(.+?)(?=\n(?:[A-Z][a-z]+:|$))', re.IGNORECASE | re.DOTALL),
 }
+DURATION_PATTERN = re.compile(r'(?:Duration|Time)[\s:]+(\d+(?:-\d+)?\s*(?:min|minutes?))', re.IGNORECASE)
+AGE_PATTERN = re.compile(r'(?:Age|Age Group)[\s:]+([U\d\-\s]+|[\d\-]+\s*years?)', re.IGNORECASE)
+FIELD_PATTERN = re.compile(r'(?:Field|Area|Grid)[\s:]+(\d+\s*[x×]\s*\d+\s*(?:yards?|meters?|m)?)', re.IGNORECASE)
+PLAYER_FORMAT_PATTERN = re.compile(r'(\d+\s*\+\s*\d+\s*v\s*\d+\s*\+\s*\d+)', re.IGNORECASE)
+
+# Image src/alt words that mark (or rule out) a drill diagram
+SKIP_IMAGE_WORDS = ('logo', 'icon', 'avatar', 'profile')
+DIAGRAM_ALT_WORDS = ('diagram', 'drill', 'rondo', 'field')
+DIAGRAM_SRC_WORDS = ('diagram', 'drill', 'rondo')
+
+def make_session(pool_size: int = CRAWL_CONCURRENCY) -> requests.Session:
+    """Create a requests session whose keep-alive pool fits pool_size concurrent requests"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def parse_drill_page(html: bytes, url: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Extract the drill fields of a page and its candidate diagram URLs, best first"""
+    soup = BeautifulSoup(html, 'html.parser')
+    drill_data = dict.fromkeys(DRILL_FIELDS)
+
+    # Extract title
+    title_tag = soup.find('h1')
+    if title_tag:
+        drill_data["drill_name"] = title_tag.get_text(strip=True)
 
-for key, pattern in sections.items():
-    match = re.search(pattern, all_text, re.IGNORECASE | re.DOTALL)
-    if match:
-        drill_data[key] = match.group(1).strip()
-        print(f"Found {key}: {drill_data[key][:100]}...")
-
-# Extract metadata from text
-duration_match = re.search(r'(?:Duration|Time)[\s:]+(\d+(?:-\d+)?\s*(?:min|minutes?))', all_text, re.IGNORECASE)
-if duration_match:
-    drill_data["duration"] = duration_match.group(1)
-    print(f"Found duration: {drill_data['duration']}")
-
-age_match = re.search(r'(?:Age|Age Group)[\s:]+([U\d\-\s]+|[\d\-]+\s*years?)', all_text, re.IGNORECASE)
-if age_match:
-    drill_data["age_group"] = age_match.group(1).strip()
-    print(f"Found age group: {drill_data['age_group']}")
-
-field_match = re.search(r'(?:Field|Area|Grid)[\s:]+(\d+\s*[x×]\s*\d+\s*(?:yards?|meters?|m)?)', all_text, re.IGNORECASE)
-if field_match:
-    drill_data["field_size"] = field_match.group(1)
-    print(f"Found field size: {drill_data['field_size']}")
-
-# Extract player format from title or text
-player_format_match = re.search(r'(\d+\s*\+\s*\d+\s*v\s*\d+\s*\+\s*\d+)', drill_data["drill_name"] or all_text, re.IGNORECASE)
-if player_format_match:
-    drill_data["player_format"] = player_format_match.group(1)
-    print(f"Found player format: {drill_data['player_format']}")
-
-# Find diagram image
-image_found = False
-for img in soup.find_all('img'):
-    img_src = img.get('src', '')
-    img_alt = img.get('alt', '').lower()
-    
-    # Skip small images, icons, logos
-    if any(skip in img_src.lower() for skip in ['logo', 'icon', 'avatar', 'profile']):
-        continue
-    
-    # Look for diagram-like images
-    if any(keyword in img_alt for keyword in ['diagram', 'drill', 'rondo', 'field']) or \
-       any(keyword in img_src.lower() for keyword in ['diagram', 'drill', 'rondo']):
-        full_url = urljoin(url, img_src)
-        drill_data["diagram_image_url"] = full_url
-        print(f"Found diagram image: {full_url}")
-        
-        # Download the image
-        try:
-            img_response = requests.get(full_url, headers=headers)
-            img_response.raise_for_status()
-            
-            # Determine extension
-            ext = 'jpg'
-            content_type = img_response.headers.get('content-type', '')
-            if 'png' in content_type:
-                ext = 'png'
-            elif 'jpeg' in content_type or 'jpg' in content_type:
-                ext = 'jpg'
-            elif '.png' in img_src.lower():
-                ext = 'png'
-            
-            img_path = f'/home/ubuntu/soccerdrive_rondo_diagram.{ext}'
-            with open(img_path, 'wb') as f:
-                f.write(img_response.content)
-            print(f"Downloaded diagram to: {img_path}")
-            image_found = True
-            break
-        except Exception as e:
-            print(f"Failed to download image: {e}")
-
-# If no specific diagram found, try to get the first substantial image
-if not image_found:
-    print("No specific diagram found, looking for first substantial image...")
+    # Look for the main content area
+    content_area = soup.find('div', class_=re.compile(r'post|content|article|entry', re.I))
+    if not content_area:
+        content_area = soup
+
+    # Extract sections by looking for headings and their content
+    all_text = content_area.get_text(separator='\n', strip=True)
+    for key, pattern in SECTION_PATTERNS.items():
+        match = pattern.search(all_text)
+        if match:
+            drill_data[key] = match.group(1).strip()
+
+    # Extract metadata from text
+    duration_match = DURATION_PATTERN.search(all_text)
+    if duration_match:
+        drill_data["duration"] = duration_match.group(1)
+
+    age_match = AGE_PATTERN.search(all_text)
+    if age_match:
+        drill_data["age_group"] = age_match.group(1).strip()
+
+    field_match = FIELD_PATTERN.search(all_text)
+    if field_match:
+        drill_data["field_size"] = field_match.group(1)
+
+    # Extract player format from title or text
+    player_format_match = PLAYER_FORMAT_PATTERN.search(drill_data["drill_name"] or all_text)
+    if player_format_match:
+        drill_data["player_format"] = player_format_match.group(1)
+
+    # Diagram-like images first, then any substantial image
+    diagrams, others = [], []
     for img in soup.find_all('img'):
         img_src = img.get('src', '')
-        if img_src and not any(skip in img_src.lower() for skip in ['logo', 'icon', 'avatar', 'profile', 'button']):
-            full_url = urljoin(url, img_src)
-            drill_data["diagram_image_url"] = full_url
-            print(f"Found image: {full_url}")
-            
+        img_alt = img.get('alt', '').lower()
+        if not img_src or any(skip in img_src.lower() for skip in SKIP_IMAGE_WORDS):
+            continue
+        if any(keyword in img_alt for keyword in DIAGRAM_ALT_WORDS) or \
+           any(keyword in img_src.lower() for keyword in DIAGRAM_SRC_WORDS):
+            diagrams.append(urljoin(url, img_src))
+        elif 'button' not in img_src.lower():
+            others.append(urljoin(url, img_src))
+    image_urls = list(dict.fromkeys(diagrams + others))
+
+    # If no specific sections found, try to extract from paragraphs
+    if not drill_data["organization"] and not drill_data["player_actions"]:
+        paragraphs = content_area.find_all(['p', 'div'], class_=re.compile(r'text|content|description', re.I))
+        if not paragraphs:
+            paragraphs = content_area.find_all('p')
+
+        # Substantial content only
+        all_paragraphs = [text for text in (p.get_text(strip=True) for p in paragraphs) if len(text) > 50]
+
+        if all_paragraphs:
+            # First substantial paragraph is often organization, the second instructions
+            drill_data["organization"] = all_paragraphs[0]
+            if len(all_paragraphs) > 1:
+                drill_data["player_actions"] = all_paragraphs[1]
+
+            # Look for coaching points
+            if not drill_data["coaching_points"]:
+                for text in all_paragraphs:
+                    if any(keyword in text.lower() for keyword in ['coach', 'key point', 'tip', 'focus']):
+                        drill_data["coaching_points"] = text
+                        break
+
+    return drill_data, image_urls
+
+def image_extension(response: requests.Response, image_url: str) -> str:
+    """File extension for a downloaded image, from its Content-Type or URL"""
+    content_type = response.headers.get('content-type', '')
+    if 'png' in content_type:
+        return 'png'
+    if 'jpeg' in content_type or 'jpg' in content_type:
+        return 'jpg'
+    if '.png' in image_url.lower():
+        return 'png'
+    return 'jpg'
+
+def diagram_stem(page_url: str, diagram_dir: Path = DIAGRAM_DIR) -> Path:
+    """Diagram path (without extension) for a drill page: its URL slug plus a short URL hash"""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '-', urlparse(page_url).path.rstrip('/').rpartition('/')[2]) or 'drill'
+    return diagram_dir / f"{slug}-{hashlib.sha1(page_url.encode('utf-8')).hexdigest()[:8]}"
+
+def read_url_file(path: Path) -> List[str]:
+    """Page URLs from a text file, one per line; blank lines and # comments are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def load_sitemap(session: requests.Session, sitemap_url: str, seen: set = None) -> List[str]:
+    """Page URLs listed in a sitemap, following nested sitemap indexes"""
+    seen = set() if seen is None else seen
+    if sitemap_url in seen:
+        return []
+    seen.add(sitemap_url)
+
+    response = session.get(sitemap_url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+
+    urls = []
+    is_index = root.tag.endswith('sitemapindex')
+    for loc in root.iter():
+        if loc.tag.endswith('loc') and loc.text:
+            url = loc.text.strip()
+            urls.extend(load_sitemap(session, url, seen) if is_index else [url])
+    return urls
+
+class HostRateLimiter:
+    """Spaces request starts to each host at least 1/rate seconds apart
+
+    Requests waiting for a host are queued and started lowest priority first,
+    then in arrival order, so a page's diagram can go ahead of pages queued
+    before it. One dispatcher task per busy host hands out the slots on the
+    event loop thread, so no lock is needed; hosts are limited independently,
+    so a slow site never holds up another.
+    """
+
+    def __init__(self, rate: float = HOST_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = {}
+        # host -> heap of (priority, arrival, future) for requests waiting on a slot
+        self.queues = {}
+        self.dispatchers = {}
+        self.arrivals = itertools.count()
+
+    async def wait(self, url: str, priority: int = 0):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queues.setdefault(host, []), (priority, next(self.arrivals), future))
+        if host not in self.dispatchers:
+            self.dispatchers[host] = asyncio.ensure_future(self._dispatch(host))
+        await future
+
+    async def _dispatch(self, host: str):
+        """Start a host's waiting requests one slot at a time until none are left"""
+        queue = self.queues[host]
+        while queue:
+            now = time.monotonic()
+            slot = self.next_slot.get(host, now)
+            if slot > now:
+                # Look at the queue again afterwards; a more urgent request may have arrived
+                await asyncio.sleep(slot - now)
+                continue
+            _, _, future = heapq.heappop(queue)
+            if future.done():
+                # The waiter was cancelled
+                continue
+            future.set_result(None)
+            self.next_slot[host] = now + self.interval
+        del self.queues[host], self.dispatchers[host]
+
+async def crawl_drills_async(page_urls: List[str], diagram_stem_for: Callable[[str], Path],
+                             concurrency: int = CRAWL_CONCURRENCY,
+                             host_rate: float = HOST_RATE) -> AsyncIterator[Dict[str, Any]]:
+    """Fetch and parse every drill page and its diagram, yielding records as pages finish
+
+    Pages and images share one concurrency limit, one pooled session and the
+    per-host rate limit; images are started ahead of pages still waiting for
+    the same host, so records finish steadily instead of all at the end. Each record holds the drill fields plus source_url
+    and diagram_path; pages that fail to load or parse are reported and skipped.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(host_rate)
+
+    with make_session(concurrency) as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def get(url: str, priority: int) -> requests.Response:
+            # Wait for the host's slot before taking a concurrency slot, so requests
+            # held back by one host's rate never block requests to the others
+            await limiter.wait(url, priority)
+            async with semaphore:
+                response = await loop.run_in_executor(executor, partial(session.get, url, timeout=REQUEST_TIMEOUT))
+            response.raise_for_status()
+            return response
+
+        async def crawl_page(page_url: str) -> Dict[str, Any]:
             try:
-                img_response = requests.get(full_url, headers=headers)
-                img_response.raise_for_status()
-                
-                ext = 'jpg'
-                content_type = img_response.headers.get('content-type', '')
-                if 'png' in content_type:
-                    ext = 'png'
-                
-                img_path = f'/home/ubuntu/soccerdrive_rondo_diagram.{ext}'
-                with open(img_path, 'wb') as f:
-                    f.write(img_response.content)
-                print(f"Downloaded image to: {img_path}")
-                image_found = True
-                break
+                response = await get(page_url, PAGE_PRIORITY)
             except Exception as e:
-                print(f"Failed to download image: {e}")
-
-# If still no specific sections found, try to extract from paragraphs
-if not drill_data["organization"] and not drill_data["player_actions"]:
-    print("Extracting from paragraphs...")
-    paragraphs = content_area.find_all(['p', 'div'], class_=re.compile(r'text|content|description', re.I))
-    if not paragraphs:
-        paragraphs = content_area.find_all('p')
-    
-    all_paragraphs = []
-    for p in paragraphs:
-        text = p.get_text(strip=True)
-        if len(text) > 50:  # Substantial content
-            all_paragraphs.append(text)
-    
-    if all_paragraphs:
-        # First substantial paragraph is often organization
-        if not drill_data["organization"] and len(all_paragraphs) > 0:
-            drill_data["organization"] = all_paragraphs[0]
-        
-        # Second is often instructions
-        if not drill_data["player_actions"] and len(all_paragraphs) > 1:
-            drill_data["player_actions"] = all_paragraphs[1]
-        
-        # Look for coaching points
-        if not drill_data["coaching_points"]:
-            for p in all_paragraphs:
-                if any(keyword in p.lower() for keyword in ['coach', 'key point', 'tip', 'focus']):
-                    drill_data["coaching_points"] = p
-                    break
-
-# Save to JSON
-output_path = '/home/ubuntu/soccerdrive_rondo_drill.json'
-with open(output_path, 'w', encoding='utf-8') as f:
-    json.dump(drill_data, f, indent=2, ensure_ascii=False)
-
-print(f"\n✓ Drill data saved to: {output_path}")
-print(f"\nExtracted data summary:")
-for key, value in drill_data.items():
-    if value:
-        preview = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
-        print(f"  {key}: {preview}")
+                print(f"  ✗ Failed to fetch {page_url}: {e}")
+                return None
+            try:
+                drill_data, image_urls = await loop.run_in_executor(executor, parse_drill_page, response.content,
+                                                                    response.url)
+            except Exception as e:
+                print(f"  ✗ Failed to parse {page_url}: {e}")
+                return None
+            drill_data['source_url'] = page_url
+            drill_data['diagram_path'] = None
+
+            # Candidates are tried in order until one downloads
+            for image_url in image_urls:
+                drill_data["diagram_image_url"] = image_url
+                try:
+                    image_response = await get(image_url, IMAGE_PRIORITY)
+                except Exception as e:
+                    print(f"  ✗ Failed to download image {image_url}: {e}")
+                    continue
+                stem = diagram_stem_for(page_url)
+                image_path = stem.with_name(f"{stem.name}.{image_extension(image_response, image_url)}")
+                try:
+                    image_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(image_path, 'wb') as f:
+                        f.write(image_response.content)
+                except OSError as e:
+                    print(f"  ✗ Failed to save image {image_path}: {e}")
+                    continue
+                drill_data['diagram_path'] = str(image_path)
+                break
+            return drill_data
+
+        tasks = [crawl_page(url) for url in dict.fromkeys(page_urls)]
+        for finished in asyncio.as_completed(tasks):
+            record = await finished
+            if record is not None:
+                yield record
+
+def crawl_drills(page_urls: List[str], output_path: Path = CRAWL_OUTPUT, diagram_dir: Path = DIAGRAM_DIR,
+                 concurrency: int = CRAWL_CONCURRENCY, host_rate: float = HOST_RATE) -> int:
+    """Crawl drill pages into an NDJSON file (one record per drill); returns the number of records"""
+    print("\n" + "="*80)
+    print("CRAWLING SOCCERDRIVE DRILLS")
+    print("="*80 + "\n")
+
+    unique_urls = list(dict.fromkeys(page_urls))
+    print(f"📥 Crawling {len(unique_urls)} drill pages ({concurrency} requests at a time, "
+          f"{host_rate or 'unlimited'} per second per host)...")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+
+    async def run() -> int:
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            async for record in crawl_drills_async(unique_urls, partial(diagram_stem, diagram_dir=diagram_dir),
+                                                   concurrency, host_rate):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+                print(f"  ✓ {record['drill_name'] or record['source_url']}")
+        return count
+
+    start = time.perf_counter()
+    count = asyncio.run(run())
+    os.replace(tmp_path, output_path)
+
+    print(f"\n✅ Saved {count}/{len(unique_urls)} drills to: {output_path} ({time.perf_counter() - start:.1f}s)")
+    return count
+
+def fetch_drill(url: str = DEFAULT_URL, output_path: Path = OUTPUT_JSON, image_stem: Path = DIAGRAM_STEM) -> Dict[str, Any]:
+    """Fetch one drill page into a JSON file and its diagram next to it (the original single-drill mode)"""
+    print(f"Fetching drill from: {url}")
+
+    async def run() -> List[Dict[str, Any]]:
+        return [record async for record in crawl_drills_async([url], lambda _: image_stem, concurrency=1, host_rate=0)]
+
+    records = asyncio.run(run())
+    if not records:
+        sys.exit(1)
+    record = records[0]
+    if record['diagram_path']:
+        print(f"Downloaded diagram to: {record['diagram_path']}")
+
+    drill_data = {key: record[key] for key in DRILL_FIELDS}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(drill_data, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✓ Drill data saved to: {output_path}")
+    print(f"\nExtracted data summary:")
+    for key, value in drill_data.items():
+        if value:
+            preview = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
+            print(f"  {key}: {preview}")
+        else:
+            print(f"  {key}: [NOT FOUND]")
+    return drill_data
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch SoccerDrive drill pages into structured drill records")
+    parser.add_argument('urls', nargs='*', help="Drill page URLs to crawl (none: fetch the default rondo drill)")
+    parser.add_argument('--url-file', type=Path, help="Text file of drill page URLs, one per line")
+    parser.add_argument('--sitemap', action='append', default=[], help="Sitemap (or sitemap index) URL to crawl")
+    parser.add_argument('--match', help="Only crawl URLs matching this regex (e.g. '/posts/')")
+    parser.add_argument('--output', type=Path, default=CRAWL_OUTPUT, help="NDJSON file for crawled drills")
+    parser.add_argument('--diagram-dir', type=Path, default=DIAGRAM_DIR, help="Directory for crawled diagrams")
+    parser.add_argument('--concurrency', type=int, default=CRAWL_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument('--host-rate', type=float, default=HOST_RATE,
+                        help="Requests per second to each host (0 = no limit)")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+
+    page_urls = list(args.urls)
+    if args.url_file:
+        page_urls.extend(read_url_file(args.url_file))
+    if args.sitemap:
+        with make_session(1) as session:
+            for sitemap_url in args.sitemap:
+                page_urls.extend(load_sitemap(session, sitemap_url))
+    if args.match:
+        pattern = re.compile(args.match)
+        page_urls = [url for url in page_urls if pattern.search(url)]
+
+    if not (args.urls or args.url_file or args.sitemap):
+        fetch_drill()
     else:
-        print(f"  {key}: [NOT FOUND]")
+        crawl_drills(page_urls, args.output, args.diagram_dir, args.concurrency, args.host_rate)
 
+if __name__ == '__main__':
+    main()
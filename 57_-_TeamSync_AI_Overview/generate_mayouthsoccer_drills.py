@@ -4,14 +4,21 @@ MA Youth Soccer Drill Generator
 Creates comprehensive VLM drill catalog based on MA Youth Soccer curriculum
 """
 
-import json
-import numpy as np
+import pickle
+import argparse
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
+
+from vlm_layout import LayoutBatch, parse_field_size, FIELD_WIDTH, FIELD_HEIGHT
+from catalog_writer import CatalogWriter, CATALOG_FORMATS, SHARED_BLOCK_FORMATS, AGE_ORDER
 
 OUTPUT_JSON = Path("/home/ubuntu/teamsync_ai/nextjs_space/lib/mayouthsoccer-drills.json")
 
+# Distinct (template, players, field, category) vlmData blocks kept in memory
+VLM_MEMO_SIZE = 128
+
 # MA Youth Soccer Curriculum Structure
 CURRICULUM = {
     "U6": {
@@ -93,85 +100,130 @@ DRILL_TEMPLATES = {
     ]
 }
 
-def generate_vlm_data(drill_name: str, player_count: int, field_size: str, category: str) -> Dict[str, Any]:
-    """Generate VLM data for a drill"""
+# Boilerplate of every generated drill; each drill gets its own copies
+PLAYER_ACTIONS = [
+    'Follow coaching instructions',
+    'Maintain proper positioning',
+    'Execute techniques with quality',
+    'Communicate effectively with teammates'
+]
+DRILL_COACHING_POINTS = [
+    'Focus on proper technique',
+    'Quick decision making',
+    'Body position and awareness',
+    'Effective communication',
+    'Intensity and effort'
+]
+DRILL_VARIATIONS = {
+    'easier': ['Increase area size', 'Reduce pressure', 'Allow more touches'],
+    'harder': ['Decrease area size', 'Add time constraints', 'Limit touches'],
+    'related': []
+}
+VLM_COACHING_POINTS = [
+    'Maintain proper body shape and positioning',
+    'Quick decision making under pressure',
+    'Effective communication with teammates',
+    'Technical execution with quality',
+    'Tactical awareness and understanding'
+]
+VLM_PROGRESSIONS = [
+    'Increase tempo and intensity',
+    'Add constraints (touch limits, time limits)',
+    'Modify area size',
+    'Add competitive scoring element'
+]
+
+class VlmMemo:
+    """Bounded LRU of generated vlmData blocks
+    
+    Drills built from the same template, player count, field size and
+    category get the same geometry, animation and coaching blocks, so those
+    blocks are built once. They are kept pickled and every get() unpickles a
+    private copy (several times cheaper than copy.deepcopy), so a drill can be
+    edited without touching the others; identical blocks are only shared on
+    output (CatalogWriter's share_blocks).
+    """
+    
+    def __init__(self, maxsize: int = VLM_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple, build) -> Dict[str, Any]:
+        """Return the blocks for key, building them on a miss"""
+        blocks = self.blocks.get(key)
+        if blocks is not None:
+            self.hits += 1
+            self.blocks.move_to_end(key)
+            return pickle.loads(blocks)
+        
+        self.misses += 1
+        blocks = build()
+        self.blocks[key] = pickle.dumps(blocks, pickle.HIGHEST_PROTOCOL)
+        if len(self.blocks) > self.maxsize:
+            self.blocks.popitem(last=False)
+        return blocks
+
+def layout_templates(templates: List[Dict]) -> LayoutBatch:
+    """Compute player and cone positions for a batch of drill templates at once"""
+    sizes = [parse_field_size(template['field']) for template in templates]
+    return LayoutBatch(
+        [template['players'] for template in templates],
+        [width for width, _ in sizes],
+        blue_ratio=0.65,
+        cone_counts=[8] * len(templates),
+        drill_heights=[height for _, height in sizes]
+    )
+
+def generate_vlm_data(drill_name: str, player_count: int, field_size: str, category: str,
+                      layout: LayoutBatch = None, layout_index: int = 0,
+                      memo: VlmMemo = None) -> Dict[str, Any]:
+    """Generate VLM data for a drill
+    
+    Positions come from a precomputed LayoutBatch when given, otherwise a
+    batch of one is laid out for this drill. With a memo, the blocks are
+    copied from an earlier drill of the same inputs (see VlmMemo).
+    """
+    
+    if memo is None:
+        blocks = build_vlm_blocks(drill_name, player_count, field_size, category, layout, layout_index)
+    else:
+        blocks = memo.get(
+            (drill_name, player_count, field_size, category),
+            lambda: build_vlm_blocks(drill_name, player_count, field_size, category, layout, layout_index)
+        )
+    
+    vlm_data = dict(blocks)
+    vlm_data['metadata'] = {
+        'created': datetime.now().isoformat(),
+        'lastModified': datetime.now().isoformat(),
+        'author': 'TeamSync AI - MA Youth Soccer Generator',
+        'source': 'mayouthsoccer.org',
+        'confidence': 0.90
+    }
+    return vlm_data
+
+def build_vlm_blocks(drill_name: str, player_count: int, field_size: str, category: str,
+                     layout: LayoutBatch = None, layout_index: int = 0) -> Dict[str, Any]:
+    """Build the per-template parts of the VLM data (everything except metadata)"""
     
     # Parse field dimensions
-    try:
-        dims = field_size.split('x')
-        drill_width = int(dims[0])
-        drill_height = int(dims[1])
-    except:
-        drill_width = 30
-        drill_height = 30
+    drill_width, drill_height = parse_field_size(field_size)
     
     # Standard field
-    field_width = 120
-    field_height = 80
+    field_width = FIELD_WIDTH
+    field_height = FIELD_HEIGHT
     center_x = field_width / 2
     center_y = field_height / 2
     
-    # Generate players
-    players = []
-    blue_count = max(1, int(player_count * 0.65))
-    red_count = player_count - blue_count
-    
-    # Position blue players (attackers)
-    for i in range(blue_count):
-        angle = (2 * np.pi * i) / blue_count
-        radius = drill_width / 2.5
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        players.append({
-            'id': f'ATT{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'name': f'Attacker {i+1}',
-            'team': 'blue',
-            'role': 'midfielder',
-            'jerseyNumber': i + 7,
-            'rotation': int((angle * 180 / np.pi) % 360),
-            'isActive': True
-        })
-    
-    # Position red players (defenders)
-    for i in range(red_count):
-        angle = (2 * np.pi * i) / red_count + np.pi / red_count
-        radius = drill_width / 5
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        players.append({
-            'id': f'DEF{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'name': f'Defender {i+1}',
-            'team': 'red',
-            'role': 'defender',
-            'jerseyNumber': i + 2,
-            'rotation': int((angle * 180 / np.pi + 180) % 360),
-            'isActive': True
-        })
-    
-    # Generate equipment
-    equipment = []
-    cone_count = 8
+    if layout is None:
+        layout = layout_templates([{'players': player_count, 'field': field_size}])
+        layout_index = 0
     
-    for i in range(cone_count):
-        angle = (2 * np.pi * i) / cone_count
-        radius = drill_width / 2
-        x = center_x + radius * np.cos(angle)
-        y = center_y + radius * np.sin(angle)
-        
-        equipment.append({
-            'id': f'cone-{i+1}',
-            'x': round(x, 1),
-            'y': round(y, 1),
-            'type': 'cone',
-            'color': 'orange',
-            'size': 'small'
-        })
+    # Players (attackers around the perimeter, defenders inside) and cones
+    players = layout.players(layout_index)
+    equipment = layout.cones(layout_index)
     
     # Add ball
     equipment.append({
@@ -221,33 +273,15 @@ def generate_vlm_data(drill_name: str, player_count: int, field_size: str, categ
         'animations': animations,
         'coaching': {
             'objective': f'Develop {category.lower()} skills through {drill_name}',
-            'coachingPoints': [
-                'Maintain proper body shape and positioning',
-                'Quick decision making under pressure',
-                'Effective communication with teammates',
-                'Technical execution with quality',
-                'Tactical awareness and understanding'
-            ],
+            'coachingPoints': list(VLM_COACHING_POINTS),
             'setupInstructions': [
                 f'Set up {field_size} area using cones',
                 f'Position {player_count} players as shown in diagram',
                 'Start with one ball',
                 'Explain rules and objectives clearly'
             ],
-            'progressions': [
-                'Increase tempo and intensity',
-                'Add constraints (touch limits, time limits)',
-                'Modify area size',
-                'Add competitive scoring element'
-            ],
+            'progressions': list(VLM_PROGRESSIONS),
             'keyFocus': [category, 'Decision making', 'Technical execution', 'Tactical awareness']
-        },
-        'metadata': {
-            'created': datetime.now().isoformat(),
-            'lastModified': datetime.now().isoformat(),
-            'author': 'TeamSync AI - MA Youth Soccer Generator',
-            'source': 'mayouthsoccer.org',
-            'confidence': 0.90
         }
     }
 
@@ -304,7 +338,15 @@ def generate_animation(players: List[Dict], equipment: List[Dict], drill_name: s
         'sequences': sequences
     }]
 
-def create_drill(template: Dict, age_group: str, week: int, session_theme: str, drill_num: int) -> Dict[str, Any]:
+def drill_category(template: Dict, session_theme: str) -> str:
+    """Determine a drill's category from its template name and session theme"""
+    for cat in DRILL_TEMPLATES.keys():
+        if cat.lower() in template['name'].lower() or cat.lower() in session_theme.lower():
+            return cat
+    return "Technical"
+
+def create_drill(template: Dict, age_group: str, week: int, session_theme: str, drill_num: int,
+                 layout: LayoutBatch = None, layout_index: int = 0, memo: VlmMemo = None) -> Dict[str, Any]:
     """Create a complete drill object"""
     
     drill_id = f"mayouth-{age_group.lower()}-w{week}-{template['name'].lower().replace(' ', '-')}"
@@ -312,14 +354,10 @@ def create_drill(template: Dict, age_group: str, week: int, session_theme: str,
     difficulty_map = {'U6': 'beginner', 'U8': 'beginner', 'U10': 'intermediate', 'U12': 'intermediate', 'U14': 'advanced'}
     difficulty = difficulty_map.get(age_group, 'intermediate')
     
-    # Determine category from drill name
-    category = "Technical"
-    for cat in DRILL_TEMPLATES.keys():
-        if cat.lower() in template['name'].lower() or cat.lower() in session_theme.lower():
-            category = cat
-            break
+    category = drill_category(template, session_theme)
     
-    vlm_data = generate_vlm_data(template['name'], template['players'], template['field'], category)
+    vlm_data = generate_vlm_data(template['name'], template['players'], template['field'], category,
+                                 layout=layout, layout_index=layout_index, memo=memo)
     
     return {
         'id': drill_id,
@@ -341,19 +379,8 @@ def create_drill(template: Dict, age_group: str, week: int, session_theme: str,
             "Demonstrate the drill clearly",
             "Start at walking pace, progress to game speed"
         ],
-        'playerActions': [
-            'Follow coaching instructions',
-            'Maintain proper positioning',
-            'Execute techniques with quality',
-            'Communicate effectively with teammates'
-        ],
-        'coachingPoints': [
-            'Focus on proper technique',
-            'Quick decision making',
-            'Body position and awareness',
-            'Effective communication',
-            'Intensity and effort'
-        ],
+        'playerActions': list(PLAYER_ACTIONS),
+        'coachingPoints': list(DRILL_COACHING_POINTS),
         'vlmData': vlm_data,
         'formationId': f"{age_group.lower()}-{category.lower()}",
         'equipment': {
@@ -362,11 +389,7 @@ def create_drill(template: Dict, age_group: str, week: int, session_theme: str,
             'goals': len([e for e in vlm_data['equipment'] if e['type'] == 'goal']),
             'pinnies': 2
         },
-        'variations': {
-            'easier': ['Increase area size', 'Reduce pressure', 'Allow more touches'],
-            'harder': ['Decrease area size', 'Add time constraints', 'Limit touches'],
-            'related': []
-        },
+        'variations': {key: list(values) for key, values in DRILL_VARIATIONS.items()},
         'tags': [age_group, category, difficulty, template['field']],
         'keyWords': [category.lower(), age_group.lower(), 'mayouthsoccer'],
         'curriculum': {'week': week, 'session': drill_num, 'phase': 'main-activity'},
@@ -381,38 +404,47 @@ def create_drill(template: Dict, age_group: str, week: int, session_theme: str,
         }
     }
 
-def generate_all_drills() -> List[Dict[str, Any]]:
-    """Generate all drills for MA Youth Soccer curriculum"""
-    
-    print("\n" + "="*80)
-    print("GENERATING MA YOUTH SOCCER DRILL CATALOG")
-    print("="*80 + "\n")
-    
-    all_drills = []
-    
-    # U6 and U8 (week-based)
-    for age_group in ['U6', 'U8']:
+def _allowed(value: Any, wanted: Iterable[Any]) -> bool:
+    return wanted is None or value in wanted
+
+def iter_plan(age_groups: Iterable[str] = None, themes: Iterable[str] = None,
+              weeks: Iterable[int] = None) -> Iterator[Tuple[Dict, str, int, str, int]]:
+    """Yield (template, age_group, week, session_theme, drill_num) in catalog order
+    
+    Catalog order is age group (AGE_ORDER), then week, then drill number.
+    Age groups, themes and weeks that are filtered out are skipped without
+    building anything.
+    """
+    
+    age_groups = None if age_groups is None else set(age_groups)
+    themes = None if themes is None else set(themes)
+    weeks = None if weeks is None else set(weeks)
+    
+    for age_group in AGE_ORDER:
+        if age_group not in CURRICULUM or not _allowed(age_group, age_groups):
+            continue
         config = CURRICULUM[age_group]
-        print(f"📋 Generating {age_group} drills...")
-        
-        for week in range(1, config['weeks'] + 1):
-            theme = config['themes'][(week - 1) % len(config['themes'])]
-            templates = DRILL_TEMPLATES.get(theme, DRILL_TEMPLATES['Passing'])
-            
-            for drill_num in range(config['drills_per_week']):
-                template = templates[drill_num % len(templates)]
-                drill = create_drill(template, age_group, week, theme, drill_num + 1)
-                all_drills.append(drill)
         
-        print(f"  ✓ Generated {len([d for d in all_drills if d['ageGroup'] == age_group])} drills")
-    
-    # U10, U12, U14 (session-based)
-    for age_group in ['U10', 'U12', 'U14']:
-        config = CURRICULUM[age_group]
-        print(f"📋 Generating {age_group} drills...")
+        if 'weeks' in config:
+            # U6 and U8 (week-based)
+            for week in range(1, config['weeks'] + 1):
+                theme = config['themes'][(week - 1) % len(config['themes'])]
+                if not (_allowed(week, weeks) and _allowed(theme, themes)):
+                    continue
+                templates = DRILL_TEMPLATES.get(theme, DRILL_TEMPLATES['Passing'])
+                
+                for drill_num in range(config['drills_per_week']):
+                    template = templates[drill_num % len(templates)]
+                    yield template, age_group, week, theme, drill_num + 1
+            continue
         
+        # U10, U12, U14 (session-based)
         week = 1
         for session_theme, session_count in config['sessions']:
+            if not _allowed(session_theme, themes):
+                week += session_count
+                continue
+            
             # Determine category from theme
             category = "Possession"
             if "scoring" in session_theme.lower():
@@ -423,70 +455,127 @@ def generate_all_drills() -> List[Dict[str, Any]]:
             templates = DRILL_TEMPLATES.get(category, DRILL_TEMPLATES['Possession'])
             
             for session_num in range(session_count):
-                for drill_num in range(config['drills_per_session']):
-                    template = templates[drill_num % len(templates)]
-                    drill = create_drill(template, age_group, week, session_theme, drill_num + 1)
-                    all_drills.append(drill)
+                if _allowed(week, weeks):
+                    for drill_num in range(config['drills_per_session']):
+                        template = templates[drill_num % len(templates)]
+                        yield template, age_group, week, session_theme, drill_num + 1
                 week += 1
-        
-        print(f"  ✓ Generated {len([d for d in all_drills if d['ageGroup'] == age_group])} drills")
-    
-    return all_drills
 
-def save_drills(drills: List[Dict[str, Any]]):
-    """Save drills to JSON"""
+def plan_curriculum() -> List[Tuple[Dict, str, int, str, int]]:
+    """List (template, age_group, week, session_theme, drill_num) for every drill in the curriculum"""
+    return list(iter_plan())
+
+def iter_drills(age_groups: Iterable[str] = None, themes: Iterable[str] = None, weeks: Iterable[int] = None,
+                categories: Iterable[str] = None, memo: VlmMemo = None) -> Iterator[Dict[str, Any]]:
+    """Lazily generate drills in final catalog order, optionally filtered
+    
+    Each filter is a collection of allowed values (None = everything);
+    filters are combined with AND. Only drills that pass are built.
+    """
+    
+    categories = None if categories is None else set(categories)
+    if memo is None:
+        memo = VlmMemo()
+    
+    # Every template is laid out once up front; the set is small and fixed
+    templates = [template for category_templates in DRILL_TEMPLATES.values() for template in category_templates]
+    layout = layout_templates(templates)
+    template_index = {id(template): index for index, template in enumerate(templates)}
+    
+    for template, age_group, week, session_theme, drill_num in iter_plan(age_groups, themes, weeks):
+        if not _allowed(drill_category(template, session_theme), categories):
+            continue
+        yield create_drill(template, age_group, week, session_theme, drill_num,
+                           layout=layout, layout_index=template_index[id(template)], memo=memo)
+
+def generate_all_drills(age_groups: Iterable[str] = None, themes: Iterable[str] = None,
+                        weeks: Iterable[int] = None, categories: Iterable[str] = None) -> List[Dict[str, Any]]:
+    """Generate all drills for MA Youth Soccer curriculum (or the filtered slice), in catalog order"""
+    
+    print("\n" + "="*80)
+    print("GENERATING MA YOUTH SOCCER DRILL CATALOG")
+    print("="*80 + "\n")
+    
+    memo = VlmMemo()
+    all_drills = []
+    age_count = 0
     
-    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    for drill in iter_drills(age_groups, themes, weeks, categories, memo=memo):
+        if not all_drills or all_drills[-1]['ageGroup'] != drill['ageGroup']:
+            if all_drills:
+                print(f"  ✓ Generated {age_count} drills")
+            print(f"📋 Generating {drill['ageGroup']} drills...")
+            age_count = 0
+        all_drills.append(drill)
+        age_count += 1
     
-    # Sort by age group and week
-    age_order = ['U6', 'U8', 'U10', 'U12', 'U14']
-    drills_sorted = sorted(drills, key=lambda d: (
-        age_order.index(d['ageGroup']) if d['ageGroup'] in age_order else 999,
-        d['curriculum']['week'],
-        d['curriculum']['session']
-    ))
+    if all_drills:
+        print(f"  ✓ Generated {age_count} drills")
     
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(drills_sorted, f, indent=2, ensure_ascii=False)
+    print(f"\n♻️  Reused shared vlmData for {memo.hits} of {memo.hits + memo.misses} drills")
     
-    print(f"\n✅ Saved {len(drills_sorted)} drills to: {OUTPUT_JSON}")
+    return all_drills
+
+def save_drills(drills: Iterable[Dict[str, Any]], fmt: str = 'pretty', share_blocks: bool = False):
+    """Save drills to JSON in the order given (iter_drills already yields catalog order)"""
+    
+    # Drills are streamed to disk one at a time; counts are kept by the writer
+    with CatalogWriter(OUTPUT_JSON, fmt, share_blocks=share_blocks) as writer:
+        writer.write_many(drills)
+    
+    print(f"\n✅ Saved {writer.count} drills to: {writer.path}")
     
     # Statistics
     print("\n" + "="*80)
     print("DRILL CATALOG SUMMARY")
     print("="*80 + "\n")
     
-    by_age = {}
-    by_category = {}
-    
-    for drill in drills_sorted:
-        age = drill['ageGroup']
-        cat = drill['category']
-        by_age[age] = by_age.get(age, 0) + 1
-        by_category[cat] = by_category.get(cat, 0) + 1
-    
     print("Drills by Age Group:")
-    for age in age_order:
-        if age in by_age:
-            print(f"  {age}: {by_age[age]} drills")
+    for age in AGE_ORDER:
+        if age in writer.by_age:
+            print(f"  {age}: {writer.by_age[age]} drills")
     
     print("\nDrills by Category:")
-    for cat, count in sorted(by_category.items()):
+    for cat, count in sorted(writer.by_category.items()):
         print(f"  {cat}: {count} drills")
     
-    print(f"\n📊 Total: {len(drills_sorted)} drills")
-    print(f"💾 File size: {OUTPUT_JSON.stat().st_size / 1024:.1f} KB")
+    print(f"\n📊 Total: {writer.count} drills")
+    print(f"💾 File size: {writer.size_bytes() / 1024:.1f} KB")
 
-def main():
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate the MA Youth Soccer VLM drill catalog")
+    parser.add_argument('--format', choices=CATALOG_FORMATS, default='pretty',
+                        help="Catalog output: pretty (indented), compact, ndjson, sharded by age group "
+                             "or columnar binary")
+    parser.add_argument('--share-blocks', action='store_true',
+                        help="Write repeated vlmData/coaching blocks once and reference them "
+                             f"({', '.join(SHARED_BLOCK_FORMATS)} only)")
+    parser.add_argument('--age-group', action='append', choices=AGE_ORDER, dest='age_groups',
+                        help="Only generate this age group (repeatable)")
+    parser.add_argument('--theme', action='append', dest='themes',
+                        help="Only generate this week theme or session theme (repeatable)")
+    parser.add_argument('--week', action='append', type=int, dest='weeks',
+                        help="Only generate this week (repeatable)")
+    parser.add_argument('--category', action='append', choices=list(DRILL_TEMPLATES) + ['Technical'],
+                        dest='categories', help="Only generate this category (repeatable)")
+    args = parser.parse_args(argv)
+    if args.share_blocks and args.format not in SHARED_BLOCK_FORMATS:
+        parser.error(f"--share-blocks needs --format {'/'.join(SHARED_BLOCK_FORMATS)}")
+    return args
+
+def main(argv: List[str] = None):
     """Main execution"""
     
+    args = parse_args(argv)
+    
     print("\n" + "="*80)
     print("MA YOUTH SOCCER COMPREHENSIVE DRILL CATALOG")
     print("VLM-Enhanced Drill Generation System")
     print("="*80)
     
-    drills = generate_all_drills()
-    save_drills(drills)
+    drills = generate_all_drills(args.age_groups, args.themes, args.weeks, args.categories)
+    save_drills(drills, args.format, share_blocks=args.share_blocks)
     
     print("\n" + "="*80)
     print("✅ GENERATION COMPLETE")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Timing spans and counters for the extraction pipeline, tagged per PDF and age group
+
+Spans and counters are aggregated as they are recorded (one entry per
+stage/pdf/age group), so memory stays flat on long runs. Worker processes
+collect into their own recorder and hand a snapshot back to the parent,
+which merges it before the JSON run report is written.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Tuple
+
+# Tags (pdf, ageGroup) applied to every span/counter recorded inside metrics.tagged()
+_current_tags = contextvars.ContextVar('run_metrics_tags', default=(None, None))
+
+# Stage that wraps the whole extraction of one PDF; its time is the per-PDF total
+PDF_STAGE = 'pdf'
+
+class RunMetrics:
+    """Thread-safe recorder of stage timings and counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (stage, pdf, ageGroup) -> [calls, seconds, max seconds]
+        self.spans = {}
+        # (name, pdf, ageGroup) -> value
+        self.counters = {}
+
+    def _tags(self, pdf: str, age_group: str) -> Tuple[str, str]:
+        current_pdf, current_age = _current_tags.get()
+        return pdf or current_pdf, age_group or current_age
+
+    @contextmanager
+    def tagged(self, pdf: str = None, age_group: str = None) -> Iterator[None]:
+        """Tag everything recorded in this block with a PDF and/or age group"""
+        token = _current_tags.set(self._tags(pdf, age_group))
+        try:
+            yield
+        finally:
+            _current_tags.reset(token)
+
+    @contextmanager
+    def span(self, stage: str, pdf: str = None, age_group: str = None) -> Iterator[None]:
+        """Time a block as one call of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start, pdf, age_group)
+
+    def add_time(self, stage: str, seconds: float, pdf: str = None, age_group: str = None, calls: int = 1):
+        """Record time spent in a stage"""
+        key = (stage,) + self._tags(pdf, age_group)
+        with self.lock:
+            entry = self.spans.get(key)
+            if entry is None:
+                self.spans[key] = [calls, seconds, seconds]
+            else:
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def count(self, name: str, value: int = 1, pdf: str = None, age_group: str = None):
+        """Add to a counter"""
+        key = (name,) + self._tags(pdf, age_group)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        """Picklable copy of everything recorded so far"""
+        with self.lock:
+            return {
+                'spans': [list(key) + entry for key, entry in self.spans.items()],
+                'counters': [list(key) + [value] for key, value in self.counters.items()]
+            }
+
+    def merge(self, snapshot: Dict[str, List[Any]]):
+        """Fold a snapshot (e.g. from a worker process) into this recorder"""
+        with self.lock:
+            for stage, pdf, age_group, calls, seconds, max_seconds in snapshot['spans']:
+                entry = self.spans.get((stage, pdf, age_group))
+                if entry is None:
+                    self.spans[(stage, pdf, age_group)] = [calls, seconds, max_seconds]
+                else:
+                    entry[0] += calls
+                    entry[1] += seconds
+                    entry[2] = max(entry[2], max_seconds)
+            for name, pdf, age_group, value in snapshot['counters']:
+                self.counters[(name, pdf, age_group)] = self.counters.get((name, pdf, age_group), 0) + value
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self.lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def report(self, **info) -> Dict[str, Any]:
+        """Aggregate into a run report: totals per stage, per age group and per PDF (slowest first)"""
+        with self.lock:
+            spans = dict(self.spans)
+            counters = dict(self.counters)
+
+        stages = {}
+        by_age = {}
+        by_pdf = {}
+        for (stage, pdf, age_group), (calls, seconds, max_seconds) in spans.items():
+            total = stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'maxSeconds': 0.0})
+            total['calls'] += calls
+            total['seconds'] += seconds
+            total['maxSeconds'] = max(total['maxSeconds'], max_seconds)
+            if age_group:
+                age_stages = by_age.setdefault(age_group, {'stages': {}, 'counters': {}})['stages']
+                age_stages[stage] = age_stages.get(stage, 0.0) + seconds
+            if pdf:
+                pdf_entry = by_pdf.setdefault((pdf, age_group), {'stages': {}, 'counters': {}})
+                pdf_entry['stages'][stage] = pdf_entry['stages'].get(stage, 0.0) + seconds
+
+        counter_totals = {}
+        for (name, pdf, age_group), value in counters.items():
+            counter_totals[name] = counter_totals.get(name, 0) + value
+            if age_group:
+                age_counters = by_age.setdefault(age_group, {'stages': {}, 'counters': {}})['counters']
+                age_counters[name] = age_counters.get(name, 0) + value
+            if pdf:
+                pdf_counters = by_pdf.setdefault((pdf, age_group), {'stages': {}, 'counters': {}})['counters']
+                pdf_counters[name] = pdf_counters.get(name, 0) + value
+
+        pdfs = [
+            {
+                'pdf': pdf,
+                'ageGroup': age_group,
+                'seconds': round(entry['stages'].get(PDF_STAGE, 0.0), 6),
+                'stages': {stage: round(seconds, 6) for stage, seconds in sorted(entry['stages'].items())},
+                'counters': dict(sorted(entry['counters'].items()))
+            }
+            for (pdf, age_group), entry in by_pdf.items()
+        ]
+        pdfs.sort(key=lambda entry: entry['seconds'], reverse=True)
+
+        return {
+            'generated': datetime.now().isoformat(),
+            'pid': os.getpid(),
+            **info,
+            'stages': {
+                stage: {
+                    'calls': total['calls'],
+                    'seconds': round(total['seconds'], 6),
+                    'maxSeconds': round(total['maxSeconds'], 6)
+                }
+                for stage, total in sorted(stages.items(), key=lambda item: -item[1]['seconds'])
+            },
+            'counters': dict(sorted(counter_totals.items())),
+            'byAgeGroup': {
+                age_group: {
+                    'stages': {stage: round(seconds, 6) for stage, seconds in sorted(entry['stages'].items())},
+                    'counters': dict(sorted(entry['counters'].items()))
+                }
+                for age_group, entry in by_age.items()
+            },
+            'pdfs': pdfs
+        }
+
+    def write_report(self, path: Path, **info) -> Dict[str, Any]:
+        """Atomically write the run report as JSON and return it"""
+        report = self.report(**info)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return report
+
+# Process-wide recorder used by the pipeline
+metrics = RunMetrics()
+
+@contextmanager
+def collect() -> Iterator[RunMetrics]:
+    """Record into a fresh recorder for the duration of the block (used per pool job)"""
+    global metrics
+    previous = metrics
+    metrics = RunMetrics()
+    try:
+        yield metrics
+    finally:
+        metrics = previous
+
+def span(stage: str, pdf: str = None, age_group: str = None):
+    """Time a block on the process-wide recorder"""
+    return metrics.span(stage, pdf, age_group)
+
+def tagged(pdf: str = None, age_group: str = None):
+    """Tag a block on the process-wide recorder"""
+    return metrics.tagged(pdf, age_group)
+
+def count(name: str, value: int = 1, pdf: str = None, age_group: str = None):
+    """Add to a counter on the process-wide recorder"""
+    metrics.count(name, value, pdf, age_group)
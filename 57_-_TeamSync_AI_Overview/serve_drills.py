@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+MA Youth Soccer Drill Server
+Serves generated drills and catalog slices over HTTP on demand
+
+Endpoints (GET or HEAD):
+  /drills                  drills in catalog order; filters ageGroup, theme,
+                           week, category (repeatable or comma separated),
+                           plus offset and limit
+  /drills/<id>             a single drill
+  /catalog/manifest        drill counts per age group, category and week
+  /health                  liveness and cache statistics
+
+Rendered responses are kept in an LRU cache with an ETag, so repeat requests
+are answered from memory and If-None-Match revalidations get 304. Drill
+ETags are weak and ignore generation timestamps, so they survive restarts
+and cache evictions as long as the drills themselves are unchanged.
+Bodies are gzipped when the client accepts it; the compressed form is cached
+alongside the plain one.
+"""
+
+import sys
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import itertools
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs, unquote
+from typing import List, Dict, Any, Tuple
+
+import generate_mayouthsoccer_drills as generator
+from catalog_writer import AGE_ORDER
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Rendered responses kept in memory (whichever limit is hit first)
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Smaller bodies are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+
+STATUS_TEXT = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+
+# Drill fields that change on every generation and are left out of ETags
+GENERATION_STAMPS = ('created', 'lastModified')
+
+# Query parameter -> iter_drills filter
+FILTER_PARAMS = {
+    'ageGroup': 'age_groups',
+    'theme': 'themes',
+    'week': 'weeks',
+    'category': 'categories'
+}
+
+class RenderedResponse:
+    """A response body with its ETag (by default a strong one over the body) and a lazily built gzip variant"""
+
+    def __init__(self, status: int, body: bytes, content_type: str = 'application/json; charset=utf-8',
+                 etag: str = None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag or '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            # mtime=0 keeps the compressed bytes stable for the same body
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + (len(self._gzipped) if self._gzipped else 0)
+
+class ResponseCache:
+    """LRU cache of rendered responses bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> RenderedResponse:
+        response = self.entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: RenderedResponse):
+        if response.size > self.max_bytes:
+            return
+        self.entries[key] = response
+        self.entries.move_to_end(key)
+        self.resize(key)
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            old_key, _ = self.entries.popitem(last=False)
+            self.bytes -= self.sizes.pop(old_key)
+
+    def resize(self, key: str):
+        """Re-account an entry whose gzip variant was just built"""
+        size = self.entries[key].size
+        self.bytes += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+def _json_body(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _error(status: int, message: str) -> RenderedResponse:
+    return RenderedResponse(status, _json_body({'error': message}))
+
+def _without_stamps(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _without_stamps(item) for key, item in value.items() if key not in GENERATION_STAMPS}
+    if isinstance(value, list):
+        return [_without_stamps(item) for item in value]
+    return value
+
+def drill_response(value: Any) -> RenderedResponse:
+    """Render drills with a weak ETag over their content, so a rebuild with new timestamps keeps it"""
+    etag = 'W/"' + hashlib.sha1(_json_body(_without_stamps(value))).hexdigest() + '"'
+    return RenderedResponse(200, _json_body(value), etag=etag)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip"""
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            if not q.startswith('q='):
+                return True
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return True
+    return False
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == '*':
+        return True
+    etag = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+class DrillService:
+    """Route requests to generated drills and cache the rendered responses"""
+
+    def __init__(self, cache: ResponseCache = None):
+        self.cache = cache or ResponseCache()
+        self.memo = generator.VlmMemo()
+        self.started = time.time()
+        # Curriculum slots by drill id (first slot wins if an id repeats)
+        self.slots = {}
+        for slot in generator.iter_plan():
+            template, age_group, week, _, _ = slot
+            drill_id = f"mayouth-{age_group.lower()}-w{week}-{template['name'].lower().replace(' ', '-')}"
+            self.slots.setdefault(drill_id, slot)
+
+    def cache_key(self, path: str, query: Dict[str, List[str]]) -> str:
+        """Normalize a request so equivalent queries share one cache entry"""
+        params = sorted((name, value) for name, values in query.items() for value in values)
+        return path + '?' + '&'.join(f"{name}={value}" for name, value in params)
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Tuple[str, RenderedResponse]:
+        """Return (cache key, response), rendering it on a cache miss"""
+        key = self.cache_key(path, query)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.render(path, query)
+            # Health is live data and errors are cheap; neither is cached
+            if response.status == 200 and path != '/health':
+                self.cache.put(key, response)
+        return key, response
+
+    def render(self, path: str, query: Dict[str, List[str]]) -> RenderedResponse:
+        try:
+            if path == '/drills':
+                return self.render_drills(query)
+            if path.startswith('/drills/'):
+                return self.render_drill(unquote(path[len('/drills/'):]))
+            if path == '/catalog/manifest':
+                return self.render_manifest()
+            if path == '/health':
+                return RenderedResponse(200, _json_body({
+                    'status': 'ok',
+                    'uptimeSeconds': round(time.time() - self.started, 1),
+                    'cache': self.cache.stats()
+                }))
+            return _error(404, f"No route for {path}")
+        except ValueError as e:
+            return _error(400, str(e))
+
+    def render_drills(self, query: Dict[str, List[str]]) -> RenderedResponse:
+        filters = {}
+        for param, name in FILTER_PARAMS.items():
+            values = [value for raw in query.get(param, []) for value in raw.split(',') if value]
+            if values:
+                filters[name] = [int(value) for value in values] if name == 'weeks' else values
+        unknown = set(query) - set(FILTER_PARAMS) - {'offset', 'limit'}
+        if unknown:
+            raise ValueError(f"Unknown query parameter(s): {', '.join(sorted(unknown))}")
+
+        offset = int(query.get('offset', ['0'])[-1])
+        limit = query.get('limit', [None])[-1]
+        if offset < 0 or (limit is not None and int(limit) < 0):
+            raise ValueError("offset and limit must be non-negative")
+
+        # Drills past offset + limit are never generated
+        drills = generator.iter_drills(memo=self.memo, **filters)
+        page = itertools.islice(drills, offset, None if limit is None else offset + int(limit))
+        return drill_response(list(page))
+
+    def render_drill(self, drill_id: str) -> RenderedResponse:
+        slot = self.slots.get(drill_id)
+        if slot is None:
+            return _error(404, f"Unknown drill {drill_id}")
+        template, age_group, week, session_theme, drill_num = slot
+        return drill_response(
+            generator.create_drill(template, age_group, week, session_theme, drill_num, memo=self.memo)
+        )
+
+    def render_manifest(self) -> RenderedResponse:
+        # Counted from the curriculum plan, without building any drill
+        by_age = {}
+        by_category = {}
+        weeks = {}
+        for template, age_group, week, session_theme, _ in generator.iter_plan():
+            category = generator.drill_category(template, session_theme)
+            by_age[age_group] = by_age.get(age_group, 0) + 1
+            by_category[category] = by_category.get(category, 0) + 1
+            weeks.setdefault(age_group, set()).add(week)
+        return RenderedResponse(200, _json_body({
+            'totalDrills': sum(by_age.values()),
+            'ageGroups': [
+                {'ageGroup': age, 'drills': by_age[age], 'weeks': sorted(weeks[age])}
+                for age in AGE_ORDER if age in by_age
+            ],
+            'byCategory': dict(sorted(by_category.items()))
+        }))
+
+    def handle(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Turn one parsed request into (status, response headers, body)"""
+        if method not in ('GET', 'HEAD'):
+            response = _error(405, f"{method} not allowed")
+            return 405, [('Allow', 'GET, HEAD'), ('Content-Type', response.content_type)], response.body
+
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        key, response = self.respond(path, parse_qs(url.query))
+
+        response_headers = [('Content-Type', response.content_type), ('Vary', 'Accept-Encoding')]
+        if response.status != 200:
+            return response.status, response_headers, response.body
+
+        # The gzip variant is a different representation, so it gets its own ETag
+        use_gzip = len(response.body) >= GZIP_MIN_BYTES and accepts_gzip(headers.get('accept-encoding', ''))
+        etag = response.etag[:-1] + '-gzip"' if use_gzip else response.etag
+        response_headers.append(('ETag', etag))
+        response_headers.append(('Cache-Control', 'no-cache'))
+        if_none_match = headers.get('if-none-match', '')
+        if if_none_match and (etag_matches(if_none_match, etag) or etag_matches(if_none_match, response.etag)):
+            return 304, response_headers[1:], b''
+
+        body = response.body
+        if use_gzip:
+            had_gzip = response._gzipped is not None
+            body = response.gzipped()
+            if not had_gzip and key in self.cache.entries:
+                self.cache.resize(key)
+            response_headers.append(('Content-Encoding', 'gzip'))
+        return 200, response_headers, body
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, str, Dict[str, str]]:
+    """Read a request line and headers; returns None at end of stream"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if len(line) > MAX_REQUEST_LINE:
+        raise ValueError("request line too long")
+    method, target, version = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise ValueError("too many headers")
+
+    # Request bodies are not used by any route, but must be drained for keep-alive
+    length = int(headers.get('content-length', 0) or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+async def handle_connection(service: DrillService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve requests on one connection until the client closes it"""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                response = _error(400, "Malformed request")
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nConnection: close\r\n"
+                             b"Content-Type: application/json; charset=utf-8\r\n"
+                             + f"Content-Length: {len(response.body)}\r\n\r\n".encode('latin-1') + response.body)
+                break
+            if request is None:
+                break
+
+            method, target, version, headers = request
+            try:
+                status, response_headers, body = service.handle(method, target, headers)
+            except Exception as e:
+                print(f"  ✗ {method} {target}: {e}")
+                status, response_headers, body = 500, [('Content-Type', 'application/json; charset=utf-8')], \
+                    _json_body({'error': 'Internal server error'})
+
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            head = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+            head += [f"{name}: {value}" for name, value in response_headers]
+            head.append(f"Content-Length: {len(body)}")
+            if not keep_alive:
+                head.append("Connection: close")
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            if method != 'HEAD':
+                writer.write(body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, service: DrillService = None):
+    """Run the drill server until cancelled"""
+    service = service or DrillService()
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    addresses = ', '.join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    print(f"🚀 Serving drills on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve MA Youth Soccer drills over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--cache-entries', type=int, default=CACHE_MAX_ENTRIES,
+                        help="Rendered responses kept in memory")
+    parser.add_argument('--cache-mb', type=float, default=CACHE_MAX_BYTES / (1024 * 1024),
+                        help="Memory budget for rendered responses, in MB")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None):
+    """Main execution"""
+    args = parse_args(argv)
+    cache = ResponseCache(args.cache_entries, int(args.cache_mb * 1024 * 1024))
+    try:
+        asyncio.run(serve(args.host, args.port, DrillService(cache)))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,8 @@
 import json
 from pathlib import Path
 
+from drill_index import DrillIndex
+
 drills_file = Path("/home/ubuntu/teamsync_ai/nextjs_space/lib/mayouthsoccer-drills.json")
 
 print("\n" + "="*80)
@@ -18,15 +20,15 @@ print(f"✅ Successfully loaded {len(drills)} drills from:")
 print(f"   {drills_file}")
 print(f"   File size: {drills_file.stat().st_size / 1024:.1f} KB\n")
 
+index = DrillIndex(drills)
+
 # Show distribution
 print("DRILL DISTRIBUTION:")
 print("-" * 80)
 
-age_groups = {}
-categories = {}
-for drill in drills:
-    age_groups[drill['ageGroup']] = age_groups.get(drill['ageGroup'], 0) + 1
-    categories[drill['category']] = categories.get(drill['category'], 0) + 1
+facets = index.facets(['ageGroup', 'category'])
+age_groups = facets['ageGroup']
+categories = facets['category']
 
 print("\nBy Age Group:")
 for age in ['U6', 'U8', 'U10', 'U12', 'U14']:
@@ -46,7 +48,7 @@ print("SAMPLE DRILLS (One from each age group)")
 print("="*80 + "\n")
 
 for age in ['U6', 'U8', 'U10', 'U12', 'U14']:
-    sample = next(d for d in drills if d['ageGroup'] == age)
+    sample = index.first(ageGroup=age)
     print(f"📋 {age}: {sample['name']}")
     print(f"   Category: {sample['category']}")
     print(f"   Players: {sample['playerCount']} | Duration: {sample['duration']} min | Field: {sample['fieldSize']}")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+VLM Binary Catalog Format
+Columnar, quantized, string-interned encoding of drill catalogs and vlmData
+
+Every list of values is stored as one column. Lists of dicts are split into
+one column per key (so all player x coordinates of a catalog end up in a
+single array), lists of lists are flattened with a lengths column, numbers
+become the narrowest integer array that holds them exactly (floats scaled
+by 10^k when that is lossless), and every string lives once in a table.
+decode(encode(obj)) == obj for any JSON value, including int/float types.
+"""
+
+import json
+import struct
+import zlib
+import numpy as np
+from pathlib import Path
+from typing import List, Any
+
+MAGIC = b'VLMB'
+FORMAT_VERSION = 1
+FLAG_ZLIB = 1
+
+# Column kinds
+C_NULL = 0
+C_BOOL = 1
+C_INT = 2
+C_QFLOAT = 3
+C_FLOAT = 4
+C_STR = 5
+C_LIST = 6
+C_DICT = 7
+C_UNION = 8
+C_JSON = 9
+
+# Value kinds inside a union column
+K_NULL, K_BOOL, K_INT, K_FLOAT, K_STR, K_LIST, K_DICT = range(7)
+
+# Narrowest first; codes index this tuple
+INT_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64)
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+MAX_FLOAT_DECIMALS = 6
+
+def _value_kind(value: Any) -> int:
+    if value is None:
+        return K_NULL
+    if isinstance(value, bool):
+        return K_BOOL
+    if isinstance(value, int):
+        return K_INT
+    if isinstance(value, float):
+        return K_FLOAT
+    if isinstance(value, str):
+        return K_STR
+    if isinstance(value, list):
+        return K_LIST
+    if isinstance(value, dict):
+        return K_DICT
+    raise TypeError(f"Cannot encode {type(value).__name__} as VLM binary")
+
+def narrowest_dtype(lo: int, hi: int) -> int:
+    """Code (index into INT_DTYPES) of the narrowest integer dtype holding lo..hi"""
+    for code, dtype in enumerate(INT_DTYPES):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return code
+    raise OverflowError("integer column exceeds int64")
+
+class _Encoder:
+    """Accumulate one column tree plus the shared string table"""
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = {}
+
+    def varint(self, n: int):
+        while n >= 0x80:
+            self.out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.out.append(n)
+
+    def intern(self, s: str) -> int:
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+        return index
+
+    def int_array(self, values: List[int]):
+        if not values:
+            self.out.append(0)
+            return
+        code = narrowest_dtype(min(values), max(values))
+        self.out.append(code)
+        self.out += np.asarray(values, dtype=INT_DTYPES[code]).astype(
+            np.dtype(INT_DTYPES[code]).newbyteorder('<'), copy=False).tobytes()
+
+    def column(self, values: List[Any]):
+        """Encode a list of JSON values as one column"""
+        kinds = [_value_kind(value) for value in values]
+        distinct = set(kinds)
+
+        if len(distinct) > 1:
+            self.out.append(C_UNION)
+            self.varint(len(values))
+            self.int_array(kinds)
+            for kind in sorted(distinct):
+                self._typed([value for value, k in zip(values, kinds) if k == kind], kind)
+            return
+
+        self._typed(values, distinct.pop() if distinct else K_NULL)
+
+    def _typed(self, values: List[Any], kind: int):
+        if kind == K_NULL:
+            self.out.append(C_NULL)
+            self.varint(len(values))
+
+        elif kind == K_BOOL:
+            self.out.append(C_BOOL)
+            self.varint(len(values))
+            self.out += np.packbits(np.asarray(values, dtype=bool)).tobytes()
+
+        elif kind == K_INT:
+            if min(values) < INT64_MIN or max(values) > INT64_MAX:
+                self._json(values)
+                return
+            self.out.append(C_INT)
+            self.varint(len(values))
+            self.int_array(values)
+
+        elif kind == K_FLOAT:
+            self._floats(values)
+
+        elif kind == K_STR:
+            self.out.append(C_STR)
+            self.varint(len(values))
+            self.int_array([self.intern(value) for value in values])
+
+        elif kind == K_LIST:
+            self.out.append(C_LIST)
+            self.varint(len(values))
+            self.int_array([len(value) for value in values])
+            self.column([item for value in values for item in value])
+
+        elif kind == K_DICT:
+            # Dicts sharing a key tuple ("shape") are stored key by key
+            shapes = {}
+            shape_ids = []
+            for value in values:
+                shape_ids.append(shapes.setdefault(tuple(value), len(shapes)))
+            self.out.append(C_DICT)
+            self.varint(len(values))
+            self.varint(len(shapes))
+            self.int_array(shape_ids)
+            for shape, shape_id in shapes.items():
+                members = [value for value, sid in zip(values, shape_ids) if sid == shape_id]
+                self.varint(len(shape))
+                self.int_array([self.intern(key) for key in shape])
+                for key in shape:
+                    self.column([member[key] for member in members])
+
+    def _floats(self, values: List[float]):
+        array = np.asarray(values, dtype=np.float64)
+        # -0.0 has no integer form, so it (and inf/nan) keeps the float64 column
+        if np.isfinite(array).all() and not (np.signbit(array) & (array == 0)).any():
+            for decimals in range(MAX_FLOAT_DECIMALS + 1):
+                scale = 10.0 ** decimals
+                scaled = np.round(array * scale)
+                if np.abs(scaled).max() > INT64_MAX // 2:
+                    break
+                # Exact only if dividing back reproduces every value
+                if np.array_equal(scaled / scale, array):
+                    self.out.append(C_QFLOAT)
+                    self.varint(len(values))
+                    self.out.append(decimals)
+                    self.int_array(scaled.astype(np.int64).tolist())
+                    return
+        self.out.append(C_FLOAT)
+        self.varint(len(values))
+        self.out += array.astype('<f8').tobytes()
+
+    def _json(self, values: List[Any]):
+        self.out.append(C_JSON)
+        self.varint(len(values))
+        self.int_array([self.intern(json.dumps(value)) for value in values])
+
+class _Decoder:
+    """Walk an encoded column tree"""
+
+    def __init__(self, data: bytes, strings: List[str], pos: int):
+        self.data = data
+        self.strings = strings
+        self.pos = pos
+
+    def varint(self) -> int:
+        n = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def int_array(self, count: int) -> List[int]:
+        dtype = np.dtype(INT_DTYPES[self.data[self.pos]]).newbyteorder('<')
+        self.pos += 1
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.pos)
+        self.pos += count * dtype.itemsize
+        return array
+
+    def column(self) -> List[Any]:
+        kind = self.data[self.pos]
+        self.pos += 1
+        count = self.varint()
+
+        if kind == C_NULL:
+            return [None] * count
+
+        if kind == C_BOOL:
+            nbytes = (count + 7) // 8
+            bits = np.unpackbits(np.frombuffer(self.data, np.uint8, nbytes, self.pos))[:count]
+            self.pos += nbytes
+            return bits.astype(bool).tolist()
+
+        if kind == C_INT:
+            return self.int_array(count).tolist()
+
+        if kind == C_QFLOAT:
+            decimals = self.data[self.pos]
+            self.pos += 1
+            return (self.int_array(count).astype(np.float64) / 10.0 ** decimals).tolist()
+
+        if kind == C_FLOAT:
+            array = np.frombuffer(self.data, '<f8', count, self.pos)
+            self.pos += count * 8
+            return array.tolist()
+
+        if kind == C_STR:
+            strings = self.strings
+            return [strings[i] for i in self.int_array(count).tolist()]
+
+        if kind == C_JSON:
+            strings = self.strings
+            return [json.loads(strings[i]) for i in self.int_array(count).tolist()]
+
+        if kind == C_LIST:
+            offsets = np.cumsum(self.int_array(count), dtype=np.int64).tolist()
+            items = self.column()
+            return [items[start:end] for start, end in zip([0] + offsets, offsets)]
+
+        if kind == C_DICT:
+            shape_count = self.varint()
+            shape_ids = self.int_array(count)
+            shapes = []
+            for _ in range(shape_count):
+                keys = [self.strings[i] for i in self.int_array(self.varint()).tolist()]
+                columns = [self.column() for _ in keys]
+                if keys:
+                    shapes.append([dict(zip(keys, row)) for row in zip(*columns)])
+                else:
+                    shapes.append([{} for _ in range(int((shape_ids == len(shapes)).sum()))])
+            if shape_count == 1:
+                return shapes[0]
+            rows = [iter(rows) for rows in shapes]
+            return [next(rows[shape_id]) for shape_id in shape_ids.tolist()]
+
+        if kind == C_UNION:
+            kinds = self.int_array(count).tolist()
+            typed = {kind: iter(self.column()) for kind in sorted(set(kinds))}
+            return [next(typed[kind]) for kind in kinds]
+
+        raise ValueError(f"Unknown column kind {kind}")
+
+def encode(obj: Any, compress: bool = True) -> bytes:
+    """Encode a JSON value (typically the drill catalog list) as VLM binary"""
+    encoder = _Encoder()
+    encoder.column([obj])
+    body = encoder.out
+
+    table = _Encoder()
+    table.varint(len(encoder.strings))
+    for s in encoder.strings:
+        raw = s.encode('utf-8')
+        table.varint(len(raw))
+        table.out += raw
+
+    payload = bytes(table.out + body)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 9)
+        flags |= FLAG_ZLIB
+    return MAGIC + struct.pack('<BB', FORMAT_VERSION, flags) + payload
+
+def decode(data: bytes) -> Any:
+    """Decode VLM binary back into the exact JSON value that was encoded"""
+    if data[:4] != MAGIC:
+        raise ValueError("Not a VLM binary catalog")
+    version, flags = struct.unpack_from('<BB', data, 4)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported VLM binary version {version}")
+    payload = data[6:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    reader = _Decoder(payload, [], 0)
+    strings = []
+    for _ in range(reader.varint()):
+        length = reader.varint()
+        strings.append(payload[reader.pos:reader.pos + length].decode('utf-8'))
+        reader.pos += length
+    reader.strings = strings
+    return reader.column()[0]
+
+def save_binary(path: Path, obj: Any, compress: bool = True):
+    """Write obj to path in VLM binary format"""
+    with open(path, 'wb') as f:
+        f.write(encode(obj, compress=compress))
+
+def load_binary(path: Path) -> Any:
+    """Read a VLM binary file"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
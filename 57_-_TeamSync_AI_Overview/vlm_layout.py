@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+VLM Layout Engine
+Computes player and cone positions for whole batches of drills with NumPy
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Sequence, Tuple
+
+# Standard field
+FIELD_WIDTH = 120
+FIELD_HEIGHT = 80
+
+# Footprint radii (yards) used to keep entities from overlapping
+PLAYER_RADIUS = 1.0
+CONE_RADIUS = 0.5
+
+# Cones mark the area, so they give way less than players in a collision
+PLAYER_MOBILITY = 1.0
+CONE_MOBILITY = 0.25
+
+# Relaxation passes; each pass only touches pairs that still overlap
+SOLVER_ITERATIONS = 64
+# Extra clearance so rounding to 0.1 yard cannot reintroduce an overlap
+SOLVER_SLACK = 0.1
+# Zones smaller than this multiple of the entities' footprint are grown
+MIN_PACKING_AREA = 1.5
+
+def _ring_positions(counts: np.ndarray, divisors: np.ndarray, radii: np.ndarray, half_step: bool,
+                    center_x: float, center_y: float) -> Tuple[np.ndarray, ...]:
+    """Place counts[d] points on a circle of radii[d] for every drill d at once
+
+    Returns flat x, y and angle arrays plus the start offset of each drill.
+    """
+    total = int(counts.sum())
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp)
+    drill_index = np.repeat(np.arange(len(counts)), counts)
+    slot = np.arange(total) - starts[drill_index]
+
+    n = divisors[drill_index].astype(float)
+    angles = (2 * np.pi * slot) / n
+    if half_step:
+        angles = angles + np.pi / n
+
+    radius = radii[drill_index]
+    xs = np.round(center_x + radius * np.cos(angles), 1)
+    ys = np.round(center_y + radius * np.sin(angles), 1)
+    return xs, ys, angles, starts
+
+def find_overlaps(groups: np.ndarray, xs: np.ndarray, ys: np.ndarray,
+                  radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairs (i, j) of entities in the same group whose footprints overlap
+
+    Sort-and-sweep: entities are sorted by (group, x) once, then each only
+    checks neighbours within twice the largest radius along x, found with a
+    binary search. O(n log n) plus the number of close pairs.
+    """
+    if len(xs) < 2:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+
+    reach = 2 * float(radii.max())
+    # Spread groups far enough apart that no sweep window crosses a boundary
+    stride = float(xs.max() - xs.min()) + 2 * reach + 1
+    keys = groups * stride + (xs - xs.min())
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    ends = np.searchsorted(sorted_keys, sorted_keys + reach, side='right')
+
+    firsts, seconds = [], []
+    positions = np.arange(len(xs))
+    for offset in range(1, int((ends - positions).max())):
+        candidates = positions[positions + offset < ends]
+        firsts.append(order[candidates])
+        seconds.append(order[candidates + offset])
+    if not firsts:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+
+    i = np.concatenate(firsts)
+    j = np.concatenate(seconds)
+    close = np.hypot(xs[j] - xs[i], ys[j] - ys[i]) < radii[i] + radii[j]
+    return i[close], j[close]
+
+def resolve_overlaps(groups: np.ndarray, xs: np.ndarray, ys: np.ndarray, radii: np.ndarray,
+                     mobility: np.ndarray, bounds: np.ndarray,
+                     iterations: int = SOLVER_ITERATIONS) -> Tuple[np.ndarray, np.ndarray]:
+    """Push overlapping entities apart and clamp each into its group's bounds
+
+    bounds holds (min_x, max_x, min_y, max_y) per group. Overlaps can only
+    remain if the bounds are too tight or the iterations run out.
+    """
+    xs = xs.astype(float).copy()
+    ys = ys.astype(float).copy()
+    lo_x, hi_x, lo_y, hi_y = (bounds[groups, k] for k in range(4))
+    np.clip(xs, lo_x, hi_x, out=xs)
+    np.clip(ys, lo_y, hi_y, out=ys)
+    clearance = radii + SOLVER_SLACK / 2
+    n = len(xs)
+
+    # Only drills that still have overlaps are swept again
+    active = np.arange(n)
+    for _ in range(iterations):
+        i, j = find_overlaps(groups[active], xs[active], ys[active], clearance[active])
+        if not len(i):
+            break
+        i = active[i]
+        j = active[j]
+
+        dx = xs[j] - xs[i]
+        dy = ys[j] - ys[i]
+        distance = np.hypot(dx, dy)
+        # Coincident entities separate along a fixed, per-pair direction
+        coincident = distance < 1e-9
+        angle = (i[coincident] * 2.399963) % (2 * np.pi)
+        dx[coincident] = np.cos(angle)
+        dy[coincident] = np.sin(angle)
+        distance[coincident] = 1.0
+
+        # Aim a hair past the clearance so a resolved pair does not register again
+        push = (clearance[i] + clearance[j] + 1e-3 - distance) / distance
+        share_i = mobility[i] / (mobility[i] + mobility[j])
+        share_j = 1 - share_i
+        xs -= np.bincount(i, dx * push * share_i, n) - np.bincount(j, dx * push * share_j, n)
+        ys -= np.bincount(i, dy * push * share_i, n) - np.bincount(j, dy * push * share_j, n)
+        np.clip(xs, lo_x, hi_x, out=xs)
+        np.clip(ys, lo_y, hi_y, out=ys)
+
+        active = np.flatnonzero(np.isin(groups, np.unique(groups[i])))
+
+    return xs, ys
+
+def zone_bounds(widths: np.ndarray, heights: np.ndarray, footprints: np.ndarray,
+                center_x: float, center_y: float) -> np.ndarray:
+    """(min_x, max_x, min_y, max_y) per drill: the drill area, grown if it cannot fit its entities and
+    always kept on the field"""
+    area = widths * heights
+    needed = footprints * MIN_PACKING_AREA
+    grow = np.sqrt(np.maximum(1.0, needed / np.maximum(area, 1e-9)))
+    half_w = np.minimum(widths * grow, FIELD_WIDTH) / 2
+    half_h = np.minimum(heights * grow, FIELD_HEIGHT) / 2
+    return np.stack([
+        np.maximum(center_x - half_w, 0), np.minimum(center_x + half_w, FIELD_WIDTH),
+        np.maximum(center_y - half_h, 0), np.minimum(center_y + half_h, FIELD_HEIGHT)
+    ], axis=1)
+
+class LayoutBatch:
+    """Player and cone positions for a batch of drills, held as flat NumPy arrays
+
+    Dicts are only built when a drill's positions are requested through
+    players() / cones(), so the geometry itself carries no per-entity overhead.
+    With drill_heights, the ring layout is post-processed by the overlap
+    solver: players and cones are pushed apart and kept inside the drill area.
+    detected optionally gives, per drill, field positions read from its
+    diagram ({'blue', 'red'} and/or {'cones'} as (n, 2) arrays); those
+    replace the ring counts and positions for that drill.
+    """
+
+    def __init__(self, player_counts: Sequence[int], drill_widths: Sequence[float], blue_ratio: float,
+                 cone_counts: Sequence[int], max_cones: int = None,
+                 center_x: float = FIELD_WIDTH / 2, center_y: float = FIELD_HEIGHT / 2,
+                 drill_heights: Sequence[float] = None,
+                 detected: Sequence[Dict[str, np.ndarray]] = None):
+        player_counts = np.asarray(player_counts, dtype=np.int64)
+        widths = np.asarray(drill_widths, dtype=float)
+        cone_divisors = np.array(cone_counts, dtype=np.int64)
+        detected = list(detected) if detected is not None else []
+
+        # Team split
+        self.blue_counts = np.maximum(1, (player_counts * blue_ratio).astype(np.int64))
+        self.red_counts = np.maximum(0, player_counts - self.blue_counts)
+        self.cone_counts = np.minimum(cone_divisors, max_cones) if max_cones else cone_divisors.copy()
+
+        # Drills with a readable diagram keep what it shows
+        for index, positions in enumerate(detected):
+            if positions and 'blue' in positions:
+                self.blue_counts[index] = len(positions['blue'])
+                self.red_counts[index] = len(positions['red'])
+            if positions and 'cones' in positions:
+                self.cone_counts[index] = cone_divisors[index] = len(positions['cones'])
+
+        # Blue players (attackers) spread around the perimeter
+        self.blue_x, self.blue_y, blue_angles, self.blue_starts = _ring_positions(
+            self.blue_counts, self.blue_counts, widths / 2.5, False, center_x, center_y
+        )
+        self.blue_rotation = ((blue_angles * 180 / np.pi) % 360).astype(np.int64)
+
+        # Red players (defenders) inside the formation, offset by half a step
+        self.red_x, self.red_y, red_angles, self.red_starts = _ring_positions(
+            self.red_counts, np.maximum(1, self.red_counts), widths / 5, True, center_x, center_y
+        )
+        self.red_rotation = ((red_angles * 180 / np.pi + 180) % 360).astype(np.int64)
+
+        # Cones marking the area
+        self.cone_x, self.cone_y, _, self.cone_starts = _ring_positions(
+            self.cone_counts, np.maximum(1, cone_divisors), widths / 2, False, center_x, center_y
+        )
+
+        self.center_x = center_x
+        self.center_y = center_y
+        self._place_detected(detected)
+        self.unresolved_overlaps = 0
+        if drill_heights is not None:
+            self.separate(widths, np.asarray(drill_heights, dtype=float))
+
+    def _place_detected(self, detected: List[Dict[str, np.ndarray]]):
+        """Overwrite ring positions with detected ones; players face away from the center like the rings"""
+        roles = {
+            'blue': (self.blue_x, self.blue_y, self.blue_starts, self.blue_rotation, 0),
+            'red': (self.red_x, self.red_y, self.red_starts, self.red_rotation, 180),
+            'cones': (self.cone_x, self.cone_y, self.cone_starts, None, 0)
+        }
+        for index, positions in enumerate(detected):
+            for role, points in (positions or {}).items():
+                xs, ys, starts, rotation, facing = roles[role]
+                start, end = starts[index], starts[index] + len(points)
+                xs[start:end] = np.round(points[:, 0], 1)
+                ys[start:end] = np.round(points[:, 1], 1)
+                if rotation is not None:
+                    angles = np.degrees(np.arctan2(points[:, 1] - self.center_y, points[:, 0] - self.center_x))
+                    rotation[start:end] = ((angles + facing) % 360).astype(np.int64)
+
+    def separate(self, widths: np.ndarray, heights: np.ndarray):
+        """Resolve overlaps between all players and cones of every drill in one solve"""
+        sizes = (len(self.blue_x), len(self.red_x), len(self.cone_x))
+        drills = np.arange(len(self))
+        groups = np.concatenate([
+            np.repeat(drills, self.blue_counts),
+            np.repeat(drills, self.red_counts),
+            np.repeat(drills, self.cone_counts)
+        ])
+        xs = np.concatenate([self.blue_x, self.red_x, self.cone_x])
+        ys = np.concatenate([self.blue_y, self.red_y, self.cone_y])
+        is_cone = np.arange(len(xs)) >= sizes[0] + sizes[1]
+        radii = np.where(is_cone, CONE_RADIUS, PLAYER_RADIUS)
+        mobility = np.where(is_cone, CONE_MOBILITY, PLAYER_MOBILITY)
+
+        footprints = np.bincount(groups, (2 * radii + SOLVER_SLACK) ** 2, len(self))
+        bounds = zone_bounds(widths, heights, footprints, self.center_x, self.center_y)
+        xs, ys = resolve_overlaps(groups, xs, ys, radii, mobility, bounds)
+
+        xs = np.round(xs, 1)
+        ys = np.round(ys, 1)
+        self.unresolved_overlaps = len(find_overlaps(groups, xs, ys, radii)[0])
+        split = np.cumsum(sizes)[:2]
+        self.blue_x, self.red_x, self.cone_x = np.split(xs, split)
+        self.blue_y, self.red_y, self.cone_y = np.split(ys, split)
+
+    def __len__(self) -> int:
+        return len(self.blue_counts)
+
+    def players(self, index: int) -> List[Dict[str, Any]]:
+        """Materialize the player dicts for one drill of the batch"""
+        players = []
+
+        start, count = self.blue_starts[index], self.blue_counts[index]
+        for i, (x, y, rotation) in enumerate(zip(self.blue_x[start:start + count].tolist(),
+                                                 self.blue_y[start:start + count].tolist(),
+                                                 self.blue_rotation[start:start + count].tolist())):
+            players.append({
+                'id': f'ATT{i+1}',
+                'x': x,
+                'y': y,
+                'name': f'Attacker {i+1}',
+                'team': 'blue',
+                'role': 'midfielder',
+                'jerseyNumber': i + 7,
+                'rotation': rotation,
+                'isActive': True
+            })
+
+        start, count = self.red_starts[index], self.red_counts[index]
+        for i, (x, y, rotation) in enumerate(zip(self.red_x[start:start + count].tolist(),
+                                                 self.red_y[start:start + count].tolist(),
+                                                 self.red_rotation[start:start + count].tolist())):
+            players.append({
+                'id': f'DEF{i+1}',
+                'x': x,
+                'y': y,
+                'name': f'Defender {i+1}',
+                'team': 'red',
+                'role': 'defender',
+                'jerseyNumber': i + 2,
+                'rotation': rotation,
+                'isActive': True
+            })
+
+        return players
+
+    def cones(self, index: int) -> List[Dict[str, Any]]:
+        """Materialize the cone dicts for one drill of the batch"""
+        start, count = self.cone_starts[index], self.cone_counts[index]
+        return [
+            {
+                'id': f'cone-{i+1}',
+                'x': x,
+                'y': y,
+                'type': 'cone',
+                'color': 'orange',
+                'size': 'small'
+            }
+            for i, (x, y) in enumerate(zip(self.cone_x[start:start + count].tolist(),
+                                           self.cone_y[start:start + count].tolist()))
+        ]
+
+def parse_field_size(field_size: str, default: Tuple[int, int] = (30, 30)) -> Tuple[int, int]:
+    """Parse a 'WxH' field size into integer dimensions"""
+    try:
+        dims = field_size.split('x')
+        return int(dims[0]), int(dims[1])
+    except (AttributeError, IndexError, ValueError):
+        return default